@@ -0,0 +1,91 @@
+"""
+parallel.py 批量执行基准：原线程池写法 vs 单事件循环 run_batch
+
+使用模拟 Runner（固定延迟的异步 I/O，不调用模型），只比较调度方式本身的吞吐与延迟。
+
+    python benchmark_parallel.py --sizes 10 100 1000 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from parallel import run_batch, summarize
+
+
+class SimulatedRunner:
+    """模拟一次 agent 调用：网络等待为主，延迟在 [0.5, 1.5] * latency 之间"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def run(self, messages: str, session_id: str) -> str:
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        return f"done: {session_id}"
+
+
+def run_thread_pool(runner, prompts):
+    """原实现：每个 prompt 一个线程、一个新的事件循环"""
+
+    def run_in_event_loop(prompt, session_id):
+        start = time.perf_counter()
+        asyncio.run(runner.run(messages=prompt, session_id=session_id))
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor() as executor:
+        tasks = [
+            executor.submit(run_in_event_loop, prompt, session_id)
+            for prompt, session_id in prompts
+        ]
+        return [task.result() for task in tasks]
+
+
+async def run_single_loop(runner, prompts, concurrency):
+    return [
+        result async for result in run_batch(runner, prompts, concurrency=concurrency)
+    ]
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def main(sizes: list[int], latency: float, concurrency: int):
+    runner = SimulatedRunner(latency)
+    for size in sizes:
+        prompts = [(f"prompt {i}", str(uuid.uuid4())) for i in range(size)]
+
+        start = time.perf_counter()
+        latencies = run_thread_pool(runner, prompts)
+        wall = time.perf_counter() - start
+        print(
+            f"[{size:>5}] thread pool      wall {wall:7.2f}s  "
+            f"{size / wall:8.1f} prompt/s  p50 {_percentile(latencies, 0.5):.3f}s  "
+            f"p99 {_percentile(latencies, 0.99):.3f}s"
+        )
+
+        start = time.perf_counter()
+        results = asyncio.run(run_single_loop(runner, prompts, concurrency))
+        stats = summarize(results, time.perf_counter() - start)
+        print(
+            f"[{size:>5}] single loop      wall {stats['wall_time_s']:7.2f}s  "
+            f"{stats['throughput_per_s']:8.1f} prompt/s  p50 {stats['p50_s']:.3f}s  "
+            f"p99 {stats['p99_s']:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--latency", type=float, default=0.5, help="模拟单次调用延迟（秒）"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=100, help="run_batch 的并发上限"
+    )
+    args = parser.parse_args()
+    main(args.sizes, args.latency, args.concurrency)
@@ -1,30 +1,168 @@
-from veadk import Agent, Runner
-from veadk.tools.builtin_tools.execute_skills import execute_skills
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import os
+import time
 import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from veadk import Agent, Runner
+from veadk.tools.builtin_tools.execute_skills import execute_skills
+
+# 并发度、单个 prompt 超时与模型限额，均可通过环境变量调整
+CONCURRENCY = int(os.getenv("PARALLEL_CONCURRENCY", "8"))
+PROMPT_TIMEOUT = float(os.getenv("PARALLEL_PROMPT_TIMEOUT", "600"))
+MODEL_RPM = int(os.getenv("MODEL_RPM", "0"))  # 0 表示不限制
+MODEL_TPM = int(os.getenv("MODEL_TPM", "0"))
+# 每个 prompt 预估的输出 + 工具往返 token，用于 TPM 预算
+EST_OUTPUT_TOKENS = int(os.getenv("PARALLEL_EST_OUTPUT_TOKENS", "2000"))
+
+
+@dataclass
+class PromptResult:
+    index: int
+    session_id: str
+    response: Optional[str]
+    error: Optional[str]
+    latency: float
+
+
+class RateLimiter:
+    """按分钟请求数（RPM）与分钟 token 数（TPM）限流的令牌桶"""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int = 0):
+        if not (self.rpm or self.tpm):
+            return
+        # 单次预算超过桶容量时按容量计，避免永远等不到
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        # 持锁等待保证先到先得，后来者不会插队饿死大请求
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self.rpm
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= tokens
+
+
+def estimate_tokens(prompt: str) -> int:
+    # 中文约 1 字 1 token，足够用于限流预算
+    return len(prompt) + EST_OUTPUT_TOKENS
+
+
+async def run_batch(
+    runner: Runner,
+    prompts: list[tuple[str, str]],
+    concurrency: int = CONCURRENCY,
+    timeout: float = PROMPT_TIMEOUT,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[PromptResult]:
+    """
+    在同一个事件循环中并发执行多个 prompt，按完成顺序逐个产出结果。
+
+    Args:
+        runner: 共享的 Runner
+        prompts: (prompt, session_id) 列表
+        concurrency: 同时执行的 prompt 数上限
+        timeout: 单个 prompt 的超时时间（秒，不含排队与限流等待）
+        limiter: 可选的 RPM/TPM 限流器
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index: int, prompt: str, session_id: str) -> PromptResult:
+        async with semaphore:
+            if limiter:
+                await limiter.acquire(estimate_tokens(prompt))
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = await asyncio.wait_for(
+                    runner.run(messages=prompt, session_id=session_id), timeout
+                )
+            except asyncio.TimeoutError:
+                error = f"timeout after {timeout}s"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            return PromptResult(
+                index, session_id, response, error, time.perf_counter() - start
+            )
+
+    tasks = [
+        asyncio.create_task(run_one(index, prompt, session_id))
+        for index, (prompt, session_id) in enumerate(prompts)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def summarize(results: list[PromptResult], wall_time: float) -> dict:
+    """单个 prompt 耗时分位数与整体吞吐"""
+    latencies = sorted(result.latency for result in results)
+
+    def percentile(p: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)]
+
+    return {
+        "prompts": len(results),
+        "failed": sum(1 for result in results if result.error),
+        "wall_time_s": round(wall_time, 3),
+        "throughput_per_s": round(len(results) / wall_time, 2) if wall_time else 0,
+        "p50_s": round(percentile(0.5), 3),
+        "p90_s": round(percentile(0.9), 3),
+        "p99_s": round(percentile(0.99), 3),
+        "max_s": round(latencies[-1], 3) if latencies else 0,
+    }
 
 
 async def main(prompts: list[tuple[str, str]]) -> list[str]:
-    """Runs agent tasks in parallel using a thread pool."""
+    """Runs agent tasks concurrently on one event loop."""
     agent = Agent(
         name="skill_agent",
         instruction="根据用户的需求，调用 execute_skills 工具执行 skills，",
         tools=[execute_skills],
     )
     runner = Runner(agent=agent)
+    limiter = RateLimiter(rpm=MODEL_RPM, tpm=MODEL_TPM)
 
-    def run_in_event_loop(prompt, session_id):
-        return asyncio.run(runner.run(messages=prompt, session_id=session_id))
-
-    with ThreadPoolExecutor() as executor:
-        tasks = [
-            executor.submit(run_in_event_loop, prompt, session_id)
-            for prompt, session_id in prompts
-        ]
-        results = [task.result() for task in tasks]
+    results: list[Optional[PromptResult]] = [None] * len(prompts)
+    start = time.perf_counter()
+    async for result in run_batch(runner, prompts, limiter=limiter):
+        status = result.error or "ok"
+        print(f"[{result.index}] {result.latency:.1f}s {status}")
+        results[result.index] = result
+    print(summarize(results, time.perf_counter() - start))
 
-    return results
+    return [result.response or result.error for result in results]
 
 
 if __name__ == "__main__":
@@ -1,7 +1,13 @@
+import codecs
+import json
 import os
+import threading
+import time
+from typing import Iterator, Tuple
+
 from dotenv import load_dotenv
 from authlib.integrations.flask_client import OAuth
-from flask import Flask, redirect, render_template
+from flask import Flask, redirect, render_template, request
 from flask_socketio import SocketIO
 import jwt
 import httpx
@@ -33,39 +39,193 @@ class StreamingError(BaseModel):
     message: str
 
 
+# 所有消息共享一个带连接池的客户端，避免每条消息重新建立 TCP/TLS 连接
+http_client = httpx.Client(
+    timeout=300,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+)
+
+# 文本 token 合并后再推送的最长间隔（秒）
+EMIT_INTERVAL = float(os.environ.get("SSE_EMIT_INTERVAL_MS", "30")) / 1000
+
+
 @socketio.on("send_message")
 def handle_message(data):
     """Handle incoming messages via WebSocket"""
     session_id = data.get("session_id", "web_session")
     message = data.get("message", "")
+    sid = request.sid
 
     if not message:
-        socketio.emit("error", {"message": "Message cannot be empty"})
+        socketio.emit("error", {"message": "Message cannot be empty"}, to=sid)
         return
 
+    # 流式转发在后台任务中执行，慢请求不会阻塞其他连接的消息处理
+    socketio.start_background_task(relay_message, message, session_id, sid)
+
+
+def relay_message(message: str, session_id: str, sid: str):
+    """Run one agent request and relay its responses to the socket `sid`"""
     # Emit typing indicator
-    socketio.emit("typing", {"status": True})
+    socketio.emit("typing", {"status": True}, to=sid)
 
     try:
         # Run SSE client and stream responses
-        run_sse_client_stream(message, session_id, agent_endpoint)
+        run_sse_client_stream(message, session_id, agent_endpoint, sid)
     except httpx.ConnectError:
         socketio.emit(
             "error",
             {"message": "连接错误: 无法连接到服务器。请检查网络连接和API端点配置。"},
+            to=sid,
         )
     except httpx.HTTPStatusError as e:
         socketio.emit(
-            "error", {"message": f"HTTP错误: {e.response.status_code} - {str(e)}"}
+            "error",
+            {"message": f"HTTP错误: {e.response.status_code} - {str(e)}"},
+            to=sid,
         )
     except Exception as e:
-        socketio.emit("error", {"message": f"未知错误: {str(e)}"})
+        socketio.emit("error", {"message": f"未知错误: {str(e)}"}, to=sid)
     finally:
-        socketio.emit("typing", {"status": False})
+        socketio.emit("typing", {"status": False}, to=sid)
+
+
+class TextCoalescer:
+    """Merge streamed text parts and emit them at most once per EMIT_INTERVAL"""
+
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.parts = []
+        self.last_emit = time.monotonic()
+        self.closed = False
+        self.lock = threading.Lock()
+        # 定时刷新：流暂停（如等待工具执行）时已缓冲的文本也会在 EMIT_INTERVAL 内推送
+        socketio.start_background_task(self._flush_loop)
+
+    def add(self, text: str):
+        with self.lock:
+            self.parts.append(text)
+            if time.monotonic() - self.last_emit >= EMIT_INTERVAL:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+        self.closed = True
+
+    def _flush(self):
+        if self.parts:
+            socketio.emit(
+                "message_response",
+                {"content": "".join(self.parts), "type": "text"},
+                to=self.sid,
+            )
+            self.parts = []
+        self.last_emit = time.monotonic()
+
+    def _flush_loop(self):
+        while not self.closed:
+            socketio.sleep(EMIT_INTERVAL)
+            with self.lock:
+                if self.parts:
+                    self._flush()
+
+
+def _decode_chunks(chunks: Iterator[bytes]) -> Iterator[str]:
+    # 增量解码：被拆到两个 chunk 中的多字节字符会在下一个 chunk 到达后完整输出
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    # 补一个空行，保证没有以空行结尾的最后一个事件也会被分发
+    yield decoder.decode(b"", final=True) + "\n\n"
+
+
+def iter_sse_events(chunks: Iterator[bytes]) -> Iterator[Tuple[str, str]]:
+    """
+    Parse a byte stream into SSE (event, data) pairs.
+
+    Multi-line `data:` fields are joined with newlines; comment lines are skipped.
+    """
+    pending = ""
+    event_type, data_lines = "message", []
+    for text in _decode_chunks(chunks):
+        pending += text
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line = line.rstrip("\r")
+            if not line:
+                # 空行表示一个事件结束
+                if data_lines:
+                    yield event_type, "\n".join(data_lines)
+                event_type, data_lines = "message", []
+                continue
+            if line.startswith(":"):
+                continue  # 注释/心跳
+            field, _, value = line.partition(":")
+            if value.startswith(" "):
+                value = value[1:]
+            if field == "data":
+                data_lines.append(value)
+            elif field == "event":
+                event_type = value
+
+
+def dispatch_sse_data(data_content: str, coalescer: TextCoalescer) -> bool:
+    """Handle one SSE data payload; returns False when the stream should stop"""
+    sid = coalescer.sid
+    try:
+        payload = json.loads(data_content)
+        # 根据字段一次判断事件类型，不再对每个事件先尝试按 StreamingError 解析
+        if isinstance(payload, dict) and "error_type" in payload:
+            parsed = StreamingError.model_validate(payload)
+            coalescer.flush()
+            socketio.emit(
+                "error",
+                {"message": f"Error: {parsed.message}", "type": parsed.error_type},
+                to=sid,
+            )
+            return False
+        parsed = Event.model_validate(payload)
+    except (ValueError, ValidationError):
+        # Emit raw event data for debugging
+        coalescer.flush()
+        socketio.emit(
+            "message_response", {"content": data_content, "type": "raw"}, to=sid
+        )
+        return True
+
+    # 异步授权事件
+    if is_pending_auth_event(parsed):
+        auth_config = get_function_call_auth_config(parsed)
+        auth_uri = auth_config.exchanged_auth_credential.oauth2.auth_uri
+        coalescer.flush()
+        socketio.emit(
+            "auth_required",
+            {
+                "message": f"Authentication required. Please visit: {auth_uri}",
+                "auth_uri": auth_uri,
+            },
+            to=sid,
+        )
+
+    # Stream text content
+    has_text = False
+    if parsed.content and parsed.content.parts:
+        for part in parsed.content.parts:
+            if part.text:
+                coalescer.add(part.text)
+                has_text = True
+    if not has_text:
+        # 函数调用等非文本事件之前的文本立即推送，不等到工具执行结束
+        coalescer.flush()
+    return True
 
 
 def run_sse_client_stream(
-    message: str, session_id: str = None, agent_endpoint: str = None
+    message: str, session_id: str = None, agent_endpoint: str = None, sid: str = None
 ):
     """Run SSE client and stream events via WebSocket"""
 
@@ -93,91 +253,43 @@ def run_sse_client_stream(
             }
         )
 
-    with httpx.Client(timeout=300, headers=headers) as client:
-        url = f"{agent_endpoint}/invoke"
-        body = {"prompt": message}
-
-        with client.stream("POST", url, json=body, headers=headers) as response:
-            response.raise_for_status()
-            content_type = response.headers.get("content-type")
-            if "application/json" in content_type:
-                # no streaming
-                response.read()
-                text = response.json()
-                socketio.emit("message_response", {"content": text, "type": "text"})
-            elif "text/event-stream" in content_type:
-                # streaming
-                buffer = ""
-                for chunk in response.iter_bytes():
-                    try:
-                        text = chunk.decode("utf-8")
-                        buffer += text
-                    except UnicodeDecodeError:
-                        continue
-
-                    # Parse SSE events
-                    while "\n\n" in buffer:
-                        event, buffer = buffer.split("\n\n", 1)
-                        if event.startswith("data: "):
-                            data_content = event[6:]
-                            try:
-                                # Try StreamingError first
-                                try:
-                                    parsed = StreamingError.model_validate_json(
-                                        data_content
-                                    )
-                                    socketio.emit(
-                                        "error",
-                                        {
-                                            "message": f"Error: {parsed.message}",
-                                            "type": parsed.error_type,
-                                        },
-                                    )
-                                    return
-                                except ValidationError:
-                                    # If not StreamingError, try Event
-                                    parsed = Event.model_validate_json(data_content)
-
-                                    # 异步授权事件
-                                    if is_pending_auth_event(parsed):
-                                        auth_config = get_function_call_auth_config(
-                                            parsed
-                                        )
-                                        auth_uri = auth_config.exchanged_auth_credential.oauth2.auth_uri
-                                        socketio.emit(
-                                            "auth_required",
-                                            {
-                                                "message": f"Authentication required. Please visit: {auth_uri}",
-                                                "auth_uri": auth_uri,
-                                            },
-                                        )
-
-                                    # Stream text content
-                                    for part in parsed.content.parts:
-                                        if part.text:
-                                            socketio.emit(
-                                                "message_response",
-                                                {"content": part.text, "type": "text"},
-                                            )
-                            except ValidationError:
-                                # Emit raw event data for debugging
-                                socketio.emit(
-                                    "message_response",
-                                    {"content": data_content, "type": "raw"},
-                                )
-                        else:
-                            # Emit other events
-                            socketio.emit(
-                                "message_response", {"content": event, "type": "other"}
-                            )
-            else:
-                socketio.emit(
-                    "message_response",
-                    {
-                        "content": f'Unknown content type: "{content_type}"',
-                        "type": "error",
-                    },
-                )
+    url = f"{agent_endpoint}/invoke"
+    body = {"prompt": message}
+
+    with http_client.stream("POST", url, json=body, headers=headers) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if "application/json" in content_type:
+            # no streaming
+            response.read()
+            text = response.json()
+            socketio.emit("message_response", {"content": text, "type": "text"}, to=sid)
+        elif "text/event-stream" in content_type:
+            # streaming
+            coalescer = TextCoalescer(sid)
+            try:
+                for event_type, data_content in iter_sse_events(response.iter_bytes()):
+                    if event_type != "message":
+                        # Emit other events
+                        coalescer.flush()
+                        socketio.emit(
+                            "message_response",
+                            {"content": data_content, "type": "other"},
+                            to=sid,
+                        )
+                    elif not dispatch_sse_data(data_content, coalescer):
+                        return
+            finally:
+                coalescer.close()
+        else:
+            socketio.emit(
+                "message_response",
+                {
+                    "content": f'Unknown content type: "{content_type}"',
+                    "type": "error",
+                },
+                to=sid,
+            )
 
 
 # ==========================================================================================
@@ -26,6 +26,29 @@ def error_status(tool_name: str, reason: str) -> dict:
     return {"status": {"success": False, "message": f"{tool_name} Error: {reason}"}}
 
 
+def mark_partial_success(
+    tool_name: str, tool_response: dict, expected: int, missing: list[str]
+) -> Optional[dict]:
+    """Keep the successful items and tell the model to regenerate only the missing ones.
+
+    The response is updated in place and None is returned, so the following
+    callbacks (e.g. URL shortening) still run on the successful items. When
+    nothing succeeded, a standardized error is returned instead.
+    """
+    actual = len(tool_response.get("success_list", []))
+    reason = f"生成成功 {actual} 个，与预期 ({expected}) 不符，已自动重试失败项。"
+    logger.warning(f"{tool_name}: {reason} missing: {missing}")
+    if actual == 0:
+        return error_status(tool_name, reason)
+
+    tool_response["status"] = "partial_success"
+    tool_response["error_list"] = missing
+    tool_response["message"] = (
+        f"{reason}请保留 success_list 中已生成的结果，仅针对 error_list 中的失败项重新调用，不要重新生成已成功的项。"
+    )
+    return None
+
+
 def raise_result_error(
     tool: BaseTool, args: dict[str, Any], tool_context: ToolContext, tool_response: Any
 ) -> Optional[Any]:
@@ -39,8 +62,11 @@ def raise_result_error(
       the `tasks` list, considering both single and group generation requests.
     - For `video_generate`, it checks the number of videos requested in the `params` list.
 
-    If a mismatch is found, it returns a formatted error dictionary to halt
-    the workflow and notify the user.
+    The generation tools already retry failed items on their own. If some
+    items are still missing, the successful ones are kept and the response is
+    marked as `partial_success` with the missing items in `error_list`, so only
+    those are resubmitted. A formatted error is returned only when nothing
+    was generated.
     """
     if tool.name == "image_generate":
         try:
@@ -48,15 +74,16 @@ def raise_result_error(
             if not tasks:
                 return None  # No tasks to check
 
-            # Calculate the total number of images expected from all tasks
-            total_expected_images = 0
-            for task in tasks:
+            # Calculate the images expected from all tasks, named like the tool output
+            expected_names = []
+            for task_idx, task in enumerate(tasks):
                 task_type = task.get("task_type", "")
                 is_group_task = "group" in task_type
-                if is_group_task:
-                    total_expected_images += task.get("max_images", 1)
-                else:
-                    total_expected_images += 1
+                count = task.get("max_images", 1) if is_group_task else 1
+                expected_names.extend(
+                    f"task_{task_idx}_image_{i}" for i in range(count)
+                )
+            total_expected_images = len(expected_names)
 
             logger.debug(f"Expected {total_expected_images} images to be generated.")
 
@@ -65,9 +92,11 @@ def raise_result_error(
                 actual_images = len(success_list)
 
                 if actual_images != total_expected_images:
-                    reason = f"生成的图片总数 ({actual_images}) 与预期 ({total_expected_images}) 不符。"
-                    logger.warning(reason)
-                    return error_status(tool.name, reason)
+                    generated = {name for item in success_list for name in item}
+                    missing = [n for n in expected_names if n not in generated]
+                    return mark_partial_success(
+                        tool.name, tool_response, total_expected_images, missing
+                    )
             else:
                 logger.warning(
                     f"Tool response for {tool.name} is not a dict: {tool_response}"
@@ -91,9 +120,15 @@ def raise_result_error(
                 actual_videos = len(success_list)
 
                 if actual_videos != total_expected_videos:
-                    reason = f"生成的视频总数 ({actual_videos}) 与预期 ({total_expected_videos}) 不符。"
-                    logger.warning(reason)
-                    return error_status(tool.name, reason)
+                    generated = {name for item in success_list for name in item}
+                    missing = [
+                        p["video_name"]
+                        for p in params
+                        if p.get("video_name") not in generated
+                    ]
+                    return mark_partial_success(
+                        tool.name, tool_response, total_expected_videos, missing
+                    )
             else:
                 logger.warning(
                     f"Tool response for {tool.name} is not a dict: {tool_response}"
@@ -18,10 +18,14 @@ from typing import Dict
 from director_agent.tools.image_generate_builtin_fix import (
     image_generate as image_generate_builtin,
 )
+from veadk.config import getenv
 from veadk.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Retry budget for flattened tasks that failed, successful images are never regenerated
+IMAGE_GENERATE_MAX_RETRIES = int(getenv("IMAGE_GENERATE_MAX_RETRIES", "2"))
+
 
 async def image_generate(tasks: list[dict], tool_context) -> Dict:
     """Generate images with Seedream 4.0.
@@ -96,8 +100,10 @@ async def image_generate(tasks: list[dict], tool_context) -> Dict:
             "success_list": [
                 {"image_name": "url"}
             ],
-            "error_list": ["image_name"]
+            "error_list": ["image_name"],
+            "item_status": [{"name": "image_name", "status": "success", "attempts": 1}]
         }
+        失败的图片会自动重试（仅重试失败项），error_list 中为重试后仍失败的图片。
     Notes:
     - 组图任务必须 sequential_image_generation="auto"。
     - size 推荐使用 2048x2048 或表格里的标准比例，确保生成质量。
@@ -137,47 +143,63 @@ async def image_generate(tasks: list[dict], tool_context) -> Dict:
             )
         task["watermark"] = False
 
-    # Call the underlying image_generate function with the flattened list of tasks
+    # Call the underlying image_generate function with the flattened list of tasks,
+    # then retry only the flattened tasks that did not produce an image
     logger.debug(f"image_generate_gather new_tasks: {new_tasks}")
-    raw_result = await image_generate_builtin(new_tasks, tool_context)
-    logger.debug(f"image_generate_gather raw_result: {raw_result}")
+    succeeded: dict[int, str] = {}  # new_task_idx -> url
+    attempts = [0] * len(new_tasks)
+    pending = list(range(len(new_tasks)))
+    status = None
+
+    for attempt in range(IMAGE_GENERATE_MAX_RETRIES + 1):
+        if not pending:
+            break
+        if attempt:
+            logger.warning(
+                f"image_generate_gather retry {attempt}/{IMAGE_GENERATE_MAX_RETRIES} for tasks {pending}"
+            )
+        raw_result = await image_generate_builtin(
+            [new_tasks[i] for i in pending], tool_context
+        )
+        logger.debug(f"image_generate_gather raw_result: {raw_result}")
+        if status != "success":
+            status = raw_result.get("status")
+
+        for i in pending:
+            attempts[i] += 1
+        for success_item in raw_result.get("success_list", []):
+            for key, url in success_item.items():
+                # Key is like 'task_{idx}_image_{i}', idx is relative to this attempt
+                match = re.match(r"task_(\d+)_image_(\d+)", key)
+                if not match or int(match.group(1)) >= len(pending):
+                    continue
+                succeeded.setdefault(pending[int(match.group(1))], url)
+        pending = [i for i in pending if i not in succeeded]
 
     # Remap the results to match the original task structure
     remapped_success = []
     remapped_errors = set()
+    item_status = []
 
-    for success_item in raw_result.get("success_list", []):
-        for key, url in success_item.items():
-            # Key is like 'task_{idx}_image_{i}'
-            match = re.match(r"task_(\d+)_image_(\d+)", key)
-            if not match:
-                continue
-
-            new_task_idx = int(match.group(1))
-            if new_task_idx >= len(task_origin_info):
-                continue
-
-            original_idx, original_sub_idx = task_origin_info[new_task_idx]
-            new_key = f"task_{original_idx}_image_{original_sub_idx}"
-            remapped_success.append({new_key: url})
-
-    for error_item in raw_result.get("error_list", []):
-        # Error item is like 'task_{idx}'
-        match = re.match(r"task_(\d+)", error_item)
-        if match:
-            new_task_idx = int(match.group(1))
-            if new_task_idx < len(task_origin_info):
-                original_idx, _ = task_origin_info[new_task_idx]
-                remapped_errors.add(f"task_{original_idx}")
-            else:
-                remapped_errors.add(error_item)  # Keep original error if mapping fails
+    for new_task_idx, (original_idx, original_sub_idx) in enumerate(task_origin_info):
+        new_key = f"task_{original_idx}_image_{original_sub_idx}"
+        if new_task_idx in succeeded:
+            remapped_success.append({new_key: succeeded[new_task_idx]})
         else:
-            remapped_errors.add(error_item)
+            remapped_errors.add(new_key)
+        item_status.append(
+            {
+                "name": new_key,
+                "status": "success" if new_task_idx in succeeded else "error",
+                "attempts": attempts[new_task_idx],
+            }
+        )
     logger.debug(f"image_generate_gather remapped_success: {remapped_success}")
     logger.debug(f"image_generate_gather remapped_errors: {remapped_errors}")
 
     return {
-        "status": raw_result.get("status"),
+        "status": status if remapped_success else "error",
         "success_list": remapped_success,
-        "error_list": list(remapped_errors),
+        "error_list": sorted(remapped_errors),
+        "item_status": item_status,
     }
@@ -18,7 +18,6 @@ import os
 import traceback
 from typing import Dict
 import aiohttp
-import urllib.parse
 
 from google.adk.tools import ToolContext
 from opentelemetry import trace
@@ -29,60 +28,18 @@ from veadk.consts import DEFAULT_VIDEO_MODEL_API_BASE, DEFAULT_VIDEO_MODEL_NAME
 from veadk.utils.logger import get_logger
 from veadk.version import VERSION
 
+from short_url_resolver import resolve_short_urls
+
 logger = get_logger(__name__)
 
+# Retry budget for videos that failed, successful videos are never regenerated
+VIDEO_GENERATE_MAX_RETRIES = int(getenv("VIDEO_GENERATE_MAX_RETRIES", "2"))
+
 # 短链接服务配置
 shorten_url_service_url = os.getenv("SHORTEN_URL_SERVICE_URL", None)
 assert shorten_url_service_url, "SHORTEN_URL_SERVICE_URL is not set"
 
 
-async def resolve_short_url(short_url: str) -> str:
-    """
-    将短链接还原为原始URL
-
-    Args:
-        short_url: 短链接URL
-
-    Returns:
-        原始URL，如果解析失败则返回短链接本身
-    """
-    if not shorten_url_service_url:
-        return short_url
-
-    try:
-        # 从短链接中提取短码
-        # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
-        parsed_url = urllib.parse.urlparse(short_url)
-        path_parts = parsed_url.path.strip("/").split("/")
-
-        if len(path_parts) >= 2 and path_parts[0] == "t":
-            # 调用短链接服务的重定向接口来获取原始URL
-            async with aiohttp.ClientSession() as session:
-                # 使用GET请求获取原始URL（短链接服务直接返回原始URL字符串）
-                async with session.get(short_url) as response:
-                    if response.status == 200:
-                        # 短链接服务直接返回原始URL字符串
-                        original_url = await response.text()
-                        original_url = original_url.strip().strip('"')
-                        logger.debug(
-                            f"Successfully resolved short URL: {short_url} -> {original_url}"
-                        )
-                        return original_url
-                    else:
-                        logger.warning(
-                            f"Failed to resolve short URL: {short_url}, status: {response.status}"
-                        )
-                        return short_url
-        else:
-            logger.warning(f"Not a valid short URL format: {short_url}")
-            return short_url
-
-    except Exception as e:
-        logger.error(f"Error resolving short URL {short_url}: {e}")
-        # 如果解析失败，返回原始短链接
-        return short_url
-
-
 async def generate(prompt, first_frame_image=None, last_frame_image=None):
     """
     Generate a video using HTTP requests
@@ -94,10 +51,9 @@ async def generate(prompt, first_frame_image=None, last_frame_image=None):
     model = getenv("MODEL_VIDEO_NAME", DEFAULT_VIDEO_MODEL_NAME)
 
     # 解析短链接为原始URL
-    if first_frame_image:
-        first_frame_image = await resolve_short_url(first_frame_image)
-    if last_frame_image:
-        last_frame_image = await resolve_short_url(last_frame_image)
+    first_frame_image, last_frame_image = await resolve_short_urls(
+        [first_frame_image, last_frame_image]
+    )
 
     # Build the content array
     prompt_with_media = f"（可以有极其轻度的动作音，但禁止任何人声，禁止背景音乐，禁止音效，禁止旁白，禁止解说）{prompt}"
@@ -226,8 +182,11 @@ async def video_generate(
             {
                 "status": "success",
                 "success_list": [{"video_name": "video_url"}],
-                "error_list": []
+                "error_list": [],
+                "item_status": [{"name": "video_name", "status": "success", "attempts": 1}]
             }
+            Failed videos are retried automatically (only the failed ones); error_list
+            holds the videos that still failed after the retries.
 
     Constraints & Tips:
         - Keep prompt concise and focused (建议 ≤ 500 字); too many details may distract the model.
@@ -259,7 +218,6 @@ async def video_generate(
             ]
     """
     success_list = []
-    error_list = []
     api_key = getenv(
         "MODEL_VIDEO_API_KEY", getenv("MODEL_AGENT_API_KEY", settings.model.api_key)
     )
@@ -269,113 +227,140 @@ async def video_generate(
     logger.debug(f"Using model: {model}")
     logger.debug(f"video_generate params: {params}")
 
-    for start_idx in range(0, len(params), batch_size):
-        batch = params[start_idx : start_idx + batch_size]
-        logger.debug(f"video_generate batch {start_idx // batch_size}: {batch}")
-
-        task_dict = {}  # task_id: video_name
-        tracer = trace.get_tracer("gcp.vertex.agent")
-        with tracer.start_as_current_span("call_llm") as span:
-            input_part = {"role": "user"}
-            output_part = {"message.role": "model"}
-            total_tokens = 0
-
-            for idx, item in enumerate(batch):
-                input_part[f"parts.{idx}.type"] = "text"
-                input_part[f"parts.{idx}.text"] = json.dumps(item, ensure_ascii=False)
-
-                video_name = item["video_name"]
-                prompt = item["prompt"]
-                first_frame = item.get("first_frame", None)
-                last_frame = item.get("last_frame", None)
-
-                try:
-                    # Create video generation task
-                    response = await generate(prompt, first_frame, last_frame)
-                    task_id = response["id"]
-                    task_dict[task_id] = video_name
-                    logger.debug(f"Created task {task_id} for video {video_name}")
-                except Exception as e:
-                    logger.error(f"Error creating task for {video_name}: {e}")
-                    error_list.append(video_name)
-                    continue
-
-            logger.debug("Begin querying video_generate task status...")
-
-            while True:
-                task_list = list(task_dict.keys())
-                if len(task_list) == 0:
-                    break
-
-                # Check each task status
-                async with aiohttp.ClientSession() as session:
-                    headers = {
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                        "veadk-source": "veadk",
-                        "veadk-version": VERSION,
-                        "User-Agent": f"VeADK/{VERSION}",
-                        "X-Client-Request-Id": getenv(
-                            "MODEL_AGENT_CLIENT_REQ_ID", f"veadk/{VERSION}"
-                        ),
-                    }
-
-                    for task_id in task_list:
-                        try:
-                            async with session.get(
-                                f"{base_url.rstrip('/')}/contents/generations/tasks/{task_id}",
-                                headers=headers,
-                            ) as response:
-                                response.raise_for_status()
-                                result = await response.json()
-                                status = result["status"]
-
-                                if status == "succeeded":
-                                    video_name = task_dict[task_id]
-                                    video_url = result["content"]["video_url"]
-                                    logger.debug(
-                                        f"{video_name} video_generate succeeded. Video URL: {video_url}"
-                                    )
-                                    tool_context.state[f"{video_name}_video_url"] = (
-                                        video_url
-                                    )
-
-                                    success_list.append({video_name: video_url})
-                                    task_dict.pop(task_id, None)
-
-                                elif status == "failed":
-                                    video_name = task_dict[task_id]
-                                    error_msg = result["error"]
-                                    logger.error(
-                                        f"{video_name} video_generate failed. Error: {error_msg}"
-                                    )
-                                    error_list.append(video_name)
-                                    task_dict.pop(task_id, None)
-
-                                else:
-                                    logger.debug(
-                                        f"{task_dict[task_id]} video_generate current status: {status}, Retrying after 10 seconds..."
-                                    )
-                        except Exception as e:
-                            logger.error(
-                                f"Error checking task status for {task_id}: {e}"
-                            )
-                            # Keep the task in the dict to retry later
-
-                # Wait before next polling
-                await asyncio.sleep(10)
-
-            # Add span attributes
-            add_span_attributes(
-                span,
-                tool_context,
-                input_part=input_part,
-                output_part=output_part,
-                output_tokens=total_tokens,
-                total_tokens=total_tokens,
-                request_model=model,
-                response_model=model,
+    # Only the videos that failed are resubmitted, bounded by the retry budget
+    pending = list(params)
+    attempts: dict[str, int] = {}
+    for attempt in range(VIDEO_GENERATE_MAX_RETRIES + 1):
+        if not pending:
+            break
+        if attempt:
+            logger.warning(
+                f"video_generate retry {attempt}/{VIDEO_GENERATE_MAX_RETRIES} for videos {[item['video_name'] for item in pending]}"
             )
+        failed_names = []
+        for item in pending:
+            attempts[item["video_name"]] = attempts.get(item["video_name"], 0) + 1
+        for start_idx in range(0, len(pending), batch_size):
+            batch = pending[start_idx : start_idx + batch_size]
+            logger.debug(f"video_generate batch {start_idx // batch_size}: {batch}")
+
+            task_dict = {}  # task_id: video_name
+            tracer = trace.get_tracer("gcp.vertex.agent")
+            with tracer.start_as_current_span("call_llm") as span:
+                input_part = {"role": "user"}
+                output_part = {"message.role": "model"}
+                total_tokens = 0
+
+                for idx, item in enumerate(batch):
+                    input_part[f"parts.{idx}.type"] = "text"
+                    input_part[f"parts.{idx}.text"] = json.dumps(
+                        item, ensure_ascii=False
+                    )
+
+                    video_name = item["video_name"]
+                    prompt = item["prompt"]
+                    first_frame = item.get("first_frame", None)
+                    last_frame = item.get("last_frame", None)
+
+                    try:
+                        # Create video generation task
+                        response = await generate(prompt, first_frame, last_frame)
+                        task_id = response["id"]
+                        task_dict[task_id] = video_name
+                        logger.debug(f"Created task {task_id} for video {video_name}")
+                    except Exception as e:
+                        logger.error(f"Error creating task for {video_name}: {e}")
+                        failed_names.append(video_name)
+                        continue
+
+                logger.debug("Begin querying video_generate task status...")
+
+                while True:
+                    task_list = list(task_dict.keys())
+                    if len(task_list) == 0:
+                        break
+
+                    # Check each task status
+                    async with aiohttp.ClientSession() as session:
+                        headers = {
+                            "Authorization": f"Bearer {api_key}",
+                            "Content-Type": "application/json",
+                            "veadk-source": "veadk",
+                            "veadk-version": VERSION,
+                            "User-Agent": f"VeADK/{VERSION}",
+                            "X-Client-Request-Id": getenv(
+                                "MODEL_AGENT_CLIENT_REQ_ID", f"veadk/{VERSION}"
+                            ),
+                        }
+
+                        for task_id in task_list:
+                            try:
+                                async with session.get(
+                                    f"{base_url.rstrip('/')}/contents/generations/tasks/{task_id}",
+                                    headers=headers,
+                                ) as response:
+                                    response.raise_for_status()
+                                    result = await response.json()
+                                    status = result["status"]
+
+                                    if status == "succeeded":
+                                        video_name = task_dict[task_id]
+                                        video_url = result["content"]["video_url"]
+                                        logger.debug(
+                                            f"{video_name} video_generate succeeded. Video URL: {video_url}"
+                                        )
+                                        tool_context.state[
+                                            f"{video_name}_video_url"
+                                        ] = video_url
+
+                                        success_list.append({video_name: video_url})
+                                        task_dict.pop(task_id, None)
+
+                                    elif status == "failed":
+                                        video_name = task_dict[task_id]
+                                        error_msg = result["error"]
+                                        logger.error(
+                                            f"{video_name} video_generate failed. Error: {error_msg}"
+                                        )
+                                        failed_names.append(video_name)
+                                        task_dict.pop(task_id, None)
+
+                                    else:
+                                        logger.debug(
+                                            f"{task_dict[task_id]} video_generate current status: {status}, Retrying after 10 seconds..."
+                                        )
+                            except Exception as e:
+                                logger.error(
+                                    f"Error checking task status for {task_id}: {e}"
+                                )
+                                # Keep the task in the dict to retry later
+
+                    # Wait before next polling
+                    await asyncio.sleep(10)
+
+                # Add span attributes
+                add_span_attributes(
+                    span,
+                    tool_context,
+                    input_part=input_part,
+                    output_part=output_part,
+                    output_tokens=total_tokens,
+                    total_tokens=total_tokens,
+                    request_model=model,
+                    response_model=model,
+                )
+        pending = [item for item in pending if item["video_name"] in failed_names]
+
+    error_list = [item["video_name"] for item in pending]
+    succeeded_names = {name for data in success_list for name in data}
+    item_status = [
+        {
+            "name": item["video_name"],
+            "status": "success" if item["video_name"] in succeeded_names else "error",
+            "attempts": attempts.get(item["video_name"], 0),
+        }
+        for item in params
+    ]
 
     if len(success_list) == 0:
         logger.debug(
@@ -385,6 +370,7 @@ async def video_generate(
             "status": "error",
             "success_list": success_list,
             "error_list": error_list,
+            "item_status": item_status,
         }
     else:
         logger.debug(
@@ -394,6 +380,7 @@ async def video_generate(
             "status": "success",
             "success_list": success_list,
             "error_list": error_list,
+            "item_status": item_status,
         }
 
 
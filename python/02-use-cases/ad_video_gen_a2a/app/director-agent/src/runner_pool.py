@@ -0,0 +1,122 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from veadk.runner import Runner
+
+
+class RunnerPool:
+    """A pool of runners serving concurrent `/run_agent` calls.
+
+    Each runner handles one request at a time, so setting `runner.user_id`
+    never leaks into another in-flight request. Requests of the same
+    (user_id, session_id) are serialized and routed back to the runner that
+    served the session last when it is idle. At most `max_in_flight`
+    requests run at once; the rest wait in a queue.
+    """
+
+    def __init__(
+        self,
+        runner_factory: Callable[[], Runner],
+        max_in_flight: int = 8,
+        max_tracked_sessions: int = 1024,
+    ):
+        self._runners = [runner_factory() for _ in range(max(1, max_in_flight))]
+        self._idle = set(range(len(self._runners)))
+        self._cond = asyncio.Condition()
+        self._session_locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._session_waiters: dict[tuple[str, str], int] = {}
+        self._affinity: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._max_tracked_sessions = max_tracked_sessions
+
+        self._queued = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._affinity_hits = 0
+        self._total_wait = 0.0
+
+    def _pick(self, key: tuple[str, str]) -> int:
+        preferred = self._affinity.get(key)
+        if preferred is not None and preferred in self._idle:
+            self._affinity_hits += 1
+            index = preferred
+        else:
+            index = min(self._idle)
+        self._idle.remove(index)
+        self._affinity[key] = index
+        self._affinity.move_to_end(key)
+        while len(self._affinity) > self._max_tracked_sessions:
+            self._affinity.popitem(last=False)
+        return index
+
+    @asynccontextmanager
+    async def acquire(self, user_id: str, session_id: str) -> AsyncIterator[Runner]:
+        key = (user_id, session_id)
+        session_lock = self._session_locks.setdefault(key, asyncio.Lock())
+        self._session_waiters[key] = self._session_waiters.get(key, 0) + 1
+
+        start = time.perf_counter()
+        self._queued += 1
+        self._max_queued = max(self._max_queued, self._queued)
+        dequeued = False
+        try:
+            async with session_lock:
+                async with self._cond:
+                    await self._cond.wait_for(lambda: bool(self._idle))
+                    index = self._pick(key)
+                self._queued -= 1
+                dequeued = True
+                self._total_wait += time.perf_counter() - start
+
+                runner = self._runners[index]
+                runner.user_id = user_id
+                try:
+                    yield runner
+                    self._completed += 1
+                except BaseException:
+                    self._failed += 1
+                    raise
+                finally:
+                    async with self._cond:
+                        self._idle.add(index)
+                        self._cond.notify()
+        finally:
+            # Cancelled while still waiting in the queue
+            if not dequeued:
+                self._queued -= 1
+            self._session_waiters[key] -= 1
+            if not self._session_waiters[key]:
+                del self._session_waiters[key]
+                del self._session_locks[key]
+
+    def stats(self) -> dict:
+        finished = self._completed + self._failed
+        return {
+            "max_in_flight": len(self._runners),
+            "in_flight": len(self._runners) - len(self._idle),
+            "queued": self._queued,
+            "max_queued": self._max_queued,
+            "completed": self._completed,
+            "failed": self._failed,
+            "affinity_hits": self._affinity_hits,
+            "avg_wait_seconds": round(self._total_wait / finished, 4)
+            if finished
+            else 0.0,
+        }
@@ -0,0 +1,146 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import os
+import urllib.parse
+from collections import OrderedDict
+from typing import Optional
+
+import aiohttp
+from veadk.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 短码一经生成不会再指向其他URL，解析结果可以在进程内长期缓存
+RESOLVER_CACHE_SIZE = int(os.getenv("SHORT_URL_RESOLVER_CACHE_SIZE", "4096"))
+RESOLVER_TIMEOUT = float(os.getenv("SHORT_URL_RESOLVER_TIMEOUT", "10"))
+
+_cache: OrderedDict[str, str] = OrderedDict()
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=RESOLVER_TIMEOUT)
+        )
+    return _session
+
+
+def _short_code(short_url: str) -> Optional[str]:
+    # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
+    path_parts = urllib.parse.urlparse(short_url).path.strip("/").split("/")
+    if len(path_parts) >= 2 and path_parts[0] == "t":
+        return path_parts[-1]
+    return None
+
+
+def _remember(short_url: str, original_url: str):
+    _cache[short_url] = original_url
+    _cache.move_to_end(short_url)
+    while len(_cache) > RESOLVER_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def _resolve_one(short_url: str) -> Optional[str]:
+    """逐个解析：调用短链接服务的跳转接口（直接返回原始URL字符串）"""
+    try:
+        async with _get_session().get(short_url) as response:
+            if response.status == 200:
+                return (await response.text()).strip().strip('"')
+            logger.warning(
+                f"Failed to resolve short URL: {short_url}, status: {response.status}"
+            )
+    except Exception as e:
+        logger.error(f"Error resolving short URL {short_url}: {e}")
+    return None
+
+
+async def _resolve_bulk(
+    service_url: str, codes: dict[str, str]
+) -> Optional[dict[str, Optional[str]]]:
+    """一次请求批量解析 {short_url: short_code}，服务不支持批量接口时返回 None"""
+    try:
+        async with _get_session().post(
+            service_url.rstrip("/") + "/resolve",
+            json={"short_codes": list(set(codes.values()))},
+        ) as response:
+            if response.status != 200:
+                logger.debug(f"Bulk resolve unavailable, status: {response.status}")
+                return None
+            urls = (await response.json()).get("urls", {})
+    except Exception as e:
+        logger.warning(f"Bulk resolve failed: {e}")
+        return None
+    return {short_url: urls.get(code) for short_url, code in codes.items()}
+
+
+async def resolve_short_urls(short_urls: list[str]) -> list[str]:
+    """
+    批量将短链接还原为原始URL
+
+    先查进程内 LRU，未命中的通过短链接服务的批量 `/resolve` 接口一次解析，
+    接口不可用时回退为并发逐个解析。
+
+    Args:
+        short_urls: 短链接URL列表（非短链接原样返回）
+
+    Returns:
+        与输入顺序一致的原始URL列表，解析失败的项返回短链接本身
+    """
+    service_url = os.getenv("SHORTEN_URL_SERVICE_URL")
+    if not service_url:
+        return list(short_urls)
+
+    found: dict[str, str] = {}
+    pending: dict[str, str] = {}
+    for short_url in short_urls:
+        if short_url in _cache:
+            _cache.move_to_end(short_url)
+            found[short_url] = _cache[short_url]
+            continue
+        code = _short_code(short_url) if short_url else None
+        if code:
+            pending[short_url] = code
+
+    if pending:
+        logger.debug(f"Resolving {len(pending)} short URLs")
+        resolved = await _resolve_bulk(service_url, pending)
+        if resolved is None:
+            urls = list(pending)
+            results = await asyncio.gather(*(_resolve_one(url) for url in urls))
+            resolved = dict(zip(urls, results))
+        for short_url, original_url in resolved.items():
+            if original_url:
+                found[short_url] = original_url
+                _remember(short_url, original_url)
+            else:
+                logger.warning(f"Failed to resolve short URL: {short_url}")
+
+    return [found.get(short_url, short_url) for short_url in short_urls]
+
+
+async def resolve_short_url(short_url: str) -> str:
+    """
+    将短链接还原为原始URL
+
+    Args:
+        short_url: 短链接URL
+
+    Returns:
+        原始URL，如果解析失败则返回短链接本身
+    """
+    return (await resolve_short_urls([short_url]))[0]
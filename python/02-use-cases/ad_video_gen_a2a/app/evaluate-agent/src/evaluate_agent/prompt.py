@@ -252,7 +252,21 @@ Notice：
 ```
 """
 
-PROMPT_EVALUATE_ITEM_AGENT = """
+EVALUATE_REASON_POINTS = """### 理由要点
+1. 一致性评估，用于评估生成的图像或视频与参考图像或视频的一致性。
+2. 美学评估，用于评估图像或视频的美学质量。
+3. 画质评估，用于评估图像或视频的画质质量。
+针对提供的图像/视频，按以下要求完成多维度评估分析，输出需分模块呈现：
+美学评分解释：从构图平衡度、色彩搭配（冷暖对比 / 和谐度 / 艺术感）、光影表现（通透感 / 细节还原 / 氛围营造）、创意突破性、情感共鸣深度等维度，分析图像的美学表现，说明其对应评分的合理性，明确是否处于高分段及核心原因；
+画质评分解释：从色彩与光影（饱和度 / 层次感 / 真实性）、细节呈现（清晰度 / 锐度 / 微观纹理还原）、构图与质感（主体布局 / 背景协调性 / 材质区分度）、视觉完整性（无噪点 / 无失真 / 元素融合度）等维度，结合技术层面（如分辨率、光影合理性）分析画质优势，说明与高画质评分的逻辑一致性（若涉及具体模型，需关联模型名称）；
+一致性评估(仅对有参考图片的）：对比生成图像与参考图像的关键视觉元素（瓶身造型、包装标签 / Logo、背景场景、主体摆放形式、核心视觉特征），给出一致性评分（精确到小数点后 1 位），并解释评分依据（关联关键元素差异与关联度）；
+各模块分析需紧扣评分逻辑，既说明优势维度，也指出不足（若有），语言需专业且贴合视觉审美与技术评估场景，模块间用分号分隔。
+注意：评估的原因部分，请全部使用中文，包括标点符号也要是中文版的。
+返回的三类评分，中间用\n换行符分割。
+"""
+
+PROMPT_EVALUATE_ITEM_AGENT = (
+    """
 ### 任务说明
 根据用户的需求，评估分镜图片或分镜视频的质量。
 ### 背景介绍
@@ -270,15 +284,33 @@ PROMPT_EVALUATE_ITEM_AGENT = """
     "scores": "综合评分，综合了美学、画质、一致性三个维度进行评分", 评分范围为0～1分，保留两位小数
 }
 ```
-### 理由要点
-1. 一致性评估，用于评估生成的图像或视频与参考图像或视频的一致性。
-2. 美学评估，用于评估图像或视频的美学质量。
-3. 画质评估，用于评估图像或视频的画质质量。
-针对提供的图像/视频，按以下要求完成多维度评估分析，输出需分模块呈现：
-美学评分解释：从构图平衡度、色彩搭配（冷暖对比 / 和谐度 / 艺术感）、光影表现（通透感 / 细节还原 / 氛围营造）、创意突破性、情感共鸣深度等维度，分析图像的美学表现，说明其对应评分的合理性，明确是否处于高分段及核心原因；
-画质评分解释：从色彩与光影（饱和度 / 层次感 / 真实性）、细节呈现（清晰度 / 锐度 / 微观纹理还原）、构图与质感（主体布局 / 背景协调性 / 材质区分度）、视觉完整性（无噪点 / 无失真 / 元素融合度）等维度，结合技术层面（如分辨率、光影合理性）分析画质优势，说明与高画质评分的逻辑一致性（若涉及具体模型，需关联模型名称）；
-一致性评估(仅对有参考图片的）：对比生成图像与参考图像的关键视觉元素（瓶身造型、包装标签 / Logo、背景场景、主体摆放形式、核心视觉特征），给出一致性评分（精确到小数点后 1 位），并解释评分依据（关联关键元素差异与关联度）；
-各模块分析需紧扣评分逻辑，既说明优势维度，也指出不足（若有），语言需专业且贴合视觉审美与技术评估场景，模块间用分号分隔。
-注意：评估的原因部分，请全部使用中文，包括标点符号也要是中文版的。
-返回的三类评分，中间用\n换行符分割。
 """
+    + EVALUATE_REASON_POINTS
+)
+
+PROMPT_EVALUATE_SHOT_AGENT = (
+    """
+### 任务说明
+根据用户的需求，对比评估同一分镜的多条候选图片或候选视频的质量。
+### 背景介绍
+你是一个电商产品营销系统中的一部分，属于评估系统的核心，你的任务是完成对输入内容（可能是图片可能是视频）的评估。
+### 输入要求
+用户将会提供给你同一分镜的多条`候选图片或视频`（每条候选前标注了media_id）以及若干张通用的`参考图片`，你需要对每条候选分别进行点评，
+并在候选之间横向对比，使评分能够区分候选的优劣。
+### 输出要求
+你的输出应该是一个json，evaluation 列表中每条候选对应一项，不要遗漏任何候选
+```json
+{
+    "evaluation": [
+        {
+            "shot_id": "镜头编号",
+            "media_id": "媒体编号，与输入中候选前标注的media_id一致",
+            "reason": "评分理由，综合了美学、画质、一致性三个维度进行点评，具体的理由写法庆参考下文`理由要点`部分"（要求全程中文，包括标点符号也是中文）,
+            "scores": "综合评分，综合了美学、画质、一致性三个维度进行评分", 评分范围为0～1分，保留两位小数
+        }
+    ]
+}
+```
+"""
+    + EVALUATE_REASON_POINTS
+)
@@ -15,18 +15,28 @@
 import asyncio
 import json
 import os
-from typing import Any
-import aiohttp
-import urllib.parse
-
-from openai import AsyncOpenAI
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
 from veadk.utils.logger import get_logger
 from evaluate_agent.utils.types import (
     EvaluationList,
     ScoredImageList,
     ScoredVideoList,
+    ShotEvaluationList,
+)
+from evaluate_agent.prompt import (
+    PROMPT_EVALUATE_ITEM_AGENT,
+    PROMPT_EVALUATE_SHOT_AGENT,
 )
-from evaluate_agent.prompt import PROMPT_EVALUATE_ITEM_AGENT
+from short_url_resolver import resolve_short_urls
 
 # evaluate_agent_instruction = os.getenv("PROMPT_EVALUATE_ITEM_AGENT")
 evaluate_agent_instruction = PROMPT_EVALUATE_ITEM_AGENT
@@ -36,113 +46,304 @@ logger = get_logger(__name__)
 shorten_url_service_url = os.getenv("SHORTEN_URL_SERVICE_URL", None)
 assert shorten_url_service_url, "SHORTEN_URL_SERVICE_URL is not set"
 
+# comparative：同一分镜的多个候选在一次请求中对比评分，参考图只发送一次；single：每个候选单独请求
+EVALUATE_MODE = os.getenv("EVALUATE_MODE", "comparative")
+# comparative 模式下每次请求最多携带的候选数量
+EVALUATE_CANDIDATES_PER_REQUEST = int(os.getenv("EVALUATE_CANDIDATES_PER_REQUEST", "4"))
+# 同时进行的评估请求数量上限
+EVALUATE_MAX_CONCURRENCY = int(os.getenv("EVALUATE_MAX_CONCURRENCY", "4"))
+# 限流、超时、服务端错误的重试次数
+EVALUATE_MAX_RETRIES = int(os.getenv("EVALUATE_MAX_RETRIES", "3"))
+# 设置后按批评估候选，某个候选达到该分数即停止评估该分镜剩余候选
+_early_exit_score = os.getenv("EVALUATE_EARLY_EXIT_SCORE", "")
+EVALUATE_EARLY_EXIT_SCORE = float(_early_exit_score) if _early_exit_score else None
+
+_RETRYABLE_ERRORS = (
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+)
+SKIPPED_REASON = "已有候选达到质量阈值，未评估该候选。"
 
-async def resolve_short_url(short_url: str) -> str:
-    """
-    将短链接还原为原始URL
+_client: Optional[AsyncOpenAI] = None
 
-    Args:
-        short_url: 短链接URL
 
-    Returns:
-        原始URL，如果解析失败则返回短链接本身
-    """
-    if not shorten_url_service_url:
-        return short_url
-
-    try:
-        # 从短链接中提取短码
-        # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
-        parsed_url = urllib.parse.urlparse(short_url)
-        path_parts = parsed_url.path.strip("/").split("/")
-
-        if len(path_parts) >= 2 and path_parts[0] == "t":
-            # 调用短链接服务的重定向接口来获取原始URL
-            async with aiohttp.ClientSession() as session:
-                # 使用GET请求获取原始URL（短链接服务直接返回原始URL字符串）
-                async with session.get(short_url) as response:
-                    if response.status == 200:
-                        # 短链接服务直接返回原始URL字符串
-                        original_url = await response.text()
-                        original_url = original_url.strip().strip('"')
-                        logger.debug(
-                            f"Successfully resolved short URL: {short_url} -> {original_url}"
-                        )
-                        return original_url
-                    else:
-                        logger.warning(
-                            f"Failed to resolve short URL: {short_url}, status: {response.status}"
+def _get_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            base_url=os.getenv("MODEL_AGENT_API_BASE"),
+            api_key=os.getenv("MODEL_AGENT_API_KEY"),
+        )
+    return _client
+
+
+class EvaluateScheduler:
+    """有限并发的评估请求调度器：遇到限流时全局暂停，并按 Retry-After 或指数退避重试"""
+
+    def __init__(
+        self,
+        max_concurrency: int = EVALUATE_MAX_CONCURRENCY,
+        max_retries: int = EVALUATE_MAX_RETRIES,
+    ):
+        self._sem = asyncio.Semaphore(max(1, max_concurrency))
+        self._max_retries = max_retries
+        self._paused_until = 0.0
+        self.requests = 0
+        self.retries = 0
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response else None
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return min(30.0, 2**attempt) + random.uniform(0, 1)
+
+    async def run(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        for attempt in range(self._max_retries + 1):
+            # 限流暂停期间不发出新请求
+            while (wait := self._paused_until - loop.time()) > 0:
+                await asyncio.sleep(wait)
+            async with self._sem:
+                self.requests += 1
+                try:
+                    return await request()
+                except _RETRYABLE_ERRORS as e:
+                    if attempt == self._max_retries:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+                    if isinstance(e, RateLimitError):
+                        self._paused_until = max(
+                            self._paused_until, loop.time() + delay
                         )
-                        return short_url
-        else:
-            logger.warning(f"Not a valid short URL format: {short_url}")
-            return short_url
+                    logger.warning(
+                        f"Evaluate request failed ({type(e).__name__}), retry in {delay:.1f}s"
+                    )
+                    self.retries += 1
+            await asyncio.sleep(delay)
 
-    except Exception as e:
-        logger.error(f"Error resolving short URL {short_url}: {e}")
-        # 如果解析失败，返回原始短链接
-        return short_url
 
+def _shot_reference_list(shot: dict[str, Any]) -> list[str]:
+    reference_media_list = shot.get("reference", [])
+    if isinstance(reference_media_list, str):
+        reference_media_list = [reference_media_list]
+    return reference_media_list
 
-async def repair_evaluate_input(
-    media_list: list[dict[str, Any]], media_type: str = "image"
-) -> list[list[dict[str, Any]]]:
+
+def _media_fields(media_type: str) -> tuple[str, str, str]:
     if media_type == "image":
-        MEDIA_URL_FIELD = "image_url"
-        MEDIA_TYPE_FIELD = "input_image"
-        MEDIA = "图片"
-    else:
-        MEDIA_URL_FIELD = "video_url"
-        MEDIA_TYPE_FIELD = "input_video"
-        MEDIA = "视频"
-    result = []
-    for shot in media_list:
-        # 这是一组shot
-        shot_id = shot.get("shot_id", "")
-        reference_media_list = shot.get("reference", [])
-        if isinstance(reference_media_list, str):
-            reference_media_list = [reference_media_list]
-        media_url_list = [image["url"] for image in shot.get("media", [])]
-        # 首先构造reference的，这个在同一个shot内通用
-        reference_part_list = []
-        for reference_media in reference_media_list:
-            if len(reference_media.strip()) == 0:
-                continue
+        return "image_url", "input_image", "图片"
+    return "video_url", "input_video", "视频"
 
-            # 如果启用了短链接服务，尝试解析reference图片URL
-            resolved_reference_url = reference_media
-            if shorten_url_service_url:
-                resolved_reference_url = await resolve_short_url(reference_media)
 
-            reference_part = {
+async def _resolve_media_urls(media_list: list[dict[str, Any]]) -> dict[str, str]:
+    """一次性批量解析所有 media 与 reference 的短链接"""
+    if not shorten_url_service_url:
+        return {}
+    all_urls = list(
+        dict.fromkeys(
+            url
+            for shot in media_list
+            for url in _shot_reference_list(shot)
+            + [media["url"] for media in shot.get("media", [])]
+            if url.strip()
+        )
+    )
+    return dict(zip(all_urls, await resolve_short_urls(all_urls)))
+
+
+def _reference_parts(
+    shot: dict[str, Any], resolved_urls: dict[str, str]
+) -> list[dict[str, Any]]:
+    # reference 在同一个shot内通用
+    reference_part_list = []
+    for reference_media in _shot_reference_list(shot):
+        if len(reference_media.strip()) == 0:
+            continue
+        reference_part_list.append(
+            {
                 "type": "input_image",
-                "image_url": resolved_reference_url,
-            }  # 参考的只会是图片
-            reference_part_list.append(reference_part)
-
-        for i, media_url in enumerate(media_url_list):
-            # 如果启用了短链接服务，尝试解析media URL
-            resolved_media_url = media_url
-            if shorten_url_service_url:
-                resolved_media_url = await resolve_short_url(media_url)
-
-            text_part = {
-                "type": "input_text",
-                "text": (
-                    f"本次{MEDIA}的shot_id={shot_id}, media_id={i}，你一共收到{len(reference_media_list) + 1}份媒体素材，其中第1条{MEDIA}是你需要评价的{MEDIA}"
-                    + f", 后续的共{len(reference_media_list)}张图片均为参考图片。"
-                    if len(reference_media_list) > 0
-                    else "" + "请按照要求对媒体素材进行评价并输出符合要求的结果。"
-                ),
+                "image_url": resolved_urls.get(reference_media, reference_media),
             }
+        )  # 参考的只会是图片
+    return reference_part_list
+
+
+def _media_part(media_url: str, resolved_urls: dict[str, str], media_type: str):
+    media_url_field, media_type_field, _ = _media_fields(media_type)
+    return {
+        "type": media_type_field,
+        media_url_field: resolved_urls.get(media_url, media_url),
+    }
+
+
+def _single_message(
+    shot: dict[str, Any],
+    media_id: int,
+    resolved_urls: dict[str, str],
+    media_type: str,
+) -> dict[str, Any]:
+    _, _, MEDIA = _media_fields(media_type)
+    shot_id = shot.get("shot_id", "")
+    reference_media_list = _shot_reference_list(shot)
+    media_url = shot.get("media", [])[media_id]["url"]
+    text_part = {
+        "type": "input_text",
+        "text": (
+            f"本次{MEDIA}的shot_id={shot_id}, media_id={media_id}，你一共收到{len(reference_media_list) + 1}份媒体素材，其中第1条{MEDIA}是你需要评价的{MEDIA}"
+            + f", 后续的共{len(reference_media_list)}张图片均为参考图片。"
+            if len(reference_media_list) > 0
+            else "" + "请按照要求对媒体素材进行评价并输出符合要求的结果。"
+        ),
+    }
+    return {
+        "role": "user",
+        "content": [text_part, _media_part(media_url, resolved_urls, media_type)]
+        + _reference_parts(shot, resolved_urls),
+    }
+
+
+def _comparative_message(
+    shot: dict[str, Any],
+    media_ids: list[int],
+    resolved_urls: dict[str, str],
+    media_type: str,
+) -> dict[str, Any]:
+    _, _, MEDIA = _media_fields(media_type)
+    shot_id = shot.get("shot_id", "")
+    reference_parts = _reference_parts(shot, resolved_urls)
+    content = [
+        {
+            "type": "input_text",
+            "text": f"本次{MEDIA}的shot_id={shot_id}，共有{len(media_ids)}条候选{MEDIA}需要评价，"
+            f"每条候选前标注了其media_id"
+            + (
+                f"；最后的{len(reference_parts)}张图片均为参考图片，对所有候选通用。"
+                if reference_parts
+                else "。"
+            )
+            + "请对每条候选分别评价并输出符合要求的结果。",
+        }
+    ]
+    media_entries = shot.get("media", [])
+    for media_id in media_ids:
+        content.append(
+            {"type": "input_text", "text": f"候选{MEDIA} media_id={media_id}："}
+        )
+        content.append(
+            _media_part(media_entries[media_id]["url"], resolved_urls, media_type)
+        )
+    return {"role": "user", "content": content + reference_parts}
+
+
+async def _create_evaluation(message: dict[str, Any], comparative: bool) -> Any:
+    schema = ShotEvaluationList if comparative else EvaluationList
+    response = await _get_client().responses.create(
+        model=os.getenv("MODEL_EVALUATE_ITEM", "doubao-seed-1-6-flash-250828"),
+        instructions=PROMPT_EVALUATE_SHOT_AGENT
+        if comparative
+        else evaluate_agent_instruction,
+        input=[message],
+        text={
+            "format": {
+                "type": "json_schema",
+                "name": schema.__name__,
+                "schema": schema.model_json_schema(),
+                "strict": True,
+            }
+        },
+        extra_body={"thinking": {"type": "disabled"}},
+    )
+    return json.loads(response.output_text).get("evaluation", {})
+
+
+async def _evaluate_group(
+    shot: dict[str, Any],
+    media_ids: list[int],
+    resolved_urls: dict[str, str],
+    media_type: str,
+    scheduler: EvaluateScheduler,
+) -> list[tuple[int, Any, Any]]:
+    """评估一个分镜中的一组候选，返回 [(media_id, score, reason)]"""
+    if len(media_ids) > 1:
+        message = _comparative_message(shot, media_ids, resolved_urls, media_type)
+        try:
+            evaluations = await scheduler.run(
+                lambda: _create_evaluation(message, comparative=True)
+            )
+        except Exception as e:
+            logger.warning(f"Comparative evaluation failed, fallback to single: {e}")
+            evaluations = []
+        items = {}
+        for item in evaluations:
+            try:
+                media_id = int(item.get("media_id"))
+            except (TypeError, ValueError):
+                continue
+            if media_id in media_ids:
+                items[media_id] = (media_id, item.get("scores"), item.get("reason"))
+        # 对比结果中缺失的候选单独补评
+        missing = [media_id for media_id in media_ids if media_id not in items]
+        if missing:
+            logger.debug(
+                f"Comparative evaluation missed media {missing} of shot {shot.get('shot_id')}"
+            )
+            for extra in await asyncio.gather(
+                *(
+                    _evaluate_group(shot, [m], resolved_urls, media_type, scheduler)
+                    for m in missing
+                )
+            ):
+                items.update((item[0], item) for item in extra)
+        return [items[media_id] for media_id in media_ids]
+
+    (media_id,) = media_ids
+    message = _single_message(shot, media_id, resolved_urls, media_type)
+    item = await scheduler.run(lambda: _create_evaluation(message, comparative=False))
+    return [(media_id, item.get("scores"), item.get("reason"))]
+
+
+async def _evaluate_shot(
+    shot: dict[str, Any],
+    resolved_urls: dict[str, str],
+    media_type: str,
+    scheduler: EvaluateScheduler,
+) -> list[tuple[int, Any, Any]]:
+    group_size = (
+        max(1, EVALUATE_CANDIDATES_PER_REQUEST) if EVALUATE_MODE == "comparative" else 1
+    )
+    media_count = len(shot.get("media", []))
+    groups = [
+        list(range(i, min(i + group_size, media_count)))
+        for i in range(0, media_count, group_size)
+    ]
+    if EVALUATE_EARLY_EXIT_SCORE is None:
+        results = await asyncio.gather(
+            *(
+                _evaluate_group(shot, group, resolved_urls, media_type, scheduler)
+                for group in groups
+            )
+        )
+        return [item for result in results for item in result]
 
-            user_prompt = {"role": "user", "content": []}
-            media_part = {"type": MEDIA_TYPE_FIELD, MEDIA_URL_FIELD: resolved_media_url}
-            user_prompt["content"] = [text_part] + [media_part] + reference_part_list
-
-            result.append(user_prompt)
-
-    return result
+    # 提前退出：按批依次评估，有候选达到阈值后剩余候选不再请求
+    items = []
+    for index, group in enumerate(groups):
+        items.extend(
+            await _evaluate_group(shot, group, resolved_urls, media_type, scheduler)
+        )
+        if any(float(score or 0) >= EVALUATE_EARLY_EXIT_SCORE for _, score, _ in items):
+            items.extend(
+                (media_id, 0.0, SKIPPED_REASON)
+                for rest in groups[index + 1 :]
+                for media_id in rest
+            )
+            break
+    return items
 
 
 async def evaluate_media(
@@ -195,52 +396,32 @@ async def evaluate_media(
         ... ])
     """
     # 接下来是根据shot id聚合在一起
-    logger.debug(f"Start to evaluate {media_type} list: items={len(media_list)}")
-    m_content = await repair_evaluate_input(media_list, media_type=media_type)
-    logger.debug(f"Repaired {media_type} list: messages={len(m_content)}")
-    # 创建异步OpenAI客户端
-    client = AsyncOpenAI(
-        base_url=os.getenv("MODEL_AGENT_API_BASE"),
-        api_key=os.getenv("MODEL_AGENT_API_KEY"),
+    logger.debug(
+        f"Start to evaluate {media_type} list: items={len(media_list)}, mode={EVALUATE_MODE}"
     )
-
-    # 定义异步处理单个消息的函数
-    async def process_message(msg):
-        response = await client.responses.create(
-            model=os.getenv("MODEL_EVALUATE_ITEM", "doubao-seed-1-6-flash-250828"),
-            instructions=evaluate_agent_instruction,
-            input=[msg],
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": "EvaluationList",
-                    "schema": EvaluationList.model_json_schema(),
-                    "strict": True,
-                }
-            },
-            extra_body={"thinking": {"type": "disabled"}},
+    resolved_urls = await _resolve_media_urls(media_list)
+    scheduler = EvaluateScheduler()
+    shot_results = await asyncio.gather(
+        *(
+            _evaluate_shot(shot, resolved_urls, media_type, scheduler)
+            for shot in media_list
         )
-        return json.loads(response.output_text).get("evaluation", {})
-
-    # 使用 asyncio.gather 并发处理所有消息
-    result = await asyncio.gather(*(process_message(msg) for msg in m_content))
+    )
+    logger.debug(
+        f"Finish to evaluate {media_type} list: requests={scheduler.requests}, "
+        f"retries={scheduler.retries}"
+    )
 
-    logger.debug(f"Finish to evaluate {media_type} list: result_items={len(result)}")
     # 后处理：按shot_id合并结果，并确保media_id顺序
     merged_result = {}
-    for item in result:
-        shot_id = item.get("shot_id")
-        # 将media_id转换为整数以便正确排序
-        media_id = int(item.get("media_id", 0))
-
+    for shot, items in zip(media_list, shot_results):
+        shot_id = shot.get("shot_id", "")
         if shot_id not in merged_result:
             merged_result[shot_id] = {
                 "shot_id": shot_id,
                 "items": [],  # 先存储所有项，包含media_id以便排序
             }
-        merged_result[shot_id]["items"].append(
-            (media_id, item.get("scores"), item.get("reason"))
-        )
+        merged_result[shot_id]["items"].extend(items)
 
     # 对每个shot_id的结果按media_id升序排序，并构建最终格式
     final_result = []
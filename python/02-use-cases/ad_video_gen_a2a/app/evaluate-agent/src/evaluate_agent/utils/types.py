@@ -94,3 +94,9 @@ class EvaluationResult(BaseModel):
 
 class EvaluationList(BaseModel):
     evaluation: EvaluationResult = Field(..., description="评估结果列表")
+
+
+class ShotEvaluationList(BaseModel):
+    evaluation: list[EvaluationResult] = Field(
+        ..., description="同一镜头下每条候选媒体的评估结果列表"
+    )
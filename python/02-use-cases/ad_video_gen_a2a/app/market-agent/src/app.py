@@ -17,6 +17,7 @@ from contextlib import asynccontextmanager
 from typing import Callable
 
 from agent import agent_run_config
+from runner_pool import RunnerPool
 from market_agent.tools.web_parser_local import _init_browser
 
 from fastapi import FastAPI
@@ -52,6 +53,7 @@ short_term_memory = agent_run_config.short_term_memory
 
 VEFAAS_REGION = os.getenv("APP_REGION", "cn-beijing")
 VEFAAS_FUNC_ID = os.getenv("_FAAS_FUNC_ID", "")
+RUNNER_MAX_IN_FLIGHT = int(os.getenv("RUNNER_MAX_IN_FLIGHT", "8"))
 agent_card_builder = AgentCardBuilder(
     agent=agent,
     provider=AgentProvider(
@@ -87,11 +89,15 @@ def load_tracer() -> None:
 
 
 def build_mcp_run_agent_func() -> Callable:
-    runner = Runner(
-        agent=agent,
-        short_term_memory=short_term_memory,
-        app_name=app_name,
-        user_id="",
+    # Each concurrent request gets its own runner, so user identities never cross
+    runner_pool = RunnerPool(
+        runner_factory=lambda: Runner(
+            agent=agent,
+            short_term_memory=short_term_memory,
+            app_name=app_name,
+            user_id="",
+        ),
+        max_in_flight=RUNNER_MAX_IN_FLIGHT,
     )
 
     async def run_agent(
@@ -99,14 +105,12 @@ def build_mcp_run_agent_func() -> Callable:
         user_id: str = "mcp_user",
         session_id: str = "mcp_session",
     ) -> str:
-        # Set user_id for runner
-        runner.user_id = user_id
-
-        # Running agent and get final output
-        final_output = await runner.run(
-            messages=user_input,
-            session_id=session_id,
-        )
+        async with runner_pool.acquire(user_id, session_id) as runner:
+            # Running agent and get final output
+            final_output = await runner.run(
+                messages=user_input,
+                session_id=session_id,
+            )
         return final_output
 
     run_agent_doc = f"""{agent.description}
@@ -118,6 +122,7 @@ def build_mcp_run_agent_func() -> Callable:
         Final agent response as a string."""
 
     run_agent.__doc__ = run_agent_doc
+    run_agent.runner_pool = runner_pool
 
     return run_agent
 
@@ -135,6 +140,10 @@ async def get_cozeloop_space_id() -> dict:
     }
 
 
+async def get_runner_pool_stats() -> dict:
+    return run_agent_func.runner_pool.stats()
+
+
 load_tracer()
 
 # Build a run_agent function for building MCP server
@@ -152,6 +161,9 @@ a2a_app.get("/agent_card", operation_id="agent_card", tags=["mcp"])(agent_card)
 a2a_app.get(
     "/get_cozeloop_space_id", operation_id="get_cozeloop_space_id", tags=["mcp"]
 )(get_cozeloop_space_id)
+a2a_app.get("/runner_pool_stats", operation_id="runner_pool_stats")(
+    get_runner_pool_stats
+)
 
 # === Build mcp server ===
 
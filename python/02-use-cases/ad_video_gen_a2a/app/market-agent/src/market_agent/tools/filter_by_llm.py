@@ -15,24 +15,47 @@
 import asyncio
 import json
 import os
-from typing import Any
+from typing import Any, Optional
 
+import aiohttp
 from openai import AsyncOpenAI
 from pydantic import BaseModel
 from veadk.utils.logger import get_logger
 
+from .image_probe import (
+    ProbedImage,
+    dhash,
+    fetch_image,
+    hamming_distance,
+    normalize_image_urls,
+    probe_image,
+)
+from .verdict_cache import DEFAULT_CACHE_PATH, VerdictCache
+
 logger = get_logger(__name__)
 
+FILTER_MODEL = "doubao-seed-1-6-251015"
+# 尺寸/大小预过滤阈值：过小或长宽比异常的多为图标、雪碧图、横幅
+MIN_IMAGE_SIDE = int(os.getenv("IMAGE_FILTER_MIN_SIDE", "200"))
+MAX_ASPECT_RATIO = float(os.getenv("IMAGE_FILTER_MAX_ASPECT", "4"))
+MIN_IMAGE_BYTES = int(os.getenv("IMAGE_FILTER_MIN_BYTES", "4096"))
+# 感知哈希汉明距离不超过该值视为同一张图
+PHASH_DISTANCE = int(os.getenv("IMAGE_FILTER_PHASH_DISTANCE", "6"))
+# 每次模型请求打包的图片数量
+MODEL_BATCH_SIZE = int(os.getenv("IMAGE_FILTER_BATCH_SIZE", "4"))
+PROBE_CONCURRENCY = 20
+MODEL_CONCURRENCY = 10
+
 filter_agent_instructions = """
 你是一个专业的图片过滤器，服务于一个商品图片相关的任务
-你将收到一张图片输入，他来自于一个网页的链接，通过网页解析等机制解析下来的，
-你需要根据图片的内容判断这张图片是商品，还是类似网页素材，点缀之类的无关内容。
-你不需要返回任何判断，你只需要确定是与否，不允许任何额外的输出
+你将收到若干张图片输入，它们来自于一个网页的链接，通过网页解析等机制解析下来的，
+你需要根据每张图片的内容判断这张图片是商品，还是类似网页素材，点缀之类的无关内容。
+按图片输入顺序，为每张图片给出一个 true/false，列表长度必须与图片数量一致，不允许任何额外的输出
 注意如果你不能确定是否是商品，那它就不是。
 
-### 参考输出
+### 参考输出（3张图片）
 {
-    "is_good": true
+    "is_good": [true, false, true]
 }
 """
 
@@ -44,7 +67,33 @@ summarize_text_instructions = """
 
 
 class IsGood(BaseModel):
-    is_good: bool
+    is_good: list[bool]
+
+
+_client: Optional[AsyncOpenAI] = None
+_verdict_cache: Optional[VerdictCache] = None
+
+
+def _get_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            base_url=os.getenv("MODEL_AGENT_API_BASE"),
+            api_key=os.getenv("MODEL_AGENT_API_KEY"),
+        )
+    return _client
+
+
+def _get_verdict_cache() -> Optional[VerdictCache]:
+    global _verdict_cache
+    if _verdict_cache is None:
+        try:
+            _verdict_cache = VerdictCache(
+                os.getenv("IMAGE_VERDICT_CACHE_PATH", DEFAULT_CACHE_PATH)
+            )
+        except Exception as e:
+            logger.warning(f"图片过滤结果缓存不可用: {e}")
+    return _verdict_cache
 
 
 def repair_image_input(image_list: list[str]) -> list[dict[str, Any]]:
@@ -59,49 +108,167 @@ def repair_image_input(image_list: list[str]) -> list[dict[str, Any]]:
     return result
 
 
-async def filter_images(image_list: list[str]) -> list[str]:
-    inputs = repair_image_input(image_list)
-    client = AsyncOpenAI(
-        base_url=os.getenv("MODEL_AGENT_API_BASE"),
-        api_key=os.getenv("MODEL_AGENT_API_KEY"),
+def _passes_size_check(image: ProbedImage) -> bool:
+    if image.total_bytes is not None and image.total_bytes < MIN_IMAGE_BYTES:
+        return False
+    # 无法从头部解析尺寸时保留，交给后续阶段判断
+    if not image.width or not image.height:
+        return True
+    if min(image.width, image.height) < MIN_IMAGE_SIDE:
+        return False
+    return max(image.width, image.height) / min(image.width, image.height) <= (
+        MAX_ASPECT_RATIO
+    )
+
+
+async def _probe_and_fetch(urls: list[str]) -> list[ProbedImage]:
+    """
+    探测尺寸并下载通过预过滤的图片（保持顺序）。
+    只丢弃确认不合格的图片；探测或下载失败（403、超时等）的图片不带内容原样保留，交给模型判断。
+    """
+    sem = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+    async def _one(session, url) -> Optional[ProbedImage]:
+        async with sem:
+            image = await probe_image(session, url)
+            if image is None:
+                return ProbedImage(url=url)
+            if not _passes_size_check(image):
+                return None
+            await fetch_image(session, image)
+            return image
+
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=0)
+    ) as session:
+        results = await asyncio.gather(*(_one(session, url) for url in urls))
+    return [image for image in results if image is not None]
+
+
+async def _dedup_by_phash(images: list[ProbedImage]) -> dict[str, str]:
+    """感知哈希去重，返回 url -> 代表图片 url 的映射（无内容的图片各自为代表）"""
+    with_data = [image for image in images if image.data]
+    hashes = dict(
+        zip(
+            (image.url for image in with_data),
+            await asyncio.gather(
+                *(asyncio.to_thread(dhash, image.data) for image in with_data)
+            ),
+        )
     )
-    sem = asyncio.Semaphore(10)  # 限制并发
+    representatives: list[tuple[int, str]] = []
+    mapping = {}
+    for image in images:
+        value = hashes.get(image.url)
+        if value is not None:
+            for rep_hash, rep_url in representatives:
+                if hamming_distance(value, rep_hash) <= PHASH_DISTANCE:
+                    mapping[image.url] = rep_url
+                    break
+            else:
+                representatives.append((value, image.url))
+        mapping.setdefault(image.url, image.url)
+    return mapping
+
 
-    async def process_message(_input):
+async def _judge_batch(urls: list[str]) -> Optional[list[bool]]:
+    """一次请求判断多张图片，失败或结果数量不符时返回 None"""
+    content = repair_image_input(urls) + [
+        {"type": "input_text", "text": f"共{len(urls)}张图片，请按顺序逐张判断。"}
+    ]
+    try:
+        response = await _get_client().responses.create(
+            model=FILTER_MODEL,
+            instructions=filter_agent_instructions,
+            input=[{"role": "user", "content": content}],
+            text={
+                "format": {
+                    "type": "json_schema",
+                    "name": "IsGood",
+                    "schema": IsGood.model_json_schema(),
+                    "strict": True,
+                }
+            },
+            extra_body={"thinking": {"type": "disabled"}},
+        )
+        verdicts = json.loads(response.output_text).get("is_good", [])
+    except Exception as e:
+        logger.warning(f"图片过滤模型请求失败: {e}")
+        return None
+    if len(verdicts) != len(urls):
+        logger.warning(f"图片过滤结果数量不符: {len(verdicts)} != {len(urls)}")
+        return None
+    return [bool(v) for v in verdicts]
+
+
+async def _judge_images(urls: list[str]) -> dict[str, bool]:
+    """按批次并发请求模型；整批失败时拆成单张重试，仍失败视为非商品图"""
+    sem = asyncio.Semaphore(MODEL_CONCURRENCY)
+    batch_size = max(1, MODEL_BATCH_SIZE)
+    batches = [urls[i : i + batch_size] for i in range(0, len(urls), batch_size)]
+
+    async def _run(batch: list[str]) -> dict[str, bool]:
         async with sem:
-            try:
-                response = await client.responses.create(
-                    model="doubao-seed-1-6-251015",
-                    instructions=filter_agent_instructions,
-                    input=[{"role": "user", "content": [_input]}],
-                    text={
-                        "format": {
-                            "type": "json_schema",
-                            "name": "IsGood",
-                            "schema": IsGood.model_json_schema(),
-                            "strict": True,
-                        }
-                    },
-                    extra_body={"thinking": {"type": "disabled"}},
-                )
-                x = json.loads(response.output_text).get("is_good", False)
-            except Exception:
-                x = False
-            return _input["image_url"] if x else None
-
-    result = await asyncio.gather(*(process_message(_input) for _input in inputs))
-    result = [r for r in result if r is not None]
+            verdicts = await _judge_batch(batch)
+        if verdicts is not None:
+            return dict(zip(batch, verdicts))
+        if len(batch) == 1:
+            return {}
+        singles = await asyncio.gather(*(_run([url]) for url in batch))
+        return {k: v for single in singles for k, v in single.items()}
+
+    results = await asyncio.gather(*(_run(batch) for batch in batches))
+    return {k: v for result in results for k, v in result.items()}
+
+
+async def filter_images(image_list: list[str]) -> list[str]:
+    """
+    多阶段过滤网页图片，只保留商品图：
+    URL规范化去重 -> 头部探测尺寸/大小 -> 感知哈希去重 -> 内容哈希查缓存 -> 多图打包请求模型
+    """
+    urls = normalize_image_urls(image_list)
+    images = await _probe_and_fetch(urls)
+    representative = await _dedup_by_phash(images)
+    content_hash = {image.url: image.content_hash for image in images}
+
+    candidates = list(dict.fromkeys(representative.values()))
+    cache = _get_verdict_cache()
+    # 未能下载内容的图片没有内容哈希，不查也不写缓存
+    hashes = {content_hash[url] for url in candidates if content_hash[url]}
+    cached = (
+        await asyncio.to_thread(cache.get_many, list(hashes))
+        if cache and hashes
+        else {}
+    )
+    verdicts = {
+        url: cached[content_hash[url]]
+        for url in candidates
+        if content_hash[url] in cached
+    }
+    pending = [url for url in candidates if url not in verdicts]
+    judged = await _judge_images(pending)
+    verdicts.update(judged)
+    if cache and judged:
+        await asyncio.to_thread(
+            cache.put_many,
+            {content_hash[url]: v for url, v in judged.items() if content_hash[url]},
+        )
+
+    # 近似重复的图片只保留代表图
+    result = [url for url in candidates if verdicts.get(url)]
+    logger.debug(
+        f"图片过滤：输入 {len(image_list)}，去重后 {len(urls)}，尺寸过滤后 {len(images)}"
+        f"（未能下载 {sum(1 for image in images if not image.data)}），"
+        f"感知去重后 {len(candidates)}，缓存命中 {len(candidates) - len(pending)}，"
+        f"模型判断 {len(pending)}，保留 {len(result)}"
+    )
     return result
 
 
 async def summarize_text(text: str):
-    client = AsyncOpenAI(
-        base_url=os.getenv("MODEL_AGENT_API_BASE"),
-        api_key=os.getenv("MODEL_AGENT_API_KEY"),
-    )
     try:
-        response = await client.responses.create(
-            model="doubao-seed-1-6-251015",
+        response = await _get_client().responses.create(
+            model=FILTER_MODEL,
             instructions=summarize_text_instructions,
             input=text[0:10000],
             extra_body={"thinking": {"type": "disabled"}},
@@ -0,0 +1,226 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import hashlib
+import io
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+from PIL import Image
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+# 探测时只读取的头部字节数，足以覆盖常见格式的尺寸信息
+PROBE_BYTES = 64 * 1024
+# 单张图片完整下载的上限
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# JPEG 中携带尺寸信息的 SOF 段标记
+_JPEG_SOF_MARKERS = {
+    0xC0,
+    0xC1,
+    0xC2,
+    0xC3,
+    0xC5,
+    0xC6,
+    0xC7,
+    0xC9,
+    0xCA,
+    0xCB,
+    0xCD,
+    0xCE,
+    0xCF,
+}
+
+
+@dataclass
+class ProbedImage:
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    # 图片总字节数（未知时为 None）
+    total_bytes: Optional[int] = None
+    # 完整内容，仅当探测时已读完整张图片或后续完整下载后才有值
+    data: Optional[bytes] = None
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        return hashlib.sha256(self.data).hexdigest() if self.data else None
+
+
+def normalize_image_url(url: str) -> Optional[str]:
+    """规范化图片URL：补全协议、小写 scheme/host、去掉片段；无效链接返回 None"""
+    url = (url or "").strip()
+    if url.startswith("//"):
+        url = "https:" + url
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ("http", "https") or not parts.netloc:
+        return None
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, "")
+    )
+
+
+def normalize_image_urls(urls: list[str]) -> list[str]:
+    """规范化并去重（保持原始顺序）"""
+    normalized = (normalize_image_url(url) for url in urls)
+    return list(dict.fromkeys(url for url in normalized if url))
+
+
+def _jpeg_size(data: bytes) -> Optional[tuple[int, int]]:
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(data[i + 5 : i + 7], "big")
+            width = int.from_bytes(data[i + 7 : i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(data[i + 2 : i + 4], "big")
+    return None
+
+
+def parse_image_size(data: bytes) -> Optional[tuple[int, int]]:
+    """从图片头部字节解析 (width, height)，无法识别时返回 None"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        return (
+            int.from_bytes(data[16:20], "big"),
+            int.from_bytes(data[20:24], "big"),
+        )
+    if data.startswith((b"GIF87a", b"GIF89a")) and len(data) >= 10:
+        return (
+            int.from_bytes(data[6:8], "little"),
+            int.from_bytes(data[8:10], "little"),
+        )
+    if data.startswith(b"BM") and len(data) >= 26:
+        return (
+            abs(int.from_bytes(data[18:22], "little", signed=True)),
+            abs(int.from_bytes(data[22:26], "little", signed=True)),
+        )
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            return (
+                int.from_bytes(data[26:28], "little") & 0x3FFF,
+                int.from_bytes(data[28:30], "little") & 0x3FFF,
+            )
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return (
+                int.from_bytes(data[24:27], "little") + 1,
+                int.from_bytes(data[27:30], "little") + 1,
+            )
+    if data.startswith(b"\xff\xd8"):
+        return _jpeg_size(data)
+    return None
+
+
+async def _read_up_to(resp: aiohttp.ClientResponse, limit: int) -> tuple[bytes, bool]:
+    """读取至多 limit 字节，返回 (数据, 是否已读到结尾)"""
+    buffer = bytearray()
+    async for chunk in resp.content.iter_chunked(16 * 1024):
+        buffer.extend(chunk)
+        if len(buffer) >= limit:
+            return bytes(buffer[:limit]), resp.content.at_eof() and len(buffer) <= limit
+    return bytes(buffer), True
+
+
+async def probe_image(
+    session: aiohttp.ClientSession, url: str, timeout: float = 5.0
+) -> Optional[ProbedImage]:
+    """用 Range 请求只读取图片头部，解析尺寸与总大小；请求失败返回 None"""
+    try:
+        async with session.get(
+            url,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            headers={"User-Agent": USER_AGENT, "Range": f"bytes=0-{PROBE_BYTES - 1}"},
+        ) as resp:
+            if resp.status not in (200, 206):
+                return None
+            head, complete = await _read_up_to(resp, PROBE_BYTES)
+            total = None
+            content_range = resp.headers.get("Content-Range", "")
+            if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+                total = int(content_range.rsplit("/", 1)[1])
+            elif (
+                resp.status == 200 and resp.headers.get("Content-Length", "").isdigit()
+            ):
+                total = int(resp.headers["Content-Length"])
+            if complete and (total is None or total <= len(head)):
+                total = len(head)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+    size = parse_image_size(head)
+    return ProbedImage(
+        url=url,
+        width=size[0] if size else None,
+        height=size[1] if size else None,
+        total_bytes=total,
+        data=head if total == len(head) else None,
+    )
+
+
+async def fetch_image(
+    session: aiohttp.ClientSession, image: ProbedImage, timeout: float = 10.0
+) -> bool:
+    """补全图片内容（探测阶段已读完的直接返回），成功返回 True"""
+    if image.data is not None:
+        return True
+    try:
+        async with session.get(
+            image.url,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            headers={"User-Agent": USER_AGENT},
+        ) as resp:
+            if resp.status != 200:
+                return False
+            data, complete = await _read_up_to(resp, MAX_IMAGE_BYTES)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return False
+    if not complete:
+        return False
+    image.data = data
+    return True
+
+
+def dhash(data: bytes, hash_size: int = 8) -> Optional[int]:
+    """差值感知哈希：缩放为灰度 (hash_size+1) x hash_size 后比较相邻像素"""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            pixels = list(img.convert("L").resize((hash_size + 1, hash_size)).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            offset = row * (hash_size + 1) + col
+            value = (value << 1) | (pixels[offset] > pixels[offset + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
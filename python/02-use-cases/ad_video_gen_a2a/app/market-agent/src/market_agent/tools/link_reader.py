@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import os
 from typing import Any
 from urllib.parse import urlparse
 
@@ -23,13 +25,35 @@ from veadk.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 同时处理的链接数量上限
+LINK_READER_CONCURRENCY = int(os.getenv("LINK_READER_CONCURRENCY", "4"))
+# 单个链接的处理超时（秒），超时只影响该链接
+LINK_READER_TIMEOUT = float(os.getenv("LINK_READER_TIMEOUT", "90"))
+
+
+async def _read_webpage(link: str) -> dict[str, Any]:
+    # 调用 `LinkReader` 工具进行网页内容抓取与解析（避免控制台打印完整链接）
+    logger.debug(f"调用parse_webpage解析链接域名：{urlparse(link).netloc}")
+    images, text = await parse_webpage(link)
+    # 过滤无效图片链接与总结文本互不依赖，并行进行
+    images, text = await asyncio.gather(filter_images(images), summarize_text(text))
+    logger.debug(
+        f"对url: {link} \n 解析到图片数量: {len(images)}, 解析到文本长度 {len(text)}"
+    )
+    if len(text) < 100:
+        logger.debug(f"对url: {link} \n 文本过短，长度: {len(text)}")
+    if len(images) > 5:
+        logger.debug(f"对url: {link} \n  图片数量过多，选取前5张")
+        images = images[:5]
+    return {"images": images, "text": text}
+
 
 async def read_url_link(link_list: list[str]) -> str | list[dict[str, Any]]:
     """
     读取并解析网页内容。
 
     此异步方法调用 `LinkReader` 工具，对传入的 URL 执行网页内容/图片解析，
-    返回解析结果。
+    返回解析结果。多个链接以有限并发流水线处理，单个链接超时或失败不影响其他链接。
 
     Args:
         link_list (list[str]): 待解析的网页链接列表。
@@ -45,37 +69,26 @@ async def read_url_link(link_list: list[str]) -> str | list[dict[str, Any]]:
     logger.debug(f"开始解析链接：{link_list}")
     is_images_results = await batch_check_images(link_list)
     logger.debug(f"图片检测结果： {is_images_results}")
-    result = []
-    for i, link in enumerate(link_list):
-        # try:
-        # is_images_results 中的每个元素是 (url, is_image, reason) 的元组
-        _, is_image, _ = is_images_results[i]
-        if is_image:
-            res = await comment_image(link)
-            result.append(res)
-            continue
-        else:
-            # 调用 `LinkReader` 工具进行网页内容抓取与解析（避免控制台打印完整链接）
-            logger.debug(f"调用parse_webpage解析链接域名：{urlparse(link).netloc}")
-            images, text = await parse_webpage(link)
-            # 过滤掉无效的图片链接
-            images = await filter_images(images)
-            # 对文本内容进行总结
-            text = await summarize_text(text)
-            logger.debug(
-                f"对url: {link} \n 解析到图片数量: {len(images)}, 解析到文本长度 {len(text)}"
-            )
-            if len(text) < 100:
-                logger.debug(f"对url: {link} \n 文本过短，长度: {len(text)}")
-            if len(images) > 5:
-                logger.debug(f"对url: {link} \n  图片数量过多，选取前5张")
-                images = images[:5]
-            result.append({"images": images, "text": text})
+    sem = asyncio.Semaphore(max(1, LINK_READER_CONCURRENCY))
 
-        # except Exception as e:
-        #     # 捕获并打印异常信息
-        #     logger.error(f"Error parsing {link}: {e}")
-        #     # 继续处理下一个链接
-        #     result.append({"images": [], "text": ""})
+    async def _read(link: str, is_image: bool):
+        async with sem:
+            try:
+                return await asyncio.wait_for(
+                    comment_image(link) if is_image else _read_webpage(link),
+                    timeout=LINK_READER_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"解析链接超时（{LINK_READER_TIMEOUT}秒）：{link}")
+                return {"images": [], "text": f"链接解析超时: {link}"}
+            except Exception as e:
+                logger.error(f"解析链接失败 {link}: {e}")
+                return {"images": [], "text": f"链接解析失败: {str(e)}"}
 
-    return result
+    # is_images_results 中的每个元素是 (url, is_image, reason) 的元组
+    return await asyncio.gather(
+        *(
+            _read(link, is_image)
+            for link, (_, is_image, _) in zip(link_list, is_images_results)
+        )
+    )
@@ -0,0 +1,60 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(
+    tempfile.gettempdir(), "market_agent_image_verdicts.sqlite"
+)
+
+
+class VerdictCache:
+    """按图片内容哈希持久化保存的图片过滤结论（SQLite），重复抓取同一店铺时可直接命中"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "content_hash TEXT PRIMARY KEY, is_good INTEGER NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+
+    def get_many(self, content_hashes: list[str]) -> dict[str, bool]:
+        if not content_hashes:
+            return {}
+        placeholders = ",".join("?" * len(content_hashes))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT content_hash, is_good FROM verdicts WHERE content_hash IN ({placeholders})",
+                content_hashes,
+            ).fetchall()
+        return {content_hash: bool(is_good) for content_hash, is_good in rows}
+
+    def put_many(self, verdicts: dict[str, bool]):
+        if not verdicts:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?)",
+                [(h, int(v), now) for h, v in verdicts.items()],
+            )
@@ -12,13 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import os
 import re
 import socket
 import warnings
+from contextlib import asynccontextmanager
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
 from playwright.async_api import async_playwright
 from veadk.utils.logger import get_logger
 
@@ -28,14 +30,57 @@ warnings.filterwarnings("ignore")
 # 日志配置
 logger = get_logger(__name__)
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# 预热并复用的浏览器上下文数量，同时也是并发解析页面的上限
+CONTEXT_POOL_SIZE = int(os.getenv("BROWSER_CONTEXT_POOL_SIZE", "4"))
+# 解析时不需要加载的资源类型，在路由层直接中止
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB
+
+# 一次 evaluate 在页面内收集图片属性、内联背景图和文本，避免逐元素往返
+_EXTRACT_JS = r"""
+() => {
+    const images = [];
+    for (const img of document.querySelectorAll("img")) {
+        const src = img.getAttribute("src") || img.getAttribute("data-src")
+            || img.getAttribute("lazy-src") || img.getAttribute("data-lazy");
+        if (src) images.push(src);
+    }
+    const backgrounds = [];
+    const bgPattern = /background-image:\s*url\(["']?(.*?)["']?\)/i;
+    for (const el of document.querySelectorAll("[style]")) {
+        const match = bgPattern.exec(el.getAttribute("style") || "");
+        if (match) backgrounds.push(match[1]);
+    }
+    const root = document.documentElement
+        ? document.documentElement.cloneNode(true)
+        : null;
+    if (root) {
+        root.querySelectorAll("script, style, noscript, iframe, header, footer")
+            .forEach((el) => el.remove());
+    }
+    return { images, backgrounds, text: root ? root.textContent || "" : "" };
+}
+"""
+
 # 全局浏览器实例（复用避免重复启动，提升性能）
 _global_browser = None
+# 预热的浏览器上下文池
+_context_pool: asyncio.Queue = asyncio.Queue()
+_context_count = 0
+_http_session = None
+# 启动预热与首个请求可能同时初始化浏览器，加锁保证只启动一次
+_browser_lock = asyncio.Lock()
 
 
 async def _init_browser():
-    """初始化 Playwright 浏览器（全局复用）"""
+    """初始化 Playwright 浏览器（全局复用），并预热浏览器上下文池"""
     global _global_browser
-    if not _global_browser:
+    if _global_browser:
+        return
+    async with _browser_lock:
+        if _global_browser:
+            return
         try:
             playwright = await async_playwright().start()
             # 启动浏览器（根据系统环境自动选择）
@@ -46,13 +91,100 @@ async def _init_browser():
                     "--disable-dev-shm-usage",
                     "--disable-gpu",
                     "--disable-images",
-                    "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                    f"--user-agent={USER_AGENT}",
                 ],
             )
             logger.info("Chromium 浏览器初始化成功")
         except Exception as e:
             logger.error(f"浏览器初始化失败: {e}", exc_info=True)
             raise
+        await _warm_context_pool()
+
+
+async def _block_heavy_resources(route):
+    """中止图片、字体、媒体请求，图片URL仍可从DOM属性中读取"""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _new_context():
+    context = await _global_browser.new_context(user_agent=USER_AGENT)
+    await context.route("**/*", _block_heavy_resources)
+    # 页面请求超时配置
+    context.set_default_timeout(15 * 1000)  # 15秒超时
+    return context
+
+
+async def _warm_context_pool():
+    global _context_count
+    while _context_count < CONTEXT_POOL_SIZE:
+        _context_count += 1
+        try:
+            _context_pool.put_nowait(await _new_context())
+        except Exception as e:
+            _context_count -= 1
+            logger.warning(f"预热浏览器上下文失败: {e}")
+            break
+    logger.info(f"浏览器上下文池已预热：{_context_pool.qsize()} 个")
+
+
+@asynccontextmanager
+async def _acquire_context():
+    """从池中借出一个浏览器上下文，池空且未达上限时新建，否则排队等待"""
+    global _context_count
+    try:
+        context = _context_pool.get_nowait()
+    except asyncio.QueueEmpty:
+        if _context_count < CONTEXT_POOL_SIZE:
+            _context_count += 1
+            try:
+                context = await _new_context()
+            except Exception:
+                _context_count -= 1
+                raise
+        else:
+            context = await _context_pool.get()
+
+    try:
+        yield context
+    finally:
+        # 归还前清理页面和 cookie，失效的上下文直接丢弃
+        try:
+            for page in context.pages:
+                await page.close()
+            await context.clear_cookies()
+            _context_pool.put_nowait(context)
+        except Exception as e:
+            logger.warning(f"浏览器上下文已失效，丢弃: {e}")
+            _context_count -= 1
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+
+def _get_http_session() -> aiohttp.ClientSession:
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers={"User-Agent": USER_AGENT},
+        )
+    return _http_session
+
+
+async def _check_content_length(url: str):
+    """DoS防护：只读取响应头检查Content-Length，不下载正文"""
+    try:
+        async with _get_http_session().get(url) as r:
+            content_length = r.headers.get("Content-Length")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"检查响应大小时出错: {e}")
+        raise ValueError("无法访问URL")
+    if content_length and int(content_length) > MAX_CONTENT_LENGTH:
+        raise ValueError("响应内容大于10MB，因安全保护拒绝解析")
 
 
 def _is_public_ip(url: str) -> bool:
@@ -70,6 +202,30 @@ def _is_public_ip(url: str) -> bool:
         return False
 
 
+def _collect_image_urls(url: str, images: list, backgrounds: list) -> list:
+    img_url_list = []
+    # <img>标签的图片（src/data-src/lazy-src等），过滤无效链接
+    for img_src in images:
+        absolute_url = urljoin(url, img_src)
+        if (
+            not absolute_url.startswith(("data:", "svg:", "javascript:", "blob:"))
+            and "." in absolute_url.split("/")[-1]
+        ):
+            img_url_list.append(absolute_url)
+    logger.debug(f"从img标签中提取了{len(img_url_list)}张有效图片")
+
+    # 背景图片（style中的background-image）
+    for bg_img in backgrounds:
+        absolute_bg_url = urljoin(url, bg_img)
+        if not absolute_bg_url.startswith(("data:", "svg:", "blob:")):
+            img_url_list.append(absolute_bg_url)
+
+    # 去重（保持页面顺序）
+    img_url_list = list(dict.fromkeys(img_url_list))
+    logger.debug(f"去重后最终图片列表：{len(img_url_list)}张图片")
+    return img_url_list
+
+
 async def parse_webpage_local(url: str, render_js: bool = True, delay: int = 5):
     """
     通用网页解析工具：提取网页的图片URL列表和纯文本内容（基于Playwright）
@@ -78,8 +234,6 @@ async def parse_webpage_local(url: str, render_js: bool = True, delay: int = 5):
     :param delay: 渲染延迟（秒，默认5）
     :return: (img_url_list, text_content)
     """
-    global _global_browser
-
     logger.info(f"开始网页解析：{url}，render_js={render_js}，延迟={delay}秒")
 
     # 初始化浏览器（如果尚未初始化）
@@ -90,112 +244,38 @@ async def parse_webpage_local(url: str, render_js: bool = True, delay: int = 5):
         logger.error("浏览器未初始化")
         raise RuntimeError("浏览器未初始化")
 
-    page = None
+    # 响应大小检查与借出上下文、创建页面并行进行，但必须在访问URL之前完成，
+    # 超限页面不会被加载
+    size_check = asyncio.create_task(_check_content_length(url))
     try:
-        # 创建新页面
-        context = await _global_browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = await context.new_page()
-        logger.debug("创建了新的浏览器上下文和页面")
+        async with _acquire_context() as context:
+            page = await context.new_page()
+            await size_check
 
-        # 页面请求超时配置
-        page.set_default_timeout(15 * 1000)  # 15秒超时
-        logger.debug("将页面超时设置为15秒")
-
-        # 增加DoS防护：检查Content-Length
-        try:
-            with requests.get(url, stream=True, timeout=10) as r:
-                content_length = r.headers.get("Content-Length")
-                if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB
-                    raise ValueError("响应内容大于10MB，因安全保护拒绝解析")
-        except requests.RequestException as e:
-            logger.error(f"检查响应大小时出错: {e}")
-            raise ValueError("无法访问URL")
-
-        # 访问目标URL
-        await page.goto(url, wait_until="domcontentloaded" if render_js else "commit")
-        logger.info(f"成功访问URL：{url}")
-
-        # 渲染JS（等待动态内容加载）
-        if render_js:
-            logger.info(f"等待{delay}秒进行JS渲染")
-            try:
-                await page.wait_for_load_state("networkidle", timeout=delay * 1000)
-            except Exception:
-                import asyncio
+            # 访问目标URL
+            await page.goto(
+                url, wait_until="domcontentloaded" if render_js else "commit"
+            )
+            logger.info(f"成功访问URL：{url}")
 
-                await asyncio.sleep(delay)  # 等待页面加载完成
-            logger.debug("JS渲染完成")
+            # 渲染JS（等待动态内容加载）
+            if render_js:
+                logger.info(f"等待最多{delay}秒进行JS渲染")
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=delay * 1000)
+                except Exception:
+                    logger.debug("等待networkidle超时，继续解析当前DOM")
+                logger.debug("JS渲染完成")
 
-        # 获取页面完整HTML
-        html_content = await page.content()
-        logger.debug(f"获取到页面HTML，长度：{len(html_content)}字符")
+            extracted = await page.evaluate(_EXTRACT_JS)
 
         # 1. 提取所有图片URL
-        img_url_list = []
-
-        # 1.1 提取<img>标签的图片（src/data-src/lazy-src等）
-        # 方式1：通过Playwright选择器提取（更高效）
-        img_elements = await page.query_selector_all("img")
-        logger.debug(f"在页面上找到{len(img_elements)}个img标签")
-
-        for img_elem in img_elements:
-            # 获取图片属性
-            img_src = (
-                await img_elem.get_attribute("src")
-                or await img_elem.get_attribute("data-src")
-                or await img_elem.get_attribute("lazy-src")
-                or await img_elem.get_attribute("data-lazy")
-            )
-            if img_src:
-                absolute_url = urljoin(url, img_src)
-                # 过滤无效链接
-                if (
-                    not absolute_url.startswith(
-                        ("data:", "svg:", "javascript:", "blob:")
-                    )
-                    and "." in absolute_url.split("/")[-1]
-                ):
-                    img_url_list.append(absolute_url)
-        logger.debug(f"从img标签中提取了{len(img_url_list)}张有效图片")
-
-        # 1.2 提取背景图片（style中的background-image）
-        bg_pattern = re.compile(r'background-image:\s*url\(["\']?(.*?)["\']?\)', re.I)
-        # 获取所有元素的style属性
-        all_elements = await page.query_selector_all("*")
-        logger.debug(f"检查了{len(all_elements)}个元素的背景图片")
-
-        for elem in all_elements:
-            style = await elem.get_attribute("style") or ""
-            match = bg_pattern.search(style)
-            if match:
-                bg_img = match.group(1)
-                absolute_bg_url = urljoin(url, bg_img)
-                if (
-                    absolute_bg_url not in img_url_list
-                    and not absolute_bg_url.startswith(("data:", "svg:", "blob:"))
-                ):
-                    img_url_list.append(absolute_bg_url)
-        logger.debug(
-            f"从背景样式中提取了{len(img_url_list) - len(set(img_url_list))}张有效图片"
+        img_url_list = _collect_image_urls(
+            url, extracted["images"], extracted["backgrounds"]
         )
 
-        # 1.3 去重
-        img_url_list = list(set(img_url_list))
-        logger.debug(f"去重后最终图片列表：{len(img_url_list)}张图片")
-
-        # 2. 提取纯文本内容
-        logger.debug("正在提取文本内容")
-        soup = BeautifulSoup(html_content, "html.parser")
-        # 移除无用标签
-        for useless_tag in soup(
-            ["script", "style", "noscript", "iframe", "header", "footer"]
-        ):
-            useless_tag.extract()
-        # 格式化文本
-        raw_text = soup.get_text(strip=True)
-        text_content = re.sub(r"\s+", " ", raw_text)
+        # 2. 格式化文本
+        text_content = re.sub(r"\s+", " ", extracted["text"]).strip()
         logger.debug(f"提取到文本内容，长度：{len(text_content)}字符")
 
         logger.info(
@@ -207,8 +287,8 @@ async def parse_webpage_local(url: str, render_js: bool = True, delay: int = 5):
         logger.error(f"解析网页失败: {e}", exc_info=True)
         raise
     finally:
-        # 关闭页面和上下文，释放资源
-        if page:
-            await page.close()
-        if "context" in locals():
-            await context.close()
+        if not size_check.done():
+            size_check.cancel()
+        elif not size_check.cancelled():
+            # 借出上下文先失败时，取走检查结果避免未处理异常告警
+            size_check.exception()
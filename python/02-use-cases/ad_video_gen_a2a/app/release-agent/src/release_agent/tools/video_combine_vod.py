@@ -17,11 +17,10 @@ import json
 import os
 from typing import List, Dict, Any
 from typing import Optional
-import urllib.parse
-import aiohttp
 import fastmcp
 from fastmcp import Client
 from veadk.utils.logger import get_logger
+from short_url_resolver import resolve_short_urls
 
 logger = get_logger(__name__)
 
@@ -30,55 +29,6 @@ shorten_url_service_url = os.getenv("SHORTEN_URL_SERVICE_URL", None)
 assert shorten_url_service_url, "SHORTEN_URL_SERVICE_URL is not set"
 
 
-async def resolve_short_url(short_url: str) -> str:
-    """
-    将短链接还原为原始URL
-
-    Args:
-        short_url: 短链接URL
-
-    Returns:
-        原始URL，如果解析失败则返回短链接本身
-    """
-    # 避免在控制台打印短链接，改用结构化日志
-    logger.debug("Resolving short URL")
-    if not shorten_url_service_url:
-        return short_url
-
-    try:
-        # 从短链接中提取短码
-        # 短链接格式: http://127.0.0.1:8005/t/AbC123 或 http://127.0.0.1:8005/t/video/AbC123
-        parsed_url = urllib.parse.urlparse(short_url)
-        path_parts = parsed_url.path.strip("/").split("/")
-
-        if len(path_parts) >= 2 and path_parts[0] == "t":
-            # 调用短链接服务的重定向接口来获取原始URL
-            async with aiohttp.ClientSession() as session:
-                # 使用GET请求获取原始URL（短链接服务直接返回原始URL字符串）
-                async with session.get(short_url) as response:
-                    if response.status == 200:
-                        # 短链接服务直接返回原始URL字符串
-                        original_url = await response.text()
-                        original_url = original_url.strip().strip('"')
-                        logger.debug(
-                            f"Successfully resolved short URL: {short_url} -> {original_url}"
-                        )
-                        return original_url
-                    else:
-                        logger.warning(
-                            f"Failed to resolve short URL: {short_url}, status: {response.status}"
-                        )
-                        return short_url
-        else:
-            logger.warning(f"Not a valid short URL format: {short_url}")
-            return short_url
-
-    except Exception as e:
-        logger.error(f"Error resolving short URL {short_url}: {e}")
-        # 如果解析失败，返回原始短链接
-        return short_url
-
-
 vod_mcp_config = {
     "mcpServers": {
         "mcp-server-vod": {
@@ -128,10 +78,7 @@ class VodToolSet:
             ]
 
     async def video_stitching(self, videos_url: list[str]) -> dict:
-        new_videos_url = []
-        for item in videos_url:
-            item = resolve_short_url(item)
-            new_videos_url.append(item)
+        new_videos_url = await resolve_short_urls(videos_url)
 
         response = await self._call_tools(
             tool_name="audio_video_stitching",
@@ -12,9 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os
 import hashlib
 import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
@@ -22,6 +26,10 @@ from pydantic import BaseModel
 SHORT_LINK_MODE = os.getenv(
     "SHORT_LINK_MODE", "dict"
 )  # 默认为字典模式，可选值: "redis", "dict"
+# 短链接有效期（秒）
+SHORT_LINK_TTL = int(os.getenv("SHORT_LINK_TTL", 24 * 3600))
+# 字典模式下最多保存的短链接数量，超出后淘汰最久未使用的
+SHORT_LINK_DICT_MAX_ENTRIES = int(os.getenv("SHORT_LINK_DICT_MAX_ENTRIES", 100000))
 
 # 条件导入Redis
 if SHORT_LINK_MODE == "redis":
@@ -43,6 +51,113 @@ logger = logging.getLogger("short_link")
 if not logger.handlers:
     logging.basicConfig(level=logging.INFO)
 
+# 进制转换字符集
+CHAR_SET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(CHAR_SET)
+
+
+def encode_id(unique_id: int) -> str:
+    """
+    将自增ID转换为短码
+    :param unique_id: 自增ID
+    :return: 短码
+    """
+    if unique_id == 0:
+        return CHAR_SET[0]
+    short_code = []
+    while unique_id > 0:
+        unique_id, remainder = divmod(unique_id, BASE)
+        short_code.append(CHAR_SET[remainder])
+    return "".join(reversed(short_code))
+
+
+# 查重并写入两条映射在 Redis 端原子完成；脚本访问的键全部通过 KEYS 传入
+# KEYS[1] = long:md5:{md5}，KEYS[2] = short:{预分配的短码}
+SHORTEN_LUA = """
+local existing = redis.call('GET', KEYS[1])
+if existing then
+    return existing
+end
+redis.call('SETEX', KEYS[1], ARGV[2], ARGV[3])
+redis.call('SETEX', KEYS[2], ARGV[2], ARGV[1])
+return ARGV[3]
+"""
+
+
+class RedisStorageClient:
+    """Redis 存储：一次 INCRBY 为整批预分配短码，再通过 pipeline 一次往返写入"""
+
+    def __init__(self, client):
+        self.client = client
+        self._shorten = client.register_script(SHORTEN_LUA)
+
+    async def shorten_many(self, items: list[tuple[str, str]], ttl: int) -> list[str]:
+        """:param items: [(url_md5, url)]"""
+        if not items:
+            return []
+        # 预分配的短码在 URL 已存在时不会被使用，自增ID允许出现空洞
+        last_id = await self.client.incrby("auto_id:counter", len(items))
+        first_id = last_id - len(items) + 1
+        async with self.client.pipeline(transaction=False) as pipe:
+            for offset, (url_md5, url) in enumerate(items):
+                short_code = encode_id(first_id + offset)
+                await self._shorten(
+                    keys=[f"long:md5:{url_md5}", f"short:{short_code}"],
+                    args=[url, ttl, short_code],
+                    client=pipe,
+                )
+            return list(await pipe.execute())
+
+    async def resolve_many(self, short_codes: list[str]) -> list[Optional[str]]:
+        return await self.client.mget([f"short:{code}" for code in short_codes])
+
+
+class DictStorageClient:
+    """进程内字典存储：支持TTL过期，并按最近使用淘汰，内存占用有上限"""
+
+    def __init__(self, max_entries: int = SHORT_LINK_DICT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.auto_id_counter = 0
+        # 每个短链接是一个 LRU 条目，长短两条映射一起刷新、一起淘汰
+        # short_code -> (url, url_md5, expires_at)
+        self.links: OrderedDict[str, tuple[str, str, float]] = OrderedDict()
+        # url_md5 -> short_code
+        self.codes: dict[str, str] = {}
+
+    def _touch(self, short_code: str) -> Optional[tuple[str, str, float]]:
+        entry = self.links.get(short_code)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            self._remove(short_code)
+            return None
+        self.links.move_to_end(short_code)
+        return entry
+
+    def _remove(self, short_code: str):
+        _, url_md5, _ = self.links.pop(short_code)
+        if self.codes.get(url_md5) == short_code:
+            del self.codes[url_md5]
+
+    async def shorten_many(self, items: list[tuple[str, str]], ttl: int) -> list[str]:
+        codes = []
+        for url_md5, url in items:
+            short_code = self.codes.get(url_md5)
+            if not short_code or not self._touch(short_code):
+                self.auto_id_counter += 1
+                short_code = encode_id(self.auto_id_counter)
+                self.links[short_code] = (url, url_md5, time.monotonic() + ttl)
+                self.codes[url_md5] = short_code
+                while len(self.links) > self.max_entries:
+                    self._remove(next(iter(self.links)))
+            codes.append(short_code)
+        return codes
+
+    async def resolve_many(self, short_codes: list[str]) -> list[Optional[str]]:
+        entries = [self._touch(code) for code in short_codes]
+        return [entry[0] if entry else None for entry in entries]
+
+
 # 创建FastAPI应用
 app = FastAPI(
     title="Short Link Service",
@@ -55,78 +170,47 @@ app = FastAPI(
 # 存储后端初始化
 if SHORT_LINK_MODE == "redis" and REDIS_AVAILABLE:
     # 连接Redis
-    storage_client = redis.Redis(
-        host=os.getenv("REDIS_HOST"),
-        port=int(os.getenv("REDIS_PORT", 6379)),
-        username=os.getenv("REDIS_USERNAME"),
-        password=os.getenv("REDIS_PASSWORD"),
-        db=int(os.getenv("REDIS_DB", 0)),
-        decode_responses=True,
+    storage_client = RedisStorageClient(
+        redis.Redis(
+            host=os.getenv("REDIS_HOST"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            username=os.getenv("REDIS_USERNAME"),
+            password=os.getenv("REDIS_PASSWORD"),
+            db=int(os.getenv("REDIS_DB", 0)),
+            decode_responses=True,
+        )
     )
 else:
     # 使用字典作为存储后端
     logger.info(f"使用字典模式存储短链接 (SHORT_LINK_MODE={SHORT_LINK_MODE})")
-    # 初始化字典存储
-    dict_storage = {
-        "auto_id_counter": 0,
-        "long_md5": {},  # long:md5:{md5} -> short_code
-        "short": {},  # short:{short_code} -> url
-    }
+    storage_client = DictStorageClient()
 
-    # 模拟Redis客户端的异步接口
-    class DictStorageClient:
-        def __init__(self, storage):
-            self.storage = storage
-
-        async def get(self, key: str):
-            if key.startswith("long:md5:"):
-                md5 = key.replace("long:md5:", "")
-                return self.storage["long_md5"].get(md5)
-            elif key.startswith("short:"):
-                short_code = key.replace("short:", "")
-                return self.storage["short"].get(short_code)
-            return None
 
-        async def setex(self, key: str, ttl: int, value: str):
-            # 字典模式不支持TTL，但保留接口兼容性
-            if key.startswith("long:md5:"):
-                md5 = key.replace("long:md5:", "")
-                self.storage["long_md5"][md5] = value
-            elif key.startswith("short:"):
-                short_code = key.replace("short:", "")
-                self.storage["short"][short_code] = value
+def build_short_url(short_code: str, type: Optional[str] = None) -> str:
+    domain = os.getenv("SHORT_LINK_DOMAIN", "http://localhost:8005")
+    if type:
+        return f"{domain}/t/{type}/{short_code}"
+    return f"{domain}/t/{short_code}"
 
-        async def incr(self, key: str):
-            if key == "auto_id:counter":
-                self.storage["auto_id_counter"] += 1
-                return self.storage["auto_id_counter"]
-            return 0
 
-    storage_client = DictStorageClient(dict_storage)
+class URLRequest(BaseModel):
+    url: str
+    type: str = None
 
-# 进制转换字符集
-CHAR_SET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
-BASE = len(CHAR_SET)
 
+class BatchURLRequest(BaseModel):
+    urls: list[str]
+    type: str = None
 
-def encode_id(unique_id: int) -> str:
-    """
-    将自增ID转换为短码
-    :param unique_id: 自增ID
-    :return: 短码
-    """
-    if unique_id == 0:
-        return CHAR_SET[0]
-    short_code = []
-    while unique_id > 0:
-        unique_id, remainder = divmod(unique_id, BASE)
-        short_code.append(CHAR_SET[remainder])
-    return "".join(reversed(short_code))
 
+class ResolveRequest(BaseModel):
+    short_codes: list[str]
 
-class URLRequest(BaseModel):
-    url: str
-    type: str = None
+
+async def _shorten(urls: list[str]) -> list[str]:
+    # 计算URL的MD5值，已生成过短码的URL会直接返回原短码
+    items = [(hashlib.md5(url.encode()).hexdigest(), url) for url in urls]
+    return await storage_client.shorten_many(items, SHORT_LINK_TTL)
 
 
 @app.post("/shorten", response_model=dict)
@@ -136,40 +220,52 @@ async def shorten_url(request: URLRequest):
     :param url: 原始长URL
     :return: 短码和短链接
     """
-    # 计算URL的MD5值
-    url = request.url
-    url_md5 = hashlib.md5(url.encode()).hexdigest()
-
-    # 检查长URL是否已经生成过短码
-    existing_short_code = await storage_client.get(f"long:md5:{url_md5}")
-    if existing_short_code:
-        domain = os.getenv("SHORT_LINK_DOMAIN", "http://localhost:8005")
-        if request.type:
-            short_url = f"{domain}/t/{request.type}/{existing_short_code}"
-        else:
-            short_url = f"{domain}/t/{existing_short_code}"
-        return {
-            "short_code": existing_short_code,
-            "short_url": short_url,
-        }
+    (short_code,) = await _shorten([request.url])
+    return {
+        "short_code": short_code,
+        "short_url": build_short_url(short_code, request.type),
+    }
 
-    # 获取自增ID
-    unique_id = await storage_client.incr("auto_id:counter")
 
-    # 将自增ID转换为短码
-    short_code = encode_id(unique_id)
+@app.post("/shorten_batch", response_model=dict)
+async def shorten_urls(request: BatchURLRequest):
+    """
+    批量生成短链接
+    :param urls: 原始长URL列表
+    :return: {"results": [{"url", "short_code", "short_url"}]}，顺序与输入一致
+    """
+    short_codes = await _shorten(request.urls) if request.urls else []
+    return {
+        "results": [
+            {
+                "url": url,
+                "short_code": short_code,
+                "short_url": build_short_url(short_code, request.type),
+            }
+            for url, short_code in zip(request.urls, short_codes)
+        ]
+    }
 
-    # 存储三个核心映射
-    await storage_client.setex(f"long:md5:{url_md5}", 24 * 3600, short_code)
-    await storage_client.setex(f"short:{short_code}", 24 * 3600, url)
 
-    # 返回结果
-    domain = os.getenv("SHORT_LINK_DOMAIN", "http://localhost:8005")
-    if request.type:
-        short_url = f"{domain}/t/{request.type}/{short_code}"
-    else:
-        short_url = f"{domain}/t/{short_code}"
-    return {"short_code": short_code, "short_url": short_url}
+@app.post("/resolve", response_model=dict)
+@app.post("/resolve_batch", response_model=dict)
+async def resolve_short_codes(request: ResolveRequest):
+    """
+    批量解析短码
+    :param short_codes: 短码列表
+    :return: {"urls": {short_code: 原始URL，不存在时为 None}}
+    """
+    short_codes = list(dict.fromkeys(request.short_codes))
+    if not short_codes:
+        return {"urls": {}}
+    # 一次 MGET 取回所有短码对应的URL
+    urls = await storage_client.resolve_many(short_codes)
+    return {
+        "urls": {
+            code: url.strip('"') if url else None
+            for code, url in zip(short_codes, urls)
+        }
+    }
 
 
 @app.get("/t/{short_code}")
@@ -182,7 +278,7 @@ async def redirect_url(short_code: str, type: str = None):
     :return: 重定向到原始长URL
     """
     # 获取原始长URL
-    url = await storage_client.get(f"short:{short_code}")
+    (url,) = await storage_client.resolve_many([short_code])
     if not url:
         raise HTTPException(status_code=404, detail="Short code not found")
     return url.strip('"')
@@ -0,0 +1,113 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+短链接存储后端压测
+
+对比字典模式与Redis模式（设置 REDIS_HOST 时）在逐个生成、批量生成与批量解析下的耗时，
+Redis 模式额外对比原先每个URL GET + INCR + 2*SETEX 的多次往返写法。
+
+    python benchmark.py --count 500
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+
+from app import SHORT_LINK_TTL, DictStorageClient, RedisStorageClient, encode_id
+
+
+def _items(count: int) -> list[tuple[str, str]]:
+    run_id = uuid.uuid4().hex
+    urls = [f"https://example.com/{run_id}/video_{i}.mp4" for i in range(count)]
+    return [(hashlib.md5(url.encode()).hexdigest(), url) for url in urls]
+
+
+async def _timed(label: str, count: int, coro):
+    start = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed * 1000:9.1f} ms  {count / elapsed:10.0f} url/s")
+    return result
+
+
+async def _shorten_one_by_one(storage, items):
+    codes = []
+    for item in items:
+        codes.extend(await storage.shorten_many([item], SHORT_LINK_TTL))
+    return codes
+
+
+async def _legacy_redis_shorten(client, items):
+    # 原实现：每个URL依次 GET、INCR、SETEX、SETEX
+    codes = []
+    for url_md5, url in items:
+        code = await client.get(f"long:md5:{url_md5}")
+        if not code:
+            code = encode_id(await client.incr("auto_id:counter"))
+            await client.setex(f"long:md5:{url_md5}", SHORT_LINK_TTL, code)
+            await client.setex(f"short:{code}", SHORT_LINK_TTL, url)
+        codes.append(code)
+    return codes
+
+
+async def _bench_storage(name: str, storage, count: int):
+    await _timed(
+        f"{name} shorten one by one",
+        count,
+        _shorten_one_by_one(storage, _items(count)),
+    )
+    codes = await _timed(
+        f"{name} shorten_batch",
+        count,
+        storage.shorten_many(_items(count), SHORT_LINK_TTL),
+    )
+    await _timed(f"{name} resolve_batch", count, storage.resolve_many(codes))
+
+
+async def main(count: int):
+    await _bench_storage("dict", DictStorageClient(), count)
+
+    if not os.getenv("REDIS_HOST"):
+        print("REDIS_HOST 未设置，跳过 Redis 模式")
+        return
+
+    import redis.asyncio as redis
+
+    client = redis.Redis(
+        host=os.getenv("REDIS_HOST"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        username=os.getenv("REDIS_USERNAME"),
+        password=os.getenv("REDIS_PASSWORD"),
+        db=int(os.getenv("REDIS_DB", 0)),
+        decode_responses=True,
+    )
+    try:
+        await _timed(
+            "redis legacy GET+INCR+2*SETEX",
+            count,
+            _legacy_redis_shorten(client, _items(count)),
+        )
+        await _bench_storage("redis", RedisStorageClient(client), count)
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500, help="每轮生成的URL数量")
+    asyncio.run(main(parser.parse_args().count))
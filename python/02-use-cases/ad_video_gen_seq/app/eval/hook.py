@@ -20,6 +20,31 @@ from veadk.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
+def get_callback_agent_output(tool_response: Any, media_type: str) -> list[str]:
+    """
+    Get the callback agent output for evaluation, one score fragment per shot.
+    """
+    if not isinstance(tool_response, dict):
+        return []
+    scored_list = tool_response.get(f"scored_{media_type}_list") or []
+    fragments = []
+    for shot in scored_list:
+        items = shot.get(f"{media_type}s") or []
+        if not items:
+            continue
+        best = max(items, key=lambda item: item.get("score", 0.0))
+        lines = [f"#### {shot.get('shot_id', '')} 评估"]
+        for item in items:
+            mark = "（最佳）" if item is best else ""
+            lines.append(
+                f"- {item.get('code', '')}：{item.get('score', 0.0):g} 分{mark}"
+            )
+        fragments.append("\n".join(lines) + "\n\n")
+    if fragments:
+        fragments.insert(0, "\n\n### 评估结果\n\n")
+    return fragments
+
+
 def hook_url_id_mapping(
     tool: BaseTool, args: dict[str, Any], tool_context: ToolContext, tool_response: Any
 ) -> Optional[Any]:
@@ -35,12 +60,16 @@ def hook_url_id_mapping(
             tool_context.state["cb_agent_state"] = (
                 "\n✅首帧图评估生成任务已经完成，继续执行下一步视频生成任务\n"
             )
-            tool_context.state["cb_agent_output"] = ""
+            tool_context.state["cb_agent_output"] = get_callback_agent_output(
+                tool_response, "image"
+            )
         elif agent_name == "video_evaluate_agent":
             tool_context.state["cb_agent_state"] = (
                 "\n✅视频评估生成任务已经完成，继续执行下一步视频合成任务\n"
             )
-            tool_context.state["cb_agent_output"] = ""
+            tool_context.state["cb_agent_output"] = get_callback_agent_output(
+                tool_response, "video"
+            )
 
         return tool_response
 
@@ -12,47 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
 from typing import Optional, Any
 
 from google.adk.tools import BaseTool, ToolContext
 from veadk.utils.logger import get_logger
-from app.utils import url_shortener
+from app.utils import apply_short_codes, group_urls_by_shot, url_shortener
 
 logger = get_logger(__name__)
 
+# image_generate 结果的 key 形如 task_{idx}_image_{i}，idx 为从 0 开始的分镜任务序号
+IMAGE_KEY_PATTERN = re.compile(r"task_(\d+)_image_")
+
 
 def url_id_mapping(url: str) -> str:
     return url_shortener.url2code(original_url=url)
 
 
-def get_callback_agent_output(success_list: list[dict[str, Any]]) -> str:
+def get_callback_agent_output(shots: dict[int, dict[str, str]]) -> list[str]:
     """
-    Get the callback agent output.
+    Get the callback agent output, one fragment per shot.
     """
-    url_list = [[], [], [], []]
-    for data in success_list:
-        try:
-            key_str = list(data.keys())[0]
-            value_str = list(data.values())[0]  # url
-            prefix, item = key_str.split("_image_")
-            itx = prefix.split("task_")[1]
-            url_list[int(itx)].append(value_str)
-        except Exception as e:
-            logger.error(f"Error in get_callback_agent_output: {e}")
-            continue
-
-    html_parts = []
-    html_parts.append("\n\n### 图片生成结果")
-    for task_idx, urls in enumerate(url_list):
-        if not urls:
-            continue
-        html_parts.append(f"#### Shot_{task_idx}")
-        for img_idx, url in enumerate(urls):
-            html_parts.append(f"**Image_{img_idx + 1}：{url_id_mapping(url)}**")
+    fragments = ["\n\n### 图片生成结果\n\n"]
+    for shot, codes in shots.items():
+        html_parts = [f"#### Shot_{shot}"]
+        for img_idx, (url, code) in enumerate(codes.items()):
+            html_parts.append(f"**Image_{img_idx + 1}：{code}**")
             html_parts.append(f'<img src="{url}" alt="image" style="width: 10%;" />')
-        html_parts.append("")
-
-    return "\n\n".join(html_parts)
+        fragments.append("\n\n".join(html_parts) + "\n\n")
+    return fragments
 
 
 def hook_url_id_mapping(
@@ -65,17 +53,13 @@ def hook_url_id_mapping(
     tool_name = tool.name
     if tool_name == "image_generate":
         success_list = tool_response["success_list"]
+        shots = group_urls_by_shot(success_list, IMAGE_KEY_PATTERN, index_base=0)
 
         tool_context.state["cb_agent_state"] = (
             "\n✅首帧图生成任务已经完成，继续执行首帧图评估工作\n"
         )
-        tool_context.state["cb_agent_output"] = get_callback_agent_output(success_list)
-        for data in success_list:
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    if isinstance(value, str):
-                        value = url_id_mapping(url=value)
-                        data[key] = value
+        tool_context.state["cb_agent_output"] = get_callback_agent_output(shots)
+        apply_short_codes(success_list, shots)
         logger.debug(f"Shorten URL of `image_generate` successfully: {success_list}")
         return tool_response
     return None
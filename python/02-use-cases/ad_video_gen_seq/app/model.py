@@ -14,9 +14,13 @@
 
 # adapted from Google ADK models adk-python/blob/main/src/google/adk/models/lite_llm.py at f1f44675e4a86b75e72cfd838efd8a0399f23e24 · google/adk-python
 
+import asyncio
 import base64
+import hashlib
 import json
+import os
 import time
+from collections import OrderedDict
 from typing import Any, Dict, Union, AsyncGenerator, Tuple, List, Optional, Literal
 from typing_extensions import override
 
@@ -61,6 +65,20 @@ logger = get_logger(__name__)
 
 _ARK_TEXT_FIELD_TYPES = {"json_object", "json_schema"}
 
+# Converted input items are memoized by content hash, so media that appears in
+# several requests (e.g. the user's upload seen by every sub agent) is encoded once.
+_INPUT_CACHE_SIZE = int(os.getenv("ARK_INPUT_CACHE_SIZE", "256"))
+# Inline media of at least this many bytes is uploaded once via the Files API and
+# referenced by file_id instead of being re-sent as a data URI (0 disables it).
+_INLINE_FILE_ID_THRESHOLD = int(os.getenv("ARK_INLINE_FILE_ID_THRESHOLD", "0"))
+_INLINE_FILE_TTL = int(os.getenv("ARK_INLINE_FILE_TTL", "259200"))
+
+_input_item_cache: OrderedDict[str, List[Any]] = OrderedDict()
+# key: inline data digest, value: (file_id, expire_at)
+_inline_file_ids: Dict[str, Tuple[str, float]] = {}
+# key: (base_url, api_key)
+_ark_clients: Dict[Tuple[str, str], AsyncArk] = {}
+
 _FINISH_REASON_MAPPING = {
     "incomplete": {
         "length": types.FinishReason.MAX_TOKENS,
@@ -189,10 +207,34 @@ def _file_data_to_content_param(
     )
 
 
+def _inline_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _lookup_inline_file_id(data: bytes) -> Optional[str]:
+    if _INLINE_FILE_ID_THRESHOLD <= 0 or len(data) < _INLINE_FILE_ID_THRESHOLD:
+        return None
+    entry = _inline_file_ids.get(_inline_digest(data))
+    # Leave an hour of margin so a reference never outlives the uploaded file
+    if entry and entry[1] - 3600 > time.time():
+        return entry[0]
+    return None
+
+
 def _inline_data_to_content_param(part: types.Part) -> ResponseInputContentParam:
     mime_type = (
         part.inline_data.mime_type if part.inline_data else None
     ) or "application/octet-stream"
+    file_id = _lookup_inline_file_id(part.inline_data.data)
+    if file_id:
+        return _file_data_to_content_param(
+            types.Part(
+                file_data=types.FileData(
+                    file_uri=f"file_id://{file_id}", mime_type=mime_type
+                ),
+                video_metadata=part.video_metadata,
+            )
+        )
     base64_string = base64.b64encode(part.inline_data.data).decode("utf-8")
     data_uri = f"data:{mime_type};base64,{base64_string}"
 
@@ -290,6 +332,47 @@ def _content_to_input_item(
     return input_list
 
 
+def _content_key(content: types.Content) -> str:
+    """Hash of a content; inline bytes are hashed directly instead of being serialized."""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update((content.role or "").encode("utf-8"))
+    for part in content.parts or []:
+        if part.inline_data and part.inline_data.data:
+            data = part.inline_data.data
+            hasher.update(b"\x00inline:" + _inline_digest(data).encode("ascii"))
+            hasher.update((_lookup_inline_file_id(data) or "").encode("ascii"))
+        dumped = part.model_dump(
+            exclude={"inline_data": {"data"}}, exclude_none=True, mode="json"
+        )
+        hasher.update(b"\x00" + _safe_json_serialize(dumped).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def _content_to_input_items_cached(
+    content: types.Content,
+) -> List[ResponseInputItemParam]:
+    key = _content_key(content)
+    items = _input_item_cache.get(key)
+    if items is not None:
+        _input_item_cache.move_to_end(key)
+        return items
+
+    item_or_list = _content_to_input_item(content)
+    if isinstance(item_or_list, list):
+        items = item_or_list
+    else:
+        items = [item_or_list] if item_or_list else []
+    _input_item_cache[key] = items
+    while len(_input_item_cache) > _INPUT_CACHE_SIZE:
+        _input_item_cache.popitem(last=False)
+    return items
+
+
+def _is_tail_input(item: ResponseInputItemParam) -> bool:
+    # Same rule as `filtered_inputs`
+    return item.get("type") == "function_call_output" or item.get("role") == "user"
+
+
 def _function_declarations_to_tool_param(
     function_declaration: types.FunctionDeclaration,
 ) -> FunctionToolParam:
@@ -363,6 +446,7 @@ def _responses_schema_to_text(
 
 def _get_responses_inputs(
     llm_request: LlmRequest,
+    tail_only: bool = False,
 ) -> Tuple[
     Optional[str],
     Optional[List[ResponseInputItemParam]],
@@ -376,15 +460,26 @@ def _get_responses_inputs(
         instructions = llm_request.config.system_instruction
     # 1. input
     input_params: Optional[List[ResponseInputItemParam]] = []
-    for content in llm_request.contents or []:
-        # Each content represents `one conversation`.
-        # This `one conversation` may contain `multiple pieces of content`,
-        # but it cannot contain `multiple conversations`.
-        input_item_or_list = _content_to_input_item(content)
-        if isinstance(input_item_or_list, list):
-            input_params.extend(input_item_or_list)
-        elif input_item_or_list:
-            input_params.append(input_item_or_list)
+    if tail_only:
+        # `filtered_inputs` only keeps the trailing user / function_call_output
+        # items, so convert backwards and stop at the first item it would drop.
+        for content in reversed(llm_request.contents or []):
+            items = _content_to_input_items_cached(content)
+            kept = 0
+            for item in reversed(items):
+                if not _is_tail_input(item):
+                    break
+                kept += 1
+            if kept:
+                input_params[:0] = items[len(items) - kept :]
+            if kept < len(items):
+                break
+    else:
+        for content in llm_request.contents or []:
+            # Each content represents `one conversation`.
+            # This `one conversation` may contain `multiple pieces of content`,
+            # but it cannot contain `multiple conversations`.
+            input_params.extend(_content_to_input_items_cached(content))
 
     # 2. Convert tool declarations
     tools: Optional[List[FunctionToolParam]] = None
@@ -631,6 +726,59 @@ def ark_response_to_generate_content_response(
     return llm_response
 
 
+def _get_ark_client(api_base: str, api_key: str) -> AsyncArk:
+    """Long-lived client per (base_url, api_key), reusing its connection pool."""
+    key = (api_base, api_key)
+    client = _ark_clients.get(key)
+    if client is None:
+        client = AsyncArk(base_url=api_base, api_key=api_key)
+        _ark_clients[key] = client
+    return client
+
+
+async def _upload_inline_file(
+    client: AsyncArk, digest: str, data: bytes, mime_type: str
+) -> None:
+    try:
+        expire_at = int(time.time()) + _INLINE_FILE_TTL
+        file = await client.files.create(
+            file=(digest, data, mime_type),
+            purpose="user_data",
+            expire_at=expire_at,
+        )
+        file = await client.files.wait_for_processing(file.id)
+        if file.status != "active":
+            logger.warning(f"Inline file {file.id} processing {file.status}")
+            return
+        _inline_file_ids[digest] = (file.id, expire_at)
+        logger.debug(f"Registered inline {mime_type} ({len(data)} bytes) as {file.id}")
+    except Exception as e:
+        logger.warning(f"Inline file upload failed, falling back to data URI: {e}")
+
+
+async def _register_inline_files(client: AsyncArk, llm_request: LlmRequest) -> None:
+    """Upload large inline parts of the trailing user turn(s), the only contents sent."""
+    pending: Dict[str, Tuple[bytes, str]] = {}
+    for content in reversed(llm_request.contents or []):
+        if content.role != "user":
+            break
+        for part in content.parts or []:
+            if not (part.inline_data and part.inline_data.data):
+                continue
+            data = part.inline_data.data
+            if len(data) < _INLINE_FILE_ID_THRESHOLD or _lookup_inline_file_id(data):
+                continue
+            mime_type = part.inline_data.mime_type or "application/octet-stream"
+            pending.setdefault(_inline_digest(data), (data, mime_type))
+    if pending:
+        await asyncio.gather(
+            *(
+                _upload_inline_file(client, digest, data, mime_type)
+                for digest, (data, mime_type) in pending.items()
+            )
+        )
+
+
 class ArkLlmClient:
     async def aresponse(
         self, **kwargs
@@ -640,14 +788,19 @@ class ArkLlmClient:
         api_key = kwargs.pop("api_key", settings.model.api_key)
 
         # 2. Call openai responses
-        client = AsyncArk(
-            base_url=api_base,
-            api_key=api_key,
-        )
+        client = _get_ark_client(api_base, api_key)
 
         raw_response = await client.responses.create(**kwargs)
         return raw_response
 
+    async def register_inline_files(
+        self, llm_request: LlmRequest, api_base: str, api_key: str
+    ) -> None:
+        if _INLINE_FILE_ID_THRESHOLD > 0:
+            await _register_inline_files(
+                _get_ark_client(api_base, api_key), llm_request
+            )
+
 
 class ArkLlm(Gemini):
     model: str
@@ -688,8 +841,16 @@ class ArkLlm(Gemini):
         self._maybe_append_user_content(llm_request)
         # logger.debug(_build_request_log(llm_request))
 
+        await self.llm_client.register_inline_files(
+            llm_request,
+            api_base=self._additional_args.get(
+                "api_base", DEFAULT_VIDEO_MODEL_API_BASE
+            ),
+            api_key=self._additional_args.get("api_key", settings.model.api_key),
+        )
+        # `request_reorganization_by_ark` keeps only the trailing user turn(s)
         instructions, input_param, tools, text_format, generation_params = (
-            _get_responses_inputs(llm_request)
+            _get_responses_inputs(llm_request, tail_only=True)
         )
 
         if "functions" in self._additional_args:
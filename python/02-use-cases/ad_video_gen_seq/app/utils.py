@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import os
+import sqlite3
+import tempfile
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Optional
 import threading
@@ -33,6 +38,128 @@ def callback_for_debug(callback_context: CallbackContext) -> Optional[LlmRespons
     pass
 
 
+# --- URL Shortener Backends ---
+class MemoryUrlStore:
+    """进程内存储（默认）：LRU + TTL，容量受限"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # key: code, value: (original_url, expires_at)
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def get_many(self, codes: list[str]) -> dict[str, str]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for code in codes:
+                entry = self._entries.get(code)
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    del self._entries[code]
+                    continue
+                self._entries[code] = (entry[0], now + self._ttl)
+                self._entries.move_to_end(code)
+                found[code] = entry[0]
+        return found
+
+    def setdefault(self, code: str, original_url: str) -> str:
+        """code 未被占用时写入，返回该 code 最终对应的 URL"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry is not None and entry[1] > now:
+                original_url = entry[0]
+            self._entries[code] = (original_url, now + self._ttl)
+            self._entries.move_to_end(code)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return original_url
+
+
+class SQLiteUrlStore:
+    """本地 SQLite（WAL）存储，同机多 worker / 重启后共享同一份映射"""
+
+    # 读取时最多每隔这么久刷新一次 last_used，避免每次读都写库
+    TOUCH_INTERVAL = 60.0
+    # 每写入这么多条执行一次过期/容量清理
+    PRUNE_EVERY = 256
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS short_urls ("
+                "code TEXT PRIMARY KEY, url TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_short_urls_last_used "
+                "ON short_urls (last_used)"
+            )
+
+    def get_many(self, codes: list[str]) -> dict[str, str]:
+        if not codes:
+            return {}
+        now = time.time()
+        placeholders = ",".join("?" * len(codes))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT code, url, last_used FROM short_urls WHERE code IN ({placeholders})",
+                codes,
+            ).fetchall()
+            found = {}
+            stale = []
+            for code, url, last_used in rows:
+                if last_used + self._ttl <= now:
+                    continue
+                found[code] = url
+                if last_used + self.TOUCH_INTERVAL <= now:
+                    stale.append((now, code))
+            if stale:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE short_urls SET last_used = ? WHERE code = ?", stale
+                    )
+        return found
+
+    def setdefault(self, code: str, original_url: str) -> str:
+        """code 未被占用（或已过期）时写入，返回该 code 最终对应的 URL"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO short_urls (code, url, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(code) DO UPDATE SET "
+                "url = excluded.url, last_used = excluded.last_used "
+                "WHERE url = excluded.url OR last_used + ? <= excluded.last_used",
+                (code, original_url, now, self._ttl),
+            )
+            (stored_url,) = self._conn.execute(
+                "SELECT url FROM short_urls WHERE code = ?", (code,)
+            ).fetchone()
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+        return stored_url
+
+    def _prune(self, now: float):
+        self._conn.execute(
+            "DELETE FROM short_urls WHERE last_used <= ?", (now - self._ttl,)
+        )
+        self._conn.execute(
+            "DELETE FROM short_urls WHERE code IN ("
+            "SELECT code FROM short_urls ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+
 # --- URL Shortener Singleton ---
 class UrlShortener:
     _instance = None
@@ -43,6 +170,10 @@ class UrlShortener:
     BASE = len(CHAR_SET)
 
     PREFIX = "⌥"
+    # code 长度（不含前缀），提示词中约定 ⌥ + 5 位
+    CODE_LENGTH = 5
+    # 哈希冲突时换盐重试的次数
+    MAX_PROBES = 8
 
     def __new__(cls):
         if not cls._instance:
@@ -53,49 +184,45 @@ class UrlShortener:
         return cls._instance
 
     def _initialize(self):
-        self._id_lock = threading.Lock()
-        self._current_id = 0
-        self._short_to_long = {}  # key: short_url, value: original_url
-        self._long_to_short = {}  # key: original_url, value: short_url
+        max_entries = int(os.getenv("URL_SHORTENER_MAX_ENTRIES", "100000"))
+        ttl = float(os.getenv("URL_SHORTENER_TTL", "604800"))  # 与 TOS 签名有效期一致
+        backend = os.getenv("URL_SHORTENER_BACKEND", "memory").lower()
+        if backend == "sqlite":
+            path = os.getenv("URL_SHORTENER_DB_PATH") or os.path.join(
+                tempfile.gettempdir(), "ad_video_gen_seq_short_urls.sqlite"
+            )
+            self._store = SQLiteUrlStore(path, max_entries, ttl)
+        else:
+            self._store = MemoryUrlStore(max_entries, ttl)
+        self._pattern = re.compile(
+            rf"{re.escape(self.PREFIX)}[0-9a-zA-Z]{{{self.CODE_LENGTH}}}"
+        )
 
     def _encode(self, num: int) -> str:
-        if num == 0:
-            return self.CHAR_SET[0]
-
         encoded = []
-        while num > 0:
+        for _ in range(self.CODE_LENGTH):
             num, remainder = divmod(num, self.BASE)
             encoded.append(self.CHAR_SET[remainder])
-        result = "".join(reversed(encoded))
+        return "".join(reversed(encoded))
 
-        # Pad to 5 characters
-        return result.rjust(5, "0")
+    def _hash_code(self, original_url: str, salt: int) -> str:
+        digest = hashlib.sha256(f"{salt}:{original_url}".encode("utf-8")).digest()
+        return self._encode(int.from_bytes(digest[:8], "big"))
 
     def url2code(self, original_url: str) -> str:
         """
         输入一个url字符串，换出来一个短ID
+
+        短ID由URL哈希得到，同一URL在任意进程中都映射到同一ID；
+        与其他URL冲突时换盐重试。
         """
         try:
-            # 1. Check if already exists (Deduplication)
-            with self._id_lock:
-                if original_url in self._long_to_short:
-                    return self._long_to_short[original_url]
-
-                # 2. Increment ID and Encode
-                self._current_id += 1
-                current_id = self._current_id
-                short_code = self._encode(current_id)
-
-            # 3. Construct short ID
-            short_id = f"{self.PREFIX}{short_code}"
-
-            # 4. Store mappings
-            with self._id_lock:
-                # Double check in case another thread inserted it
-                self._short_to_long[short_id] = original_url
-                self._long_to_short[original_url] = short_id
-
-            return short_id
+            for salt in range(self.MAX_PROBES):
+                short_id = f"{self.PREFIX}{self._hash_code(original_url, salt)}"
+                if self._store.setdefault(short_id, original_url) == original_url:
+                    return short_id
+            logger.warning(f"Short code collision not resolved for {original_url}")
+            return original_url
         except Exception:
             return original_url
 
@@ -103,38 +230,29 @@ class UrlShortener:
         """
         输入这个短ID，换出原始的url
         """
-        return self._short_to_long.get(short_id, short_id)
+        return self._store.get_many([short_id]).get(short_id, short_id)
 
     def replace_in_text(self, text: str) -> str:
         """
         给你一个长字符串，提取短ID并无缝替换回原始URL
         """
-        # Pattern matches ⌥<code> where code is 5 characters
-        pattern = r"⌥([0-9a-zA-Z]{5})"
-
-        def replace_match(match):
-            full_short_id = match.group(0)
-            original_url = self.code2url(full_short_id)
-            return original_url if original_url != full_short_id else full_short_id
-
-        return re.sub(pattern, replace_match, text)
+        short_ids = set(self._pattern.findall(text))
+        if not short_ids:
+            return text
+        urls = self._store.get_many(list(short_ids))
+        if not urls:
+            return text
+        return self._pattern.sub(
+            lambda match: urls.get(match.group(0), match.group(0)), text
+        )
 
     def extract_ids_to_urls(self, text: str) -> list[str]:
         """
         从字符串中提取所有短ID并转换为URL列表
         """
-        # Pattern matches ⌥<code> where code is 5 characters
-        pattern = r"⌥([0-9a-zA-Z]{5})"
-        matches = re.findall(pattern, text)
-
-        urls = []
-        for code in matches:
-            short_id = f"⌥{code}"
-            original_url = self.code2url(short_id)
-            if original_url != short_id:
-                urls.append(original_url)
-
-        return urls
+        short_ids = self._pattern.findall(text)
+        urls = self._store.get_many(list(set(short_ids)))
+        return [urls[short_id] for short_id in short_ids if short_id in urls]
 
 
 # Global instance
@@ -253,3 +371,45 @@ def upload_file_to_tos(
         # Close client
         if client:
             client.close()
+
+
+def group_urls_by_shot(
+    success_list: list[dict], key_pattern: re.Pattern, index_base: int = 1
+) -> dict[int, dict[str, str]]:
+    """
+    将生成工具的 success_list 按分镜归组，并为每个 URL 只生成一次短ID
+
+    Args:
+        success_list: 形如 [{"<name>": "<url>"}, ...] 的生成结果
+        key_pattern: 从 name 中提取分镜序号的正则（第一个分组为序号）
+        index_base: name 中序号的起始值，image 任务为 0，video 的 shot_X 为 1
+
+    Returns:
+        {分镜序号(从1开始): {url: code}}，按分镜序号升序
+    """
+    shots: dict[int, dict[str, str]] = {}
+    for data in success_list:
+        if not isinstance(data, dict):
+            continue
+        for key, url in data.items():
+            match = key_pattern.search(key) if isinstance(key, str) else None
+            if not match or not isinstance(url, str):
+                logger.error(f"Unrecognized generation result: {data}")
+                continue
+            shot = int(match.group(1)) - index_base + 1
+            urls = shots.setdefault(shot, {})
+            if url not in urls:
+                urls[url] = url_shortener.url2code(original_url=url)
+    return dict(sorted(shots.items()))
+
+
+def apply_short_codes(
+    success_list: list[dict], shots: dict[int, dict[str, str]]
+) -> None:
+    """用 group_urls_by_shot 已生成的短ID原地替换 success_list 中的 URL"""
+    codes = {url: code for urls in shots.values() for url, code in urls.items()}
+    for data in success_list:
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if isinstance(value, str):
+                    data[key] = codes.get(value) or url_shortener.url2code(value)
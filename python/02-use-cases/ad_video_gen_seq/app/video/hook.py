@@ -12,16 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
 from typing import Optional
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools.base_tool import BaseTool
 from typing import Dict, Any
 from veadk.utils.logger import get_logger
 
-from app.utils import url_shortener
+from app.utils import apply_short_codes, group_urls_by_shot, url_shortener
 
 logger = get_logger(__name__)
 
+# video_generate 结果的 key 即 video_name，形如 shot_{X}_video_{i}，X 从 1 开始
+VIDEO_KEY_PATTERN = re.compile(r"shot_(\d+)_video_")
+
 
 def hook_short_image_url_to_long(
     tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
@@ -38,34 +42,17 @@ def hook_short_image_url_to_long(
                 )
 
 
-def get_callback_agent_output(success_list: list[dict[str, Any]]) -> str:
+def get_callback_agent_output(shots: dict[int, dict[str, str]]) -> list[str]:
     """
-    Get the callback agent output for video generation.
+    Get the callback agent output for video generation, one fragment per shot.
     """
-    code_list = [[], [], [], []]
-    for data in success_list:
-        try:
-            key_str = list(data.keys())[0]
-            value_str = list(data.values())[0]  # url
-            prefix, item = key_str.split("_video_")
-            shot_num = prefix.split("shot_")[1]
-            code_list[int(shot_num) - 1].append(value_str)
-        except Exception as e:
-            logger.error(f"Error in get_callback_agent_output: {e}")
-            continue
-
-    html_parts = []
-    html_parts.append("\n\n### 视频展示")
-    for shot_idx, codes in enumerate(code_list):
-        if not codes:
-            continue
-        html_parts.append(f"#### Shot_{shot_idx + 1}\n")
-        for video_idx, code in enumerate(codes):
-            video_url = url_shortener.code2url(code)
+    fragments = ["\n\n### 视频展示\n\n"]
+    for shot, codes in shots.items():
+        html_parts = [f"#### Shot_{shot}\n"]
+        for video_url in codes:
             html_parts.append(f"{video_url} \n\n")
-        html_parts.append("")
-
-    return "\n\n".join(html_parts)
+        fragments.append("\n\n".join(html_parts) + "\n\n")
+    return fragments
 
 
 def hook_url_id_mapping(
@@ -78,17 +65,13 @@ def hook_url_id_mapping(
     tool_name = tool.name
     if tool_name == "video_generate":
         success_list = tool_response["success_list"]
+        shots = group_urls_by_shot(success_list, VIDEO_KEY_PATTERN)
 
         tool_context.state["cb_agent_state"] = (
             "\n分镜视频生成任务已经完成，继续执行分镜视频评估工作\n"
         )
-        tool_context.state["cb_agent_output"] = get_callback_agent_output(success_list)
-        for data in success_list:
-            if isinstance(data, dict):
-                for key, value in data.items():
-                    if isinstance(value, str):
-                        value = url_shortener.url2code(original_url=value)
-                        data[key] = value
+        tool_context.state["cb_agent_output"] = get_callback_agent_output(shots)
+        apply_short_codes(success_list, shots)
         logger.debug(f"Shorten URL of `video_generate` successfully: {success_list}")
         return tool_response
     return None
@@ -0,0 +1,125 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+ArkLlm 请求转换基准
+
+构造一个 50 轮、包含多张内联图片与工具调用的会话，逐轮模拟 generate_content_async 的输入转换，
+对比原先“每轮全量转换 + filtered_inputs 截取”与当前“只转换末尾用户轮次 + 内容哈希缓存”的耗时。
+
+    python benchmark_model_inputs.py --turns 50 --image-kb 500
+"""
+
+import argparse
+import os
+import time
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from app import model
+
+
+def _legacy_inputs(llm_request: LlmRequest):
+    inputs = []
+    for content in llm_request.contents:
+        item_or_list = model._content_to_input_item(content)
+        if isinstance(item_or_list, list):
+            inputs.extend(item_or_list)
+        elif item_or_list:
+            inputs.append(item_or_list)
+    return model.filtered_inputs(inputs)
+
+
+def _current_inputs(llm_request: LlmRequest):
+    return model._get_responses_inputs(llm_request, tail_only=True)[1]
+
+
+def _build_turns(turns: int, image_kb: int) -> list[list[types.Content]]:
+    """每轮：用户消息（每 5 轮附带一张图片）-> 模型工具调用 -> 工具结果 -> 模型回复"""
+    result = []
+    for i in range(turns):
+        user_parts = [
+            types.Part(text=f"第 {i + 1} 轮：请基于参考图调整分镜 {i % 4 + 1}")
+        ]
+        if i % 5 == 0:
+            user_parts.append(
+                types.Part(
+                    inline_data=types.Blob(
+                        mime_type="image/png", data=os.urandom(image_kb * 1024)
+                    )
+                )
+            )
+        call = types.FunctionCall(
+            id=f"call_{i}", name="image_generate", args={"prompt": f"shot {i}"}
+        )
+        result.append(
+            [
+                types.Content(role="user", parts=user_parts),
+                types.Content(role="model", parts=[types.Part(function_call=call)]),
+                types.Content(
+                    role="user",
+                    parts=[
+                        types.Part(
+                            function_response=types.FunctionResponse(
+                                id=call.id,
+                                name=call.name,
+                                response={"url": f"https://example.com/{i}.png"},
+                            )
+                        )
+                    ],
+                ),
+                types.Content(
+                    role="model", parts=[types.Part(text=f"分镜 {i % 4 + 1} 已更新")]
+                ),
+            ]
+        )
+    return result
+
+
+def _bench(label: str, func, turns: list[list[types.Content]]):
+    """逐轮增长会话，只计每轮请求转换（发送前会话以用户消息结尾）的耗时"""
+    contents: list[types.Content] = []
+    elapsed = 0.0
+    results = []
+    for user, call, response, reply in turns:
+        for request_contents in (contents + [user], contents + [user, call, response]):
+            llm_request = LlmRequest(contents=request_contents)
+            start = time.perf_counter()
+            results.append(func(llm_request))
+            elapsed += time.perf_counter() - start
+        contents += [user, call, response, reply]
+    print(
+        f"{label:<28} {elapsed * 1000:9.1f} ms total "
+        f"{elapsed * 1000 / len(results):7.2f} ms/request"
+    )
+    return results
+
+
+def main(turns: int, image_kb: int):
+    session = _build_turns(turns, image_kb)
+    print(f"{turns} turns, {(turns + 4) // 5} inline images of {image_kb} KB")
+    legacy = _bench("legacy full conversion", _legacy_inputs, session)
+    model._input_item_cache.clear()
+    current = _bench("tail only (cold cache)", _current_inputs, session)
+    _bench("tail only (warm cache)", _current_inputs, session)
+    assert legacy == current
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=50, help="会话轮数")
+    parser.add_argument("--image-kb", type=int, default=500, help="每张内联图片大小")
+    args = parser.parse_args()
+    main(args.turns, args.image_kb)
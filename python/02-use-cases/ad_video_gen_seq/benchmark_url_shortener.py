@@ -0,0 +1,77 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+UrlShortener.replace_in_text 微基准
+
+构造包含大量 ⌥code 的 hook 输出文本，对比原先“每次调用重新解析正则、逐个查表”的写法
+与当前实现（预编译正则 + 批量查询）在内存 / SQLite 后端下的耗时。
+
+    URL_SHORTENER_BACKEND=sqlite python benchmark_url_shortener.py --codes 2000
+"""
+
+import argparse
+import re
+import time
+
+from app.utils import url_shortener
+
+
+def _legacy_replace_in_text(text: str) -> str:
+    pattern = r"⌥([0-9a-zA-Z]{5})"
+
+    def replace_match(match):
+        full_short_id = match.group(0)
+        return url_shortener.code2url(full_short_id)
+
+    return re.sub(pattern, replace_match, text)
+
+
+def _build_text(codes: int) -> str:
+    short_ids = [
+        url_shortener.url2code(f"https://example.com/shot_{i}/video_{i}.mp4")
+        for i in range(codes)
+    ]
+    lines = [
+        f"#### Shot_{i % 4 + 1} 候选视频 {short_id}，参考图 {short_ids[i // 2]}，"
+        "画面描述：镜头缓慢推进，产品特写，暖色调灯光。"
+        for i, short_id in enumerate(short_ids)
+    ]
+    return "\n".join(lines)
+
+
+def _bench(label: str, func, text: str, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func(text)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<28} {elapsed * 1000:9.2f} ms/call")
+    return result
+
+
+def main(codes: int, rounds: int):
+    text = _build_text(codes)
+    print(f"text: {len(text) / 1024:.0f} KB, {2 * codes} short ids")
+    legacy = _bench("legacy re.sub per call", _legacy_replace_in_text, text, rounds)
+    current = _bench("replace_in_text", url_shortener.replace_in_text, text, rounds)
+    assert legacy == current
+    _bench("extract_ids_to_urls", url_shortener.extract_ids_to_urls, text, rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--codes", type=int, default=2000, help="文本中的短ID数量")
+    parser.add_argument("--rounds", type=int, default=20, help="每项重复次数")
+    args = parser.parse_args()
+    main(args.codes, args.rounds)
@@ -1,11 +1,9 @@
 import os
+import sys
+from pathlib import Path
 
 from google.adk.planners import BuiltInPlanner
-from google.adk.tools.mcp_tool.mcp_toolset import (
-    McpToolset,
-    StdioServerParameters,
-    StdioConnectionParams,
-)
+from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters
 from google.genai import types
 from veadk import Agent
 from veadk.auth.veauth.utils import get_credential_from_vefaas_iam
@@ -17,6 +15,9 @@ from agentkit.apps import AgentkitAgentServerApp
 # from veadk.knowledgebase.backends.in_memory_backend import InMemoryKnowledgeBackend
 # from veadk.configs.model_configs import EmbeddingModelConfig
 
+sys.path.append(str(Path(__file__).resolve().parent))
+from mcp_supervisor import warm_mcp_toolset  # noqa: E402
+
 env_dict = {
     "VOLCENGINE_ACCESS_KEY": os.getenv("VOLCENGINE_ACCESS_KEY"),
     "VOLCENGINE_SECRET_KEY": os.getenv("VOLCENGINE_SECRET_KEY"),
@@ -48,10 +49,11 @@ server_parameters = StdioServerParameters(
     env=env_dict,
 )
 
-ccapi_mcp_toolset = McpToolset(
-    connection_params=StdioConnectionParams(
-        server_params=server_parameters, timeout=180.0
-    ),
+# 首次启动时安装到本地 venv，之后在后台维持预热的 Server 进程（MCP_WARM_POOL_SIZE=0 关闭）
+ccapi_mcp_toolset = warm_mcp_toolset(
+    "ccapi",
+    server_parameters,
+    timeout=180.0,
     errlog=None,
 )
 
@@ -0,0 +1,434 @@
+"""
+stdio MCP Server 预热与托管
+
+通过 npx / uvx 启动的 MCP Server 每次冷启动都要解析、下载依赖包，`@latest` 还可能每次解析到不同版本。
+McpServerSupervisor 在独立的后台事件循环中：
+1. 首次启动时将 Server 安装到本地缓存目录并固定版本，之后直接执行已安装的入口；
+2. 维持少量已完成 initialize 握手的 Server 进程，定期 ping 健康检查，进程退出后自动重启；
+3. 通过 WarmMcpToolset 把就绪的会话交给 Agent，首次工具调用无需再等待进程启动。
+
+环境变量：
+- MCP_WARM_POOL_SIZE: 预热进程数，默认 2；设为 0 时退回 McpToolset 按需启动
+- MCP_HEALTH_INTERVAL: 健康检查间隔（秒），默认 15
+- MCP_SERVER_CACHE_DIR: 安装缓存目录，默认 ~/.cache/mcp-servers
+- MCP_SERVER_REFRESH: 设为 1 时重新解析版本并安装
+"""
+
+import asyncio
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from google.adk.tools.mcp_tool.mcp_toolset import (
+    McpToolset,
+    StdioConnectionParams,
+    StdioServerParameters,
+)
+from mcp import ClientSession
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("MCP_WARM_POOL_SIZE", "2"))
+HEALTH_INTERVAL = float(os.getenv("MCP_HEALTH_INTERVAL", "15"))
+CACHE_DIR = Path(
+    os.getenv("MCP_SERVER_CACHE_DIR", str(Path.home() / ".cache" / "mcp-servers"))
+)
+REFRESH = os.getenv("MCP_SERVER_REFRESH", "").lower() in ("1", "true")
+
+INSTALL_TIMEOUT = 600
+PING_TIMEOUT = 10
+
+
+# ---------------------------------------------------------------------------
+# 安装并固定版本
+# ---------------------------------------------------------------------------
+def _run(cmd: list[str]) -> str:
+    return subprocess.run(
+        cmd, check=True, capture_output=True, text=True, timeout=INSTALL_TIMEOUT
+    ).stdout
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", value)
+
+
+def _pin_npx(params: StdioServerParameters) -> StdioServerParameters:
+    """npx <pkg>[@tag] ... -> node <已安装包的 bin 入口> ..."""
+    args = list(params.args)
+    index = next(i for i, arg in enumerate(args) if not arg.startswith("-"))
+    spec, rest = args[index], args[index + 1 :]
+    name, _, tag = spec.rpartition("@")
+    if not name:
+        name, tag = spec, "latest"
+
+    npm_dir = CACHE_DIR / "npm"
+    npm_dir.mkdir(parents=True, exist_ok=True)
+    pin_file = npm_dir / f"{_safe_name(name)}.pinned"
+    version = None
+    if not REFRESH and pin_file.exists():
+        version = pin_file.read_text().strip()
+    if not version:
+        resolved = json.loads(
+            _run(["npm", "view", f"{name}@{tag}", "version", "--json"])
+        )
+        version = resolved[-1] if isinstance(resolved, list) else resolved
+
+    prefix = npm_dir / f"{_safe_name(name)}@{version}"
+    package_dir = prefix / "node_modules" / name
+    if not (package_dir / "package.json").exists():
+        logger.info(f"Installing MCP server {name}@{version} into {prefix}")
+        _run(
+            [
+                "npm",
+                "install",
+                "--prefix",
+                str(prefix),
+                "--no-audit",
+                "--no-fund",
+                f"{name}@{version}",
+            ]
+        )
+    pin_file.write_text(version)
+
+    bin_field = json.loads((package_dir / "package.json").read_text())["bin"]
+    if isinstance(bin_field, dict):
+        bin_field = bin_field.get(name.split("/")[-1]) or next(iter(bin_field.values()))
+    return params.model_copy(
+        update={"command": "node", "args": [str(package_dir / bin_field), *rest]}
+    )
+
+
+def _pin_uvx(params: StdioServerParameters) -> StdioServerParameters:
+    """uvx [--from <spec>] <command> ... -> <独立 venv>/bin/<command> ..."""
+    args = list(params.args)
+    if args[0] == "--from":
+        spec, command, rest = args[1], args[2], args[3:]
+    elif not args[0].startswith("-"):
+        spec, command, rest = args[0], args[0], args[1:]
+    else:
+        return params
+
+    digest = hashlib.sha256(spec.encode("utf-8")).hexdigest()[:12]
+    venv_dir = CACHE_DIR / "uv" / f"{_safe_name(command)}-{digest}"
+    executable = venv_dir / "bin" / command
+    if REFRESH or not executable.exists():
+        logger.info(f"Installing MCP server {spec} into {venv_dir}")
+        _run(["uv", "venv", "--allow-existing", str(venv_dir)])
+        _run(
+            ["uv", "pip", "install", "--python", str(venv_dir / "bin" / "python"), spec]
+        )
+    return params.model_copy(update={"command": str(executable), "args": rest})
+
+
+def pin_server(params: StdioServerParameters) -> StdioServerParameters:
+    """将 npx / uvx 启动参数替换为本地已安装的入口，失败时原样返回"""
+    pinners = {"npx": (_pin_npx, "npm"), "uvx": (_pin_uvx, "uv")}
+    pinner, tool = pinners.get(Path(params.command).name, (None, None))
+    if pinner is None or not params.args or shutil.which(tool) is None:
+        return params
+    try:
+        return pinner(params)
+    except Exception as e:
+        logger.warning(f"Failed to pre-install MCP server, using {params.command}: {e}")
+        return params
+
+
+# ---------------------------------------------------------------------------
+# 预热进程池
+# ---------------------------------------------------------------------------
+class _WarmServer:
+    def __init__(self, index: int):
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.dead = asyncio.Event()
+
+
+class _SessionProxy:
+    """把 ClientSession 的协程方法转发到 supervisor 的事件循环中执行"""
+
+    def __init__(self, supervisor: "McpServerSupervisor", server: _WarmServer):
+        self._supervisor = supervisor
+        self._server = server
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._server.session, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self._supervisor._call(self._server, name, args, kwargs)
+
+        return call
+
+
+class McpServerSupervisor:
+    """Keeps a small pool of initialized stdio MCP server processes warm."""
+
+    def __init__(
+        self,
+        name: str,
+        server_params: StdioServerParameters,
+        timeout: float = 5.0,
+        errlog: Optional[TextIO] = sys.stderr,
+        pool_size: int = POOL_SIZE,
+        health_interval: float = HEALTH_INTERVAL,
+    ):
+        self.name = name
+        self.server_params = server_params
+        self.timeout = timeout
+        self.errlog = errlog
+        self.pool_size = max(pool_size, 1)
+        self.health_interval = health_interval
+
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._servers: list[_WarmServer] = []
+        self._round_robin = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._main_future = None
+        self._stop: Optional[asyncio.Event] = None
+
+        self._spawns = 0
+        self._restarts = 0
+        self._calls = 0
+        self._errors = 0
+        self._spawn_ms: deque[float] = deque(maxlen=100)
+        self._handshake_ms: deque[float] = deque(maxlen=100)
+        self._call_ms: deque[float] = deque(maxlen=1000)
+
+    def start(self) -> "McpServerSupervisor":
+        with self._lock:
+            if self._thread is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name=f"mcp-supervisor-{self.name}",
+                    daemon=True,
+                )
+                self._thread.start()
+                self._main_future = asyncio.run_coroutine_threadsafe(
+                    self._main(), self._loop
+                )
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(lambda: self._stop and self._stop.set())
+        try:
+            self._main_future.result(timeout)
+        except Exception as e:
+            logger.warning(f"[mcp:{self.name}] supervisor stop: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    async def _main(self):
+        self._stop = asyncio.Event()
+        self._params = await asyncio.to_thread(pin_server, self.server_params)
+        slots = [
+            asyncio.create_task(self._keep_alive(index))
+            for index in range(self.pool_size)
+        ]
+        await self._stop.wait()
+        for slot in slots:
+            slot.cancel()
+        await asyncio.gather(*slots, return_exceptions=True)
+
+    async def _keep_alive(self, index: int):
+        """维持一个槽位上的 Server 进程，退出或健康检查失败后按指数退避重启"""
+        delay = 1.0
+        while True:
+            server = _WarmServer(index)
+            started = time.monotonic()
+            try:
+                await self._serve(server)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[mcp:{self.name}#{index}] server exited: {e!r}")
+            finally:
+                self._remove(server)
+            if time.monotonic() - started > 60:
+                delay = 1.0
+            self._restarts += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _serve(self, server: _WarmServer):
+        spawn_start = time.perf_counter()
+        async with stdio_client(self._params, errlog=self.errlog) as (read, write):
+            handshake_start = time.perf_counter()
+            async with ClientSession(
+                read, write, read_timeout_seconds=timedelta(seconds=self.timeout)
+            ) as session:
+                await session.initialize()
+                spawn_ms = (handshake_start - spawn_start) * 1000
+                handshake_ms = (time.perf_counter() - handshake_start) * 1000
+                self._spawns += 1
+                self._spawn_ms.append(spawn_ms)
+                self._handshake_ms.append(handshake_ms)
+                logger.info(
+                    f"[mcp:{self.name}#{server.index}] ready: "
+                    f"spawn {spawn_ms:.0f} ms, handshake {handshake_ms:.0f} ms"
+                )
+
+                server.session = session
+                self._add(server)
+                while True:
+                    try:
+                        await asyncio.wait_for(
+                            server.dead.wait(), timeout=self.health_interval
+                        )
+                        raise RuntimeError("connection failed during a call")
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(session.send_ping(), PING_TIMEOUT)
+
+    def _add(self, server: _WarmServer):
+        with self._lock:
+            self._servers.append(server)
+            self._ready.set()
+
+    def _remove(self, server: _WarmServer):
+        with self._lock:
+            if server in self._servers:
+                self._servers.remove(server)
+            if not self._servers:
+                self._ready.clear()
+
+    def _pick(self) -> Optional[_WarmServer]:
+        with self._lock:
+            if not self._servers:
+                return None
+            return self._servers[next(self._round_robin) % len(self._servers)]
+
+    async def acquire(self, timeout: Optional[float] = None) -> _SessionProxy:
+        """返回一个就绪 Server 的会话（轮询分配），池中暂无就绪进程时等待"""
+        self.start()
+        server = self._pick()
+        if server is None:
+            wait = self.timeout if timeout is None else timeout
+            await asyncio.to_thread(self._ready.wait, wait)
+            server = self._pick()
+            if server is None:
+                raise TimeoutError(f"MCP server {self.name} not ready after {wait}s")
+        return _SessionProxy(self, server)
+
+    async def _call(self, server: _WarmServer, method: str, args, kwargs) -> Any:
+        future = asyncio.run_coroutine_threadsafe(
+            getattr(server.session, method)(*args, **kwargs), self._loop
+        )
+        start = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(future)
+        except McpError:
+            # 协议层错误（工具报错、超时）不代表进程异常
+            self._errors += 1
+            raise
+        except Exception:
+            self._errors += 1
+            self._remove(server)
+            self._loop.call_soon_threadsafe(server.dead.set)
+            raise
+        finally:
+            if method == "call_tool":
+                self._calls += 1
+                self._call_ms.append((time.perf_counter() - start) * 1000)
+
+    def stats(self) -> dict:
+        def percentile(values, p):
+            ordered = sorted(values)
+            if not ordered:
+                return None
+            return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 1)
+
+        with self._lock:
+            ready = len(self._servers)
+        return {
+            "name": self.name,
+            "pool_size": self.pool_size,
+            "ready": ready,
+            "spawns": self._spawns,
+            "restarts": self._restarts,
+            "last_spawn_ms": self._spawn_ms[-1] if self._spawn_ms else None,
+            "last_handshake_ms": (
+                self._handshake_ms[-1] if self._handshake_ms else None
+            ),
+            "calls": self._calls,
+            "errors": self._errors,
+            "call_p50_ms": percentile(self._call_ms, 0.5),
+            "call_p95_ms": percentile(self._call_ms, 0.95),
+        }
+
+
+class _WarmSessionManager:
+    """替代 MCPSessionManager：会话来自 supervisor 的预热进程池"""
+
+    def __init__(self, supervisor: McpServerSupervisor):
+        self._supervisor = supervisor
+
+    async def create_session(self, headers=None, *args, **kwargs) -> _SessionProxy:
+        return await self._supervisor.acquire()
+
+    async def close(self):
+        # 进程由 supervisor 托管，随进程生命周期存在
+        return None
+
+
+class WarmMcpToolset(McpToolset):
+    """McpToolset whose sessions are served by a McpServerSupervisor."""
+
+    def __init__(self, *, supervisor: McpServerSupervisor, **kwargs):
+        super().__init__(
+            connection_params=StdioConnectionParams(
+                server_params=supervisor.server_params, timeout=supervisor.timeout
+            ),
+            **kwargs,
+        )
+        self.supervisor = supervisor
+        self._mcp_session_manager = _WarmSessionManager(supervisor)
+
+
+def warm_mcp_toolset(
+    name: str,
+    server_params: StdioServerParameters,
+    timeout: float = 5.0,
+    pool_size: int = POOL_SIZE,
+    **toolset_kwargs,
+) -> McpToolset:
+    """
+    创建使用预热进程池的 McpToolset，并立即在后台安装、启动 Server
+
+    MCP_WARM_POOL_SIZE=0 时返回普通的 McpToolset（每次按需冷启动）。
+    """
+    if pool_size <= 0:
+        return McpToolset(
+            connection_params=StdioConnectionParams(
+                server_params=server_params, timeout=timeout
+            ),
+            **toolset_kwargs,
+        )
+    supervisor = McpServerSupervisor(
+        name,
+        server_params,
+        timeout=timeout,
+        errlog=toolset_kwargs.get("errlog", sys.stderr),
+        pool_size=pool_size,
+    ).start()
+    return WarmMcpToolset(supervisor=supervisor, **toolset_kwargs)
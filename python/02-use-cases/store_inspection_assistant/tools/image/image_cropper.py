@@ -11,14 +11,17 @@ where the four numbers represent: x1 y1 x2 y2 (top-left and bottom-right coordin
 
 import logging
 import re
-import requests
 import sys
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from PIL import Image
-from tools.tos_upload import upload_file_to_tos
+from tools.image.image_ops import crop_regions, parse_bboxes, upload_images
 
 logger = logging.getLogger(__name__)
 
+_upload_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="crop-upload")
+
 
 def parse_bbox(bbox_string):
     """
@@ -66,54 +69,50 @@ def crop_image_by_bbox(image_url: str, bbox_coords: str) -> tuple[str, str]:
     """
     # If bbox_coords is a string, parse it first
     if isinstance(bbox_coords, str):
-        x1, y1, x2, y2 = parse_bbox(bbox_coords)
+        bbox = parse_bbox(bbox_coords)
     else:
-        x1, y1, x2, y2 = bbox_coords
-    # Download image from URL
-    response = requests.get(image_url)
-    image_path = "temp_image.png"
-
-    with open(image_path, "wb") as f:
-        f.write(response.content)
-
-    logger.debug(f"Cropping image: {image_path}, bbox: ({x1}, {y1}, {x2}, {y2})")
-    # Open image
-    with Image.open(image_path) as img:
-        # Check if coordinates are within image bounds
-        w, h = img.size
-
-        # Check if coordinates are within image bounds
-        x1 = int(x1 * w / 1000)
-        y1 = int(y1 * h / 1000)
-        x2 = int(x2 * w / 1000)
-        y2 = int(y2 * h / 1000)
-
-        if x1 >= x2 or y1 >= y2:
-            raise ValueError(f"Invalid crop area: ({x1}, {y1}, {x2}, {y2})")
-
-        # Crop image
-        cropped_img = img.crop((x1, y1, x2, y2))
-
-        # Generate output path
-        # if output_path is None:
-        input_path = Path(image_path)
-        output_path = (
-            input_path.parent / f"{input_path.stem}_cropped{input_path.suffix}"
-        )
-        # Save cropped image
-        cropped_img.save(output_path)
-
-        print("Image cropping completed!")
-        print(f"Input image: {image_path}")
-        print(f"Crop area: ({x1}, {y1}, {x2}, {y2})")
-        print(f"Output image: {output_path}")
-        print(f"Crop size: {x2 - x1} x {y2 - y1}")
-
-        # Upload cropped image to TOS
-        cropped_url = upload_file_to_tos(output_path)
-        logger.info(f"cropped image tos url {cropped_url}")
-
-        return str(output_path), cropped_url
+        bbox = tuple(bbox_coords)
+
+    logger.debug(f"Cropping image: {image_url}, bbox: {bbox}")
+    # The source image is downloaded and decoded once and cached in memory
+    (cropped_img,) = crop_regions(image_url, [bbox])
+
+    # Upload from memory while the crop is written to a per-call path
+    upload_future = _upload_executor.submit(upload_images, [cropped_img], "cropped")
+    output_path = Path(tempfile.gettempdir()) / f"{uuid.uuid4().hex[:8]}_cropped.png"
+    cropped_img.save(output_path)
+
+    print("Image cropping completed!")
+    print(f"Input image: {image_url}")
+    print(f"Crop area: {bbox}")
+    print(f"Output image: {output_path}")
+    print(f"Crop size: {cropped_img.width} x {cropped_img.height}")
+
+    (cropped_url,) = upload_future.result()
+    logger.info(f"cropped image tos url {cropped_url}")
+
+    return str(output_path), cropped_url
+
+
+def crop_image_by_bboxes(image_url: str, bbox_coords: str) -> list[str]:
+    """
+    Crop several regions out of one image in a single call
+
+    Args:
+        image_url: URL of input image
+        bbox_coords: String containing one or more "<bbox>X X X X</bbox>"
+
+    Returns:
+        list[str]: TOS URLs of the cropped images, in the same order as the bboxes
+    """
+    bboxes = parse_bboxes(bbox_coords)
+    if not bboxes:
+        raise ValueError(f"Cannot parse bbox format: {bbox_coords}")
+
+    crops = crop_regions(image_url, bboxes)
+    urls = upload_images(crops, "cropped")
+    logger.info(f"Cropped {len(crops)} regions from {image_url}")
+    return urls
 
 
 def main():
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 import logging
-from tools.tos_upload import upload_file_to_tos
+from tools.image.image_ops import annotate, parse_bboxes, upload_images
 
 logger = logging.getLogger(__name__)
 
@@ -30,13 +30,10 @@ def draw_bboxes_on_image(
     Returns:
         str: Path to output image with bounding boxes drawn
     """
-    import re
-    from PIL import Image, ImageDraw
     from pathlib import Path
 
     # Parse all bbox coordinates
-    bbox_pattern = r"<bbox>(\d+)\s+(\d+)\s+(\d+)\s+(\d+)</bbox>"
-    bboxes = re.findall(bbox_pattern, detection_result)
+    bboxes = parse_bboxes(detection_result)
 
     if not bboxes:
         logger.warning(
@@ -44,56 +41,21 @@ def draw_bboxes_on_image(
         )
         return cropped_image_path
 
-    # Open image
-    with Image.open(cropped_image_path) as img:
-        # Create drawing object
-        draw = ImageDraw.Draw(img)
+    # Draw on an in-memory copy of the (cached) source image
+    img = annotate(cropped_image_path, bboxes, box_color="red", box_width=2)
 
-        w, h = img.size
-
-        # Set box selection style
-        box_color = "red"
-        box_width = 2
-
-        # Draw each bbox
-        for bbox in bboxes:
-            x1, y1, x2, y2 = map(int, bbox)
-
-            x1 = int(x1 * w / 1000)
-            y1 = int(y1 * h / 1000)
-            x2 = int(x2 * w / 1000)
-            y2 = int(y2 * h / 1000)
-
-            # Ensure coordinates are in correct order
-            if x1 > x2:
-                x1, x2 = x2, x1
-            if y1 > y2:
-                y1, y2 = y2, y1
-            print(x1, y1, x2, y2)
-            # Draw rectangle box
-            draw.rectangle([x1, y1, x2, y2], outline=box_color, width=box_width)
-
-            # # Add small label at top-left corner of box
-            # label_y = max(0, y1 - 20)  # Ensure label doesn't go above image top
-            # draw.rectangle([x1, label_y, x1 + 40, label_y + 15], fill=box_color)
-            # draw.text([x1 + 2, label_y + 2], "Text", fill="white")
-
-        # Generate output path if not provided
-        if output_path is None:
-            input_path = Path(cropped_image_path)
-            output_path = (
-                input_path.parent / f"{input_path.stem}_with_boxes{input_path.suffix}"
-            )
-
-        # Save image with bounding boxes drawn
-        img.save(output_path)
-
-        logger.info(
-            f"Drawn {len(bboxes)} bounding boxes on image, saved to: {output_path}"
+    # Generate output path if not provided
+    if output_path is None:
+        input_path = Path(cropped_image_path)
+        output_path = (
+            input_path.parent / f"{input_path.stem}_with_boxes{input_path.suffix}"
         )
 
-        # Upload to tos and return url
-        box_marked_url = upload_file_to_tos(output_path)
-        logger.info(f"Box marked image tos url {box_marked_url}")
+    # Upload from memory while the annotated image is saved locally
+    (box_marked_url,) = upload_images([img], "with_boxes")
+    img.save(output_path)
+
+    logger.info(f"Drawn {len(bboxes)} bounding boxes on image, saved to: {output_path}")
+    logger.info(f"Box marked image tos url {box_marked_url}")
 
-        return str(output_path), box_marked_url
+    return str(output_path), box_marked_url
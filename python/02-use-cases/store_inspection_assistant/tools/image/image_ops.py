@@ -0,0 +1,154 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-memory image operations
+
+Keeps a small LRU of decoded source images keyed by URL (or local path), so
+several crops and annotations of the same photo only download and decode it
+once. Crops and annotated images are encoded in memory and uploaded to TOS in
+parallel, without touching a shared file in the working directory.
+"""
+
+import io
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from PIL import Image, ImageDraw
+from tools.tos_upload import upload_bytes_to_tos
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_OPS_CACHE_SIZE", "8"))
+UPLOAD_WORKERS = int(os.getenv("IMAGE_OPS_UPLOAD_WORKERS", "8"))
+
+BBOX_PATTERN = re.compile(r"<bbox>(\d+),?\s*(\d+),?\s*(\d+),?\s*(\d+)</bbox>")
+
+_cache: OrderedDict[str, Image.Image] = OrderedDict()
+_cache_lock = threading.Lock()
+_session = requests.Session()
+_upload_executor = ThreadPoolExecutor(
+    max_workers=UPLOAD_WORKERS, thread_name_prefix="image-ops-upload"
+)
+
+
+def parse_bboxes(detection_result: str) -> list[tuple[int, int, int, int]]:
+    """Extract every <bbox>x1 y1 x2 y2</bbox> (0-1000 normalized) from a string."""
+    bboxes = []
+    for match in BBOX_PATTERN.finditer(detection_result or ""):
+        x1, y1, x2, y2 = map(int, match.groups())
+        bboxes.append((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+    return bboxes
+
+
+def load_image(source: str) -> Image.Image:
+    """
+    Return the decoded image for a URL or local path, served from the LRU when possible.
+
+    The returned image is shared and must not be modified in place; copy it first.
+    """
+    with _cache_lock:
+        image = _cache.get(source)
+        if image is not None:
+            _cache.move_to_end(source)
+            return image
+
+    if source.startswith(("http://", "https://")):
+        response = _session.get(source, timeout=60)
+        response.raise_for_status()
+        data = response.content
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+
+    with Image.open(io.BytesIO(data)) as img:
+        image = img.convert("RGB")
+    logger.debug(f"Decoded image {source}, size: {image.size}")
+
+    with _cache_lock:
+        _cache[source] = image
+        _cache.move_to_end(source)
+        while len(_cache) > IMAGE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return image
+
+
+def to_pixel_box(
+    bbox: tuple[int, int, int, int], size: tuple[int, int]
+) -> tuple[int, int, int, int]:
+    w, h = size
+    x1, y1, x2, y2 = bbox
+    return (
+        int(x1 * w / 1000),
+        int(y1 * h / 1000),
+        int(x2 * w / 1000),
+        int(y2 * h / 1000),
+    )
+
+
+def crop_regions(
+    source: str, bboxes: list[tuple[int, int, int, int]]
+) -> list[Image.Image]:
+    """Crop several normalized bboxes out of one source image."""
+    image = load_image(source)
+    crops = []
+    for bbox in bboxes:
+        box = to_pixel_box(bbox, image.size)
+        if box[0] >= box[2] or box[1] >= box[3]:
+            raise ValueError(f"Invalid crop area: {box}")
+        crops.append(image.crop(box))
+    return crops
+
+
+def annotate(
+    source: str,
+    bboxes: list[tuple[int, int, int, int]],
+    box_color: str = "red",
+    box_width: int = 2,
+) -> Image.Image:
+    """Draw normalized bboxes on a copy of the source image."""
+    image = load_image(source).copy()
+    draw = ImageDraw.Draw(image)
+    for bbox in bboxes:
+        draw.rectangle(
+            to_pixel_box(bbox, image.size), outline=box_color, width=box_width
+        )
+    return image
+
+
+def encode_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def upload_images(images: list[Image.Image], prefix: str) -> list[Optional[str]]:
+    """Encode and upload images to TOS in parallel, preserving order."""
+    batch_id = uuid.uuid4().hex[:8]
+
+    def _upload(index: int, image: Image.Image) -> Optional[str]:
+        return upload_bytes_to_tos(
+            encode_png(image), f"{prefix}_{batch_id}_{index}.png"
+        )
+
+    futures = [
+        _upload_executor.submit(_upload, i, image) for i, image in enumerate(images)
+    ]
+    return [future.result() for future in futures]
@@ -0,0 +1,314 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Store inspection pipeline
+
+Loads a store photo once and runs the independent inspection checks
+(signboard, shelf, sink, attire) concurrently through a shared AsyncArk client.
+The signboard check keeps its crop in memory so that character detection and
+LED analysis can run in parallel on the same image data.
+"""
+
+import asyncio
+import base64
+import io
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from PIL import Image
+from tools.image.attire_inspection import (
+    attire_inspection_wearing_detection_tool_prompt,
+)
+from tools.image.image_cropper import parse_bbox
+from tools.image.shelf_inspection import shelf_display_detection_tool_prompt
+from tools.image.signboard_inspection import (
+    LED_STATUS_ANALYSIS_PROMPT,
+    SIGNBOARD_CHAR_DETECTION_PROMPT,
+    SIGNBOARD_DETECTION_PROMPT,
+)
+from tools.image.sink_inspection import sink_debris_detection_tool_prompt
+from tools.model_auth import get_ark_api_key, get_base_url
+from volcenginesdkarkruntime import AsyncArk
+
+logger = logging.getLogger(__name__)
+
+VISION_MODEL = "seed-1-6-250915"
+ALL_CHECKS = ("signboard", "shelf", "sink", "attire")
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("INSPECTION_BATCH_CONCURRENCY", "4"))
+
+_BBOX_PATTERN = re.compile(r"<bbox>\d+,?\s*\d+,?\s*\d+,?\s*\d+</bbox>")
+
+async_client = AsyncArk(
+    api_key=get_ark_api_key(),
+    base_url=get_base_url(),
+    timeout=1800,
+)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=60, follow_redirects=True)
+    return _http_client
+
+
+def _to_data_url(data: bytes, mime: str = "image/png") -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+def _encode_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@dataclass
+class InspectionImage:
+    """A store photo loaded once and shared by every check of the pipeline."""
+
+    source: str
+    _raw: Optional[bytes] = None
+    _decoded: Optional[Image.Image] = None
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def is_remote(self) -> bool:
+        return self.source.startswith(("http://", "https://"))
+
+    async def raw(self) -> bytes:
+        async with self._lock:
+            if self._raw is None:
+                if self.is_remote:
+                    response = await _get_http_client().get(self.source)
+                    response.raise_for_status()
+                    self._raw = response.content
+                else:
+                    self._raw = await asyncio.to_thread(Path(self.source).read_bytes)
+            return self._raw
+
+    async def decoded(self) -> Image.Image:
+        if self._decoded is None:
+            data = await self.raw()
+
+            def _decode() -> Image.Image:
+                with Image.open(io.BytesIO(data)) as img:
+                    return img.convert("RGB")
+
+            self._decoded = await asyncio.to_thread(_decode)
+        return self._decoded
+
+    async def model_url(self) -> str:
+        """URL handed to the vision model; remote images are fetched by the model itself."""
+        if self.is_remote:
+            return self.source
+        suffix = Path(self.source).suffix.lower().lstrip(".") or "png"
+        mime = "image/jpeg" if suffix in ("jpg", "jpeg") else f"image/{suffix}"
+        return _to_data_url(await self.raw(), mime)
+
+
+async def _vision_call(image_url: str, prompt: str, **kwargs) -> str:
+    response = await async_client.chat.completions.create(
+        model=VISION_MODEL,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": image_url, "detail": "high"},
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        ],
+        **kwargs,
+    )
+    return response.choices[0].message.content
+
+
+async def _reasoning_check(image: InspectionImage, prompt: str) -> str:
+    return await _vision_call(
+        await image.model_url(),
+        prompt,
+        thinking={"typed": "enabled"},
+        reasoning_effort="high",
+    )
+
+
+async def _signboard_check(image: InspectionImage) -> dict:
+    # Detection and decoding do not depend on each other, so overlap them
+    detection, decoded = await asyncio.gather(
+        _vision_call(await image.model_url(), SIGNBOARD_DETECTION_PROMPT),
+        image.decoded(),
+    )
+    match = _BBOX_PATTERN.search(detection or "")
+    if not match:
+        return {"bbox": None, "detection": detection}
+
+    x1, y1, x2, y2 = parse_bbox(match.group(0))
+    w, h = decoded.size
+    box = (
+        int(x1 * w / 1000),
+        int(y1 * h / 1000),
+        int(x2 * w / 1000),
+        int(y2 * h / 1000),
+    )
+    if box[0] >= box[2] or box[1] >= box[3]:
+        raise ValueError(f"Invalid crop area: {box}")
+
+    crop_url = _to_data_url(
+        await asyncio.to_thread(lambda: _encode_png(decoded.crop(box)))
+    )
+    # Character detection and LED analysis share the in-memory crop
+    char_result, led_result = await asyncio.gather(
+        _vision_call(
+            crop_url, SIGNBOARD_CHAR_DETECTION_PROMPT, temperature=0.1, top_p=0.1
+        ),
+        _vision_call(
+            crop_url,
+            LED_STATUS_ANALYSIS_PROMPT,
+            thinking={"typed": "enabled"},
+            reasoning_effort="high",
+        ),
+    )
+    return {
+        "bbox": match.group(0),
+        "char_detection": char_result,
+        "led_status": led_result,
+    }
+
+
+_CHECKS = {
+    "signboard": _signboard_check,
+    "shelf": lambda image: _reasoning_check(image, shelf_display_detection_tool_prompt),
+    "sink": lambda image: _reasoning_check(image, sink_debris_detection_tool_prompt),
+    "attire": lambda image: _reasoning_check(
+        image, attire_inspection_wearing_detection_tool_prompt
+    ),
+}
+
+
+async def _run_check(name: str, image: InspectionImage) -> dict:
+    start = time.perf_counter()
+    try:
+        result = await _CHECKS[name](image)
+        status = "success"
+    except Exception as e:
+        logger.error(f"Inspection check {name} failed for {image.source}: {e}")
+        result, status = str(e), "error"
+    return {
+        "status": status,
+        "result": result,
+        "elapsed_seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def _normalize_checks(checks: Optional[list[str]]) -> list[str]:
+    if not checks:
+        return list(ALL_CHECKS)
+    unknown = [c for c in checks if c not in _CHECKS]
+    if unknown:
+        raise ValueError(
+            f"Unknown inspection checks: {unknown}, supported: {ALL_CHECKS}"
+        )
+    return list(dict.fromkeys(checks))
+
+
+async def _inspect(source: str, checks: list[str]) -> dict:
+    image = InspectionImage(source)
+    results = await asyncio.gather(*(_run_check(name, image) for name in checks))
+    return {"image": source, "checks": dict(zip(checks, results))}
+
+
+async def inspect_store_photo(
+    image_url: str, checks: Optional[list[str]] = None
+) -> str:
+    """
+    Run several store inspection checks on one photo concurrently
+
+    Args:
+        image_url (str): Store photo URL or local path
+        checks (list[str]): Checks to run, any of "signboard", "shelf", "sink", "attire". Defaults to all.
+    Returns:
+        str: JSON string with the result, status and elapsed time of every check
+    """
+    logger.debug(f"Running inspect_store_photo with image_url: {image_url}")
+    result = await _inspect(image_url, _normalize_checks(checks))
+    return json.dumps(result, ensure_ascii=False)
+
+
+def _expand_sources(sources: list[str] | str) -> list[str]:
+    if isinstance(sources, str):
+        sources = [sources]
+    expanded = []
+    for source in sources:
+        path = Path(source)
+        if not source.startswith(("http://", "https://")) and path.is_dir():
+            expanded.extend(
+                str(p)
+                for p in sorted(path.iterdir())
+                if p.suffix.lower() in IMAGE_SUFFIXES
+            )
+        else:
+            expanded.append(source)
+    return expanded
+
+
+async def batch_inspect_store_photos(
+    sources: list[str],
+    checks: Optional[list[str]] = None,
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+) -> str:
+    """
+    Inspect many store photos with bounded concurrency
+
+    Args:
+        sources (list[str]): Store photo URLs, local paths or directories containing photos
+        checks (list[str]): Checks to run on every photo, any of "signboard", "shelf", "sink", "attire". Defaults to all.
+        max_concurrency (int): Maximum number of photos processed at the same time
+    Returns:
+        str: JSON string with per-photo results and a summary
+    """
+    check_names = _normalize_checks(checks)
+    photos = _expand_sources(sources)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _bounded(source: str) -> dict:
+        async with semaphore:
+            return await _inspect(source, check_names)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_bounded(p) for p in photos))
+    failed = sum(
+        1
+        for photo in results
+        for check in photo["checks"].values()
+        if check["status"] != "success"
+    )
+    summary = {
+        "photos": len(photos),
+        "checks": len(photos) * len(check_names),
+        "failed_checks": failed,
+        "elapsed_seconds": round(time.perf_counter() - start, 2),
+    }
+    return json.dumps({"summary": summary, "results": results}, ensure_ascii=False)
@@ -26,6 +26,10 @@ client = Ark(
     timeout=1800,
 )
 
+SIGNBOARD_DETECTION_PROMPT = "Please select the complete signboard area in the image, including the logo and the English and Chinese name. Try to remove any irrelevant areas as much as possible. Represent the selected area in the form of <bbox>x1 y1 x2 y2</bbox>. Note to ensure the integrity of the logo and text."
+SIGNBOARD_CHAR_DETECTION_PROMPT = "Please select each character in the image and output it using a bounding box. Each Chinese and English character should be selected separately and represented in the form of <bbox>x1 y1 x2 y2</bbox>."
+LED_STATUS_ANALYSIS_PROMPT = "You are a professional signboard image analysis expert, specializing in text detection and LED illumination status analysis of store signboard images. Based on the information in the given image URL, please perform the following analysis: 1. Detect all text and logo in the image. 2. If every character and logo is present, determine if each character is normally illuminated without obvious dark areas."
+
 
 def signboard_detection_tool(picture_url: str) -> str:
     """
@@ -46,7 +50,7 @@ def signboard_detection_tool(picture_url: str) -> str:
                 "content": [
                     {
                         "type": "text",
-                        "text": f"Please select the complete signboard area in the image, including the logo and the English and Chinese name. Try to remove any irrelevant areas as much as possible. Represent the selected area in the form of <bbox>x1 y1 x2 y2</bbox>. Note to ensure the integrity of the logo and text. url: {picture_url}",
+                        "text": f"{SIGNBOARD_DETECTION_PROMPT} url: {picture_url}",
                     },
                 ],
             }
@@ -86,7 +90,7 @@ def signboard_char_detection_tool(cropped_image_path: str) -> str:
                     },
                     {
                         "type": "text",
-                        "text": "Please select each character in the image and output it using a bounding box. Each Chinese and English character should be selected separately and represented in the form of <bbox>x1 y1 x2 y2</bbox>.",
+                        "text": SIGNBOARD_CHAR_DETECTION_PROMPT,
                     },
                 ],
             }
@@ -139,7 +143,7 @@ def led_status_analysis_tool(cropped_image_path: str) -> str:
                     # {"type": "text", "text": "You are a professional LED light status analysis agent. Please carefully check the cropped image, step by step, to check whether there are any problems with the LED light status in the signboard. Please check carefully and output the parts with problems."},
                     {
                         "type": "text",
-                        "text": "You are a professional signboard image analysis expert, specializing in text detection and LED illumination status analysis of store signboard images. Based on the information in the given image URL, please perform the following analysis: 1. Detect all text and logo in the image. 2. If every character and logo is present, determine if each character is normally illuminated without obvious dark areas.",
+                        "text": LED_STATUS_ANALYSIS_PROMPT,
                     },
                 ],
             }
@@ -20,7 +20,7 @@ Implemented using the tos library directly
 import logging
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 
 import tos
 from tos import HttpMethodType
@@ -73,6 +73,70 @@ def upload_file_to_tos(
         https://bucket.tos-cn-beijing.volces.com/video.mp4?X-Tos-Signature=...
     """
 
+    # Check if file exists
+    if not os.path.exists(file_path):
+        logger.info(f"Error: File does not exist: {file_path}")
+        return None
+
+    if not os.path.isfile(file_path):
+        logger.info(f"Error: Path is not a file: {file_path}")
+        return None
+
+    return _upload_to_tos(
+        lambda client, bucket, key: client.put_object_from_file(
+            bucket=bucket, key=key, file_path=file_path
+        ),
+        filename=os.path.basename(file_path),
+        bucket_name=bucket_name,
+        object_key=object_key,
+        region=region,
+        expires=expires,
+    )
+
+
+def upload_bytes_to_tos(
+    data: bytes,
+    filename: str,
+    bucket_name: Optional[str] = None,
+    object_key: Optional[str] = None,
+    region: Optional[str] = None,
+    expires: int = 604800,  # 7-day validity
+) -> Optional[str]:
+    """
+    Upload in-memory content to TOS object storage and return a signed accessible URL
+
+    Args:
+        data: Content to upload
+        filename: File name used to build the object key when object_key is empty
+        bucket_name: TOS bucket name, defaults to DATABASE_TOS_BUCKET
+        object_key: Object storage key name; if empty, derived from filename
+        region: TOS region, defaults to cn-beijing
+        expires: Signed URL validity period (seconds), defaults to 7 days (604800 seconds)
+
+    Returns:
+        str: Signed TOS URL that can be accessed directly
+        None: Returns None if upload fails
+    """
+    return _upload_to_tos(
+        lambda client, bucket, key: client.put_object(
+            bucket=bucket, key=key, content=data
+        ),
+        filename=filename,
+        bucket_name=bucket_name,
+        object_key=object_key,
+        region=region,
+        expires=expires,
+    )
+
+
+def _upload_to_tos(
+    put: Callable,
+    filename: str,
+    bucket_name: Optional[str],
+    object_key: Optional[str],
+    region: Optional[str],
+    expires: int,
+) -> Optional[str]:
     if bucket_name is None:
         bucket_name = os.getenv("DATABASE_TOS_BUCKET")
         if bucket_name is None:
@@ -92,15 +156,6 @@ def upload_file_to_tos(
         else:
             logger.info(f"Using region from env: {region}")
 
-    # Check if file exists
-    if not os.path.exists(file_path):
-        logger.info(f"Error: File does not exist: {file_path}")
-        return None
-
-    if not os.path.isfile(file_path):
-        logger.info(f"Error: Path is not a file: {file_path}")
-        return None
-
     # Retrieve STS from IAM Role
     access_key = os.getenv("VOLCENGINE_ACCESS_KEY")
     secret_key = os.getenv("VOLCENGINE_SECRET_KEY")
@@ -123,7 +178,6 @@ def upload_file_to_tos(
     if not object_key:
         # Combine timestamp and original filename to avoid overwriting
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.basename(file_path)
         object_key = f"upload/{timestamp}_{filename}"
 
     # Create TOS client
@@ -139,7 +193,7 @@ def upload_file_to_tos(
             region=region,
         )
 
-        logger.info(f"Starting file upload: {file_path}")
+        logger.info(f"Starting file upload: {filename}")
         logger.info(f"Target Bucket: {bucket_name}")
         logger.info(f"Object Key: {object_key}")
 
@@ -154,9 +208,7 @@ def upload_file_to_tos(
                 raise e
 
         # Upload file
-        result = client.put_object_from_file(
-            bucket=bucket_name, key=object_key, file_path=file_path
-        )
+        result = put(client, bucket_name, object_key)
 
         logger.info("File uploaded successfully!")
         logger.info(f"ETag: {result.etag}")
@@ -27,6 +27,7 @@ from .sub_agents.report_generator_agent.direct_output_callback import (
     direct_output_callback,
 )
 from .hook.format_hook import soft_fix_hook_output
+from .tools.run_breakdown_pipeline import run_breakdown_pipeline
 from .tools.process_video import process_video
 from .tools.analyze_segments_vision import analyze_segments_vision
 from .tools.analyze_bgm import analyze_bgm
@@ -100,6 +101,7 @@ def create_breakdown_agent() -> Agent:
         ),
         instruction=BREAKDOWN_AGENT_INSTRUCTION,
         tools=[
+            run_breakdown_pipeline,
             process_video,
             analyze_segments_vision,
             analyze_bgm,
@@ -3,14 +3,19 @@
 
 目标：
 1. 仅在检测到执行过程/JSON 外泄时触发；
-2. 使用 LLM 将输出重写为用户可读 Markdown；
+2. 先做确定性清洗（去除工具 envelope、占位标记，修复代码块），仍不合格再用 LLM 重写为用户可读 Markdown；
 3. 不干预工具调用 envelope，避免破坏编排。
+
+LLM 修复走异步共享连接池，并按内容哈希缓存修复结果，不会阻塞事件循环。
 """
 
 from __future__ import annotations
 
+import hashlib
 import os
 import json
+import re
+from collections import OrderedDict
 from typing import Optional
 
 import httpx
@@ -21,6 +26,36 @@ from veadk.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_REPAIR_CACHE_SIZE = int(os.getenv("FINAL_OUTPUT_REPAIR_CACHE_SIZE", "256"))
+_REPAIR_TIMEOUT = float(os.getenv("FINAL_OUTPUT_REPAIR_TIMEOUT", "30"))
+
+_PLACEHOLDER_RE = re.compile(r"<\[PLHD[^\]]*\]>")
+_EMPTY_FENCE_RE = re.compile(r"```[\w-]*\s*```")
+
+_repair_cache: OrderedDict[str, str] = OrderedDict()
+_client: Optional[httpx.AsyncClient] = None
+
+# 各修复路径的命中次数
+_repair_stats = {
+    "passthrough": 0,
+    "deterministic": 0,
+    "cache_hit": 0,
+    "llm": 0,
+    "llm_failed": 0,
+}
+
+
+def get_repair_stats() -> dict:
+    """返回各修复路径的命中计数（副本）"""
+    return dict(_repair_stats)
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=_REPAIR_TIMEOUT)
+    return _client
+
 
 def _get_first_text(llm_response: LlmResponse) -> str:
     if not llm_response or not llm_response.content or not llm_response.content.parts:
@@ -100,7 +135,49 @@ def _needs_llm_repair(text: str) -> bool:
     return False
 
 
-def _call_repair_llm(raw_text: str) -> Optional[str]:
+def _is_envelope_payload(payload) -> bool:
+    return isinstance(payload, dict) and (
+        ("name" in payload and "parameters" in payload) or "agent_name" in payload
+    )
+
+
+def _strip_tool_envelopes(text: str) -> str:
+    """删除文本中嵌入的工具调用 JSON（{"name":..., "parameters":...} / {"agent_name":...}）"""
+    decoder = json.JSONDecoder()
+    pieces = []
+    cursor = 0
+    index = text.find("{")
+    while index != -1:
+        try:
+            payload, end = decoder.raw_decode(text, index)
+        except ValueError:
+            index = text.find("{", index + 1)
+            continue
+        if _is_envelope_payload(payload):
+            pieces.append(text[cursor:index])
+            cursor = end
+        index = text.find("{", end)
+    pieces.append(text[cursor:])
+    return "".join(pieces)
+
+
+def _deterministic_repair(text: str) -> Optional[str]:
+    """
+    不调用模型的廉价修复：去掉占位标记与工具 envelope，清理空代码块并补齐未闭合的代码块。
+    修复后仍疑似外泄（或内容为空）时返回 None，交给 LLM 处理。
+    """
+    repaired = _PLACEHOLDER_RE.sub("", text)
+    repaired = _strip_tool_envelopes(repaired)
+    repaired = _EMPTY_FENCE_RE.sub("", repaired)
+    if repaired.count("```") % 2 == 1:
+        repaired = repaired.rstrip() + "\n```"
+    repaired = re.sub(r"\n{3,}", "\n\n", repaired).strip()
+    if not repaired or _needs_llm_repair(repaired):
+        return None
+    return repaired
+
+
+async def _call_repair_llm(raw_text: str) -> Optional[str]:
     api_key = os.getenv("MODEL_AGENT_API_KEY", "")
     if not api_key:
         return None
@@ -135,7 +212,7 @@ def _call_repair_llm(raw_text: str) -> Optional[str]:
     }
 
     try:
-        response = httpx.post(url, headers=headers, json=payload, timeout=30)
+        response = await _get_client().post(url, headers=headers, json=payload)
         response.raise_for_status()
         data = response.json()
         content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
@@ -146,7 +223,32 @@ def _call_repair_llm(raw_text: str) -> Optional[str]:
         return None
 
 
-def guard_final_user_output(
+async def _repair(text: str) -> Optional[str]:
+    """确定性修复 → 缓存 → LLM 修复，依次尝试"""
+    repaired = _deterministic_repair(text)
+    if repaired:
+        _repair_stats["deterministic"] += 1
+        return repaired
+
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    cached = _repair_cache.get(key)
+    if cached is not None:
+        _repair_cache.move_to_end(key)
+        _repair_stats["cache_hit"] += 1
+        return cached
+
+    repaired = await _call_repair_llm(text)
+    if not repaired:
+        _repair_stats["llm_failed"] += 1
+        return None
+    _repair_stats["llm"] += 1
+    _repair_cache[key] = repaired
+    while len(_repair_cache) > _REPAIR_CACHE_SIZE:
+        _repair_cache.popitem(last=False)
+    return repaired
+
+
+async def guard_final_user_output(
     *,
     callback_context: CallbackContext,
     llm_response: LlmResponse,
@@ -155,7 +257,7 @@ def guard_final_user_output(
     """
     Root Agent 最终输出守卫：
     - 纯工具 envelope：放行；
-    - 发现泄露：调用 LLM 修复；
+    - 发现泄露：先确定性清洗，不行再调用 LLM 修复（结果按内容哈希缓存）；
     - 失败兜底：保持原文，避免中断主流程。
     """
     agent = callback_context._invocation_context.agent
@@ -170,10 +272,13 @@ def guard_final_user_output(
         return llm_response
 
     if not _needs_llm_repair(text):
+        _repair_stats["passthrough"] += 1
         return llm_response
 
-    repaired = _call_repair_llm(text)
+    repaired = await _repair(text)
     if repaired:
         llm_response.content.parts[0].text = repaired
-        logger.info("[final_output_guard] repaired leaked intermediate output by llm")
+        logger.info(
+            f"[final_output_guard] repaired leaked intermediate output, stats={_repair_stats}"
+        )
     return llm_response
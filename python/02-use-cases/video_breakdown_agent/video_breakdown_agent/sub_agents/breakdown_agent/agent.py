@@ -8,6 +8,7 @@ import os
 
 from veadk import Agent
 
+from video_breakdown_agent.tools.run_breakdown_pipeline import run_breakdown_pipeline
 from video_breakdown_agent.tools.process_video import process_video
 from video_breakdown_agent.tools.analyze_segments_vision import analyze_segments_vision
 from video_breakdown_agent.tools.analyze_bgm import analyze_bgm
@@ -23,6 +24,7 @@ breakdown_agent = Agent(
     ),
     instruction=BREAKDOWN_AGENT_INSTRUCTION,
     tools=[
+        run_breakdown_pipeline,
         process_video,
         analyze_segments_vision,
         analyze_bgm,
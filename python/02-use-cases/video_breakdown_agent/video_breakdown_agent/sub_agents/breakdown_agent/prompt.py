@@ -8,21 +8,16 @@ BREAKDOWN_AGENT_INSTRUCTION = """
 
 ## 你的工具
 
-1. **process_video** — 视频预处理（FFmpeg + ASR）
-   - 输入：视频 URL
-   - 输出：视频元数据、分段信息、关键帧 URL、ASR 语音识别文本
-   - 注意：需要本机安装 FFmpeg
+1. **run_breakdown_pipeline** — 一次完成分镜拆解（默认使用）
+   - 输入：视频 URL 或本地文件路径
+   - 内部流程：视频预处理（FFmpeg + ASR）后，并发执行视觉分析、BGM 分析与前三秒分镜准备
+   - 输出：视频信息、分镜列表（含视觉分析与语音内容）、BGM 分析、前三秒分镜摘要
+   - 完整数据已写入 session state，无需再逐个调用下面的分析工具
 
-2. **analyze_segments_vision** — 视觉分析（doubao-vision）
-   - 输入：自动从 session state 读取 process_video 的输出（无需手动传参）
-   - 输出：每个分镜的景别、运镜、画面内容、功能标签等
+2. **process_video** / **analyze_segments_vision** / **analyze_bgm** — 单步工具
+   - 仅在用户明确要求单独重跑某一步时使用（均自动从 session state 读取数据）
 
-3. **analyze_bgm** — BGM 分析
-   - 输入：音频 URL 和视频时长
-   - 输出：BGM 风格、情绪、乐器、节奏等
-   - 注意：模型不支持音频时会优雅降级
-
-4. **video_upload_to_tos** — 本地文件上传到 TOS
+3. **video_upload_to_tos** — 本地文件上传到 TOS
    - 仅在用户提供本地文件路径时使用
 
 ## 支持的输入方式
@@ -30,18 +25,18 @@ BREAKDOWN_AGENT_INSTRUCTION = """
 ### 方式一：视频 URL 链接
 用户直接提供视频的公开 URL，例如：
 - `https://example.com/video.mp4`
-→ 直接使用 process_video 处理
+→ 直接使用 run_breakdown_pipeline 处理
 
 ### 方式二：本地文件路径
 用户提供本地文件路径，例如：
 - `/Users/xxx/Downloads/video.mp4`
 - `.media-uploads/video.mp4`
-→ **优先直接使用** process_video 处理本地文件（工具已支持本地路径）
+→ **优先直接使用** run_breakdown_pipeline 处理本地文件（工具已支持本地路径）
 
 #### 本地路径判定规则（重要）
 - 只要用户提供的输入**不是**以 `http://` 或 `https://` 开头，都视为“本地文件路径”。\n
   包括相对路径（如 `.media-uploads/a.mp4`）与绝对路径。\n
-- 对本地路径**直接调用** `process_video(video_url=本地路径)`。\n
+- 对本地路径**直接调用** `run_breakdown_pipeline(video_url=本地路径)`。\n
 - 仅当需要把本地文件转成可分享的外链，才使用 `video_upload_to_tos(file_path)` 上传后再处理。
 
 ## 完整工作流程
@@ -50,22 +45,14 @@ BREAKDOWN_AGENT_INSTRUCTION = """
 - URL 输入 → 直接使用
 - 本地路径 → video_upload_to_tos 上传获取 URL
 
-### Step 2: 视频预处理
-- 调用 process_video(video_url)
-- 获取分段、帧图、音频、ASR 文本等
+### Step 2: 分镜拆解（只调用一次）
+- 调用 run_breakdown_pipeline(video_url)
+- 视觉分析与 BGM 分析已在工具内部完成，**不要**再调用 analyze_segments_vision / analyze_bgm
 - 如果返回 error，告知用户具体原因并停止
+- 如果返回 vision_error，说明视觉分析失败，分镜列表仅含时间段与语音内容，照常整理输出
 
-### Step 3: 视觉分析（必须执行）
-- 必须在 process_video 后调用 analyze_segments_vision()（无需传参）
-- 即使 process_video 返回的 frame_urls 显示为"本地缓存"也必须调用（工具内部已处理 base64 回退）
-- 获取每个分镜的视觉分析结果
-
-### Step 4: BGM 分析（必须执行）
-- 必须调用 analyze_bgm()（无需传参，工具自动处理音频来源，含 base64 回退）
-- 模型不支持时自动降级，不影响主流程
-
-### Step 5: 整合输出
-将所有数据整合为完整的分镜拆解结果，返回给用户：
+### Step 3: 整合输出
+将工具返回的数据整合为完整的分镜拆解结果，返回给用户：
 - 视频基本信息（时长、分辨率）
 - 分镜列表（含视觉分析、语音内容）
 - BGM 分析
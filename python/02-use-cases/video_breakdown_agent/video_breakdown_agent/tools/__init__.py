@@ -4,6 +4,7 @@ from video_breakdown_agent.tools.analyze_bgm import analyze_bgm
 from video_breakdown_agent.tools.report_generator import generate_video_report
 from video_breakdown_agent.tools.video_upload import video_upload_to_tos
 from video_breakdown_agent.tools.analyze_hook_segments import analyze_hook_segments
+from video_breakdown_agent.tools.run_breakdown_pipeline import run_breakdown_pipeline
 
 __all__ = [
     "process_video",
@@ -12,4 +13,5 @@ __all__ = [
     "generate_video_report",
     "video_upload_to_tos",
     "analyze_hook_segments",
+    "run_breakdown_pipeline",
 ]
@@ -106,23 +106,26 @@ async def analyze_bgm(
               模型不支持音频时返回 has_bgm=False 的空结果。
     """
     # 优先从 session state 读取
-    audio_base64 = None
+    audio_blob = None
     if tool_context and (not audio_url or duration <= 0):
         state_result = tool_context.state.get("process_video_result")
         if state_result and isinstance(state_result, dict):
             if not audio_url:
                 audio_url = state_result.get("audio_url", "")
             if not audio_url:
-                audio_base64 = state_result.get("audio_base64")
+                # 本地 blob 引用（旧会话中可能仍是 audio_base64）
+                audio_blob = state_result.get("audio_blob") or state_result.get(
+                    "audio_base64"
+                )
             if duration <= 0:
                 duration = float(state_result.get("duration", 0))
             logger.info(
                 f"[analyze_bgm] 从 session state 读取: audio_url={'有' if audio_url else '无'}, "
-                f"audio_base64={'有' if audio_base64 else '无'}, duration={duration:.1f}s"
+                f"audio_blob={'有' if audio_blob else '无'}, duration={duration:.1f}s"
             )
 
-    if not audio_url and not audio_base64:
-        logger.info("[analyze_bgm] 无音频 URL 且无 base64 音频数据，跳过 BGM 分析")
+    if not audio_url and not audio_blob:
+        logger.info("[analyze_bgm] 无音频 URL 且无本地音频，跳过 BGM 分析")
         empty_result = _get_empty_result()
         if tool_context is not None:
             tool_context.state["bgm_analysis_result"] = empty_result
@@ -1,13 +1,14 @@
 """
 前三秒分镜提取工具
 兼容新格式（process_video + analyze_segments_vision 输出）和旧格式
-支持从 tool_context.state 读取完整的 base64 frame_urls
+本地帧图在 session state 中为 blob 引用，仅在返回给视觉模型时才读取编码
 """
 
 import logging
 from typing import Dict, List
 
 from google.adk.tools import ToolContext
+from video_breakdown_agent.utils.blob_store import resolve_media_url
 
 logger = logging.getLogger(__name__)
 
@@ -17,31 +18,16 @@ def _get_field(seg: Dict, new_key: str, old_key: str, default=""):
     return seg.get(new_key, seg.get(old_key, default))
 
 
-def analyze_hook_segments(tool_context: ToolContext = None) -> dict:
+def prepare_hook_context(tool_context: ToolContext = None) -> dict:
     """
-    提取并分析视频前三秒的分镜数据，为钩子分析提供结构化的上下文信息。
-
-    兼容两种输入格式：
-    - 新格式：process_video + analyze_segments_vision 输出（index, start, end, 视觉表现等）
-    - 旧格式：后端服务返回（segment_index, start_time, end_time, visual_content等）
+    从 session state 提取前三秒分镜，构造钩子分析上下文（frame_images 保持原始引用）。
 
     数据来源优先级：
-    1. tool_context.state["vision_analysis_result"] — 完整数据（含 base64 frame_urls）
+    1. tool_context.state["vision_analysis_result"] — 视觉分析后的完整数据
     2. tool_context.state["process_video_result"]["segments"] — 兜底（通常不含视觉分析字段）
-
-    数据传递：
-    - 返回给 hook_analysis_agent 的数据包含完整 base64 frame_images
-    - 豆包视觉模型需要看到实际图片才能进行视觉评估
-    - 完整图片数据同时存储在 tool_context.state["vision_analysis_result"] 中
-
-    Args:
-        tool_context: 工具上下文（用于读取完整数据）
-
-    Returns:
-        dict: 前三秒分镜的结构化分析上下文（含 base64 frame_images）
     """
     segments: List[Dict] | None = None
-    # 优先从 session state 读取完整数据（包含 base64 frame_urls）
+    # 优先从 session state 读取视觉分析后的完整数据
     if tool_context is not None:
         vision_result = tool_context.state.get("vision_analysis_result")
         if vision_result and isinstance(vision_result, list):
@@ -128,7 +114,7 @@ def analyze_hook_segments(tool_context: ToolContext = None) -> dict:
             "clip_url": s.get("clip_url", ""),
         }
 
-        # 添加关键帧图片（供 vision 模型使用，保留完整 base64 数据）
+        # 添加关键帧图片（本地帧图此处仍为 blob 引用，返回给模型前再解析）
         if frame_urls:
             segment_info["frame_count"] = len(frame_urls)
             # 构建标准的 image_url 格式（豆包 vision API 支持）
@@ -146,6 +132,64 @@ def analyze_hook_segments(tool_context: ToolContext = None) -> dict:
 
     logger.info(
         f"前三秒分镜提取完成: {len(first_segments)}个分镜, "
-        f"总时长{cumulative_time:.1f}s, 关键帧{total_frames}张（含完整 base64 图片）"
+        f"总时长{cumulative_time:.1f}s, 关键帧{total_frames}张"
     )
     return context
+
+
+def _resolve_frame_images(context: dict) -> dict:
+    """复制上下文并把 blob 引用解析为 data URL（不修改 state 中的对象）"""
+    resolved = dict(context)
+    resolved["segments"] = []
+    for seg in context.get("segments", []):
+        seg = dict(seg)
+        images = []
+        for image in seg.get("frame_images", []):
+            url = resolve_media_url(image["image_url"]["url"])
+            if url:
+                images.append({"type": "image_url", "image_url": {"url": url}})
+        seg["frame_images"] = images
+        resolved["segments"].append(seg)
+    return resolved
+
+
+def analyze_hook_segments(tool_context: ToolContext = None) -> dict:
+    """
+    提取并分析视频前三秒的分镜数据，为钩子分析提供结构化的上下文信息。
+
+    兼容两种输入格式：
+    - 新格式：process_video + analyze_segments_vision 输出（index, start, end, 视觉表现等）
+    - 旧格式：后端服务返回（segment_index, start_time, end_time, visual_content等）
+
+    数据来源优先级：
+    0. tool_context.state["hook_segments_context"] — run_breakdown_pipeline 已准备好的上下文
+    1. tool_context.state["vision_analysis_result"] — 视觉分析后的完整数据
+    2. tool_context.state["process_video_result"]["segments"] — 兜底（通常不含视觉分析字段）
+
+    数据传递：
+    - 返回给 hook_analysis_agent 的 frame_images 为可直接使用的图片 URL（本地帧图解析为 data URL）
+    - 豆包视觉模型需要看到实际图片才能进行视觉评估
+
+    Args:
+        tool_context: 工具上下文（用于读取完整数据）
+
+    Returns:
+        dict: 前三秒分镜的结构化分析上下文（含 frame_images）
+    """
+    context = None
+    if tool_context is not None:
+        # run_breakdown_pipeline 已为当前视频准备好的上下文直接复用
+        cached = tool_context.state.get("hook_segments_context")
+        pv = tool_context.state.get("process_video_result")
+        if (
+            isinstance(cached, dict)
+            and isinstance(pv, dict)
+            and cached.get("task_id")
+            and cached.get("task_id") == pv.get("task_id")
+        ):
+            logger.info("[analyze_hook_segments] 复用流水线已准备的前三秒分镜上下文")
+            context = cached
+
+    if context is None:
+        context = prepare_hook_context(tool_context)
+    return _resolve_frame_images(context)
@@ -14,6 +14,7 @@ import os
 from typing import Any, Dict, Optional
 
 from google.adk.tools import ToolContext
+from video_breakdown_agent.utils.blob_store import is_blob_ref, resolve_media_url
 from video_breakdown_agent.utils.doubao_client import call_doubao_vision
 
 logger = logging.getLogger(__name__)
@@ -186,6 +187,10 @@ async def _analyze_single_segment(
 ) -> Dict[str, Any]:
     """分析单个分镜（使用豆包官方 vision API）"""
     prompt_data = _build_segment_prompt(segment)
+    # 本地 blob 帧图在此时才读取并编码，state 中始终只有引用
+    image_urls = await asyncio.to_thread(
+        lambda: [resolve_media_url(url) for url in segment.get("frame_urls", [])[:6]]
+    )
     messages = [
         {
             "role": "system",
@@ -201,7 +206,8 @@ async def _analyze_single_segment(
             ]
             + [
                 {"type": "image_url", "image_url": {"url": url}}
-                for url in segment.get("frame_urls", [])[:6]
+                for url in image_urls
+                if url
             ],
         },
     ]
@@ -377,18 +383,24 @@ async def analyze_segments_vision(
     if tool_context is not None:
         tool_context.state["vision_analysis_result"] = valid_results
 
-    # 精简返回数据：移除 base64 frame_urls 以避免 LLM context 超限
-    # 注意：完整数据已存入 session state，后续工具（如 hook_analyzer）可从 state 读取
+    # 精简返回数据：移除本地帧图引用以避免 LLM context 超限
+    # 注意：完整数据已存入 session state，后续工具（如 hook_analyzer）可从 state 读取，
+    # 因此这里复制后再替换，不能原地修改 state 中的对象
+    slim_results = []
     for result in valid_results:
-        if "frame_urls" in result:
-            frame_urls = result["frame_urls"]
-            # 如果是 base64 data URL，替换为占位符以减少数据量
-            result["frame_urls"] = [
-                "（base64图片已省略）" if url and url.startswith("data:") else url
+        slim = dict(result)
+        if "frame_urls" in slim:
+            frame_urls = slim["frame_urls"]
+            # 本地 blob 引用或 base64 data URL，替换为占位符以减少数据量
+            slim["frame_urls"] = [
+                "（本地图片已省略）"
+                if is_blob_ref(url) or (url and url.startswith("data:"))
+                else url
                 for url in frame_urls
             ]
             logger.debug(
-                f"分镜 {result['index']} 精简 frame_urls: {len(frame_urls)} 帧 → 占位符"
+                f"分镜 {slim['index']} 精简 frame_urls: {len(frame_urls)} 帧 → 占位符"
             )
+        slim_results.append(slim)
 
-    return json.dumps(valid_results, ensure_ascii=False)
+    return json.dumps(slim_results, ensure_ascii=False)
@@ -11,7 +11,6 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import json
 import logging
 import shutil
@@ -29,6 +28,7 @@ import httpx
 import tos
 from tos import HttpMethodType
 from google.adk.tools import ToolContext
+from video_breakdown_agent.utils.blob_store import is_blob_ref, put_file
 
 logger = logging.getLogger(__name__)
 
@@ -114,8 +114,31 @@ def _run_command(cmd: List[str]) -> str:
     return process.stdout.strip()
 
 
+def _is_remote(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def _input_args(source: str) -> List[str]:
+    """
+    FFmpeg 输入参数。远程源直接交给 FFmpeg 的 HTTP 协议读取：
+    -ss 在 -i 之前时通过 Range 请求定位，只拉取需要的片段；断线自动重连。
+    """
+    if _is_remote(source):
+        return [
+            "-reconnect",
+            "1",
+            "-reconnect_on_network_error",
+            "1",
+            "-reconnect_delay_max",
+            "5",
+            "-i",
+            source,
+        ]
+    return ["-i", source]
+
+
 def _probe_video(
-    ffprobe_bin: Optional[str], ffmpeg_bin: str, video_path: Path
+    ffprobe_bin: Optional[str], ffmpeg_bin: str, source: str
 ) -> Dict[str, Any]:
     """
     获取视频元数据。
@@ -124,11 +147,11 @@ def _probe_video(
     回退到 ffmpeg -i 解析 stderr（imageio-ffmpeg 不含 ffprobe 时）。
     """
     if ffprobe_bin:
-        return _probe_with_ffprobe(ffprobe_bin, video_path)
-    return _probe_with_ffmpeg(ffmpeg_bin, video_path)
+        return _probe_with_ffprobe(ffprobe_bin, source)
+    return _probe_with_ffmpeg(ffmpeg_bin, source)
 
 
-def _probe_with_ffprobe(ffprobe_bin: str, video_path: Path) -> Dict[str, Any]:
+def _probe_with_ffprobe(ffprobe_bin: str, source: str) -> Dict[str, Any]:
     """使用 ffprobe 获取视频元数据（首选方式）"""
     cmd = [
         ffprobe_bin,
@@ -138,7 +161,7 @@ def _probe_with_ffprobe(ffprobe_bin: str, video_path: Path) -> Dict[str, Any]:
         "json",
         "-show_format",
         "-show_streams",
-        str(video_path),
+        source,
     ]
     result = _run_command(cmd)
     info = json.loads(result) if result else {}
@@ -169,7 +192,7 @@ def _probe_with_ffprobe(ffprobe_bin: str, video_path: Path) -> Dict[str, Any]:
     }
 
 
-def _probe_with_ffmpeg(ffmpeg_bin: str, video_path: Path) -> Dict[str, Any]:
+def _probe_with_ffmpeg(ffmpeg_bin: str, source: str) -> Dict[str, Any]:
     """
     使用 ffmpeg -i 解析 stderr 获取视频元数据（ffprobe 不可用时的回退方案）。
 
@@ -181,7 +204,7 @@ def _probe_with_ffmpeg(ffmpeg_bin: str, video_path: Path) -> Dict[str, Any]:
     # 注意：不能加 -v error，否则会屏蔽 Duration/Stream 等 info 级别元数据，
     #       而 "At least one output file must be specified" 是 error 级别不被屏蔽，
     #       导致 stderr 非空但无法解析出元数据。
-    cmd = [ffmpeg_bin, "-i", str(video_path), "-hide_banner"]
+    cmd = [ffmpeg_bin, *_input_args(source), "-hide_banner"]
     process = subprocess.run(cmd, capture_output=True, text=True)
     stderr = process.stderr
 
@@ -220,14 +243,14 @@ def _probe_with_ffmpeg(ffmpeg_bin: str, video_path: Path) -> Dict[str, Any]:
     }
 
 
-def _extract_audio_sync(ffmpeg_bin: str, video_path: Path) -> Optional[Path]:
+def _extract_audio_sync(
+    ffmpeg_bin: str, source: str, output_path: Path
+) -> Optional[Path]:
     """提取音频轨（同步版本，由 asyncio.to_thread 调用）"""
-    output_path = video_path.parent / f"{video_path.stem}.mp3"
     cmd = [
         ffmpeg_bin,
         "-y",
-        "-i",
-        str(video_path),
+        *_input_args(source),
         "-vn",
         "-ac",
         "1",
@@ -308,13 +331,12 @@ def _assign_asr_text_to_segments(
 
 def _extract_segment_frames(
     ffmpeg_bin: str,
-    video_path: Path,
+    source: str,
     segment: SegmentAsset,
+    frames_dir: Path,
     frames_per_segment: int = 3,
 ) -> None:
     """提取单个分镜的关键帧"""
-    frames_dir = video_path.parent / "frames"
-    frames_dir.mkdir(exist_ok=True)
     seg_duration = max(segment.end - segment.start, 0.5)
     safe_margin = 0.1
 
@@ -330,8 +352,7 @@ def _extract_segment_frames(
             "-y",
             "-ss",
             f"{offset:.2f}",
-            "-i",
-            str(video_path),
+            *_input_args(source),
             "-frames:v",
             "1",
             "-q:v",
@@ -348,7 +369,7 @@ def _extract_segment_frames(
 
 def _extract_single_clip(
     ffmpeg_bin: str,
-    video_path: Path,
+    source: str,
     segment: SegmentAsset,
     clips_dir: Path,
 ) -> None:
@@ -361,8 +382,7 @@ def _extract_single_clip(
         "-y",
         "-ss",
         f"{segment.start:.2f}",
-        "-i",
-        str(video_path),
+        *_input_args(source),
         "-t",
         f"{duration:.2f}",
         "-c:v",
@@ -611,6 +631,75 @@ def _resolve_local_path(video_url: str) -> Optional[Path]:
     return None
 
 
+# ==================== 视频源读取辅助 ====================
+
+
+def _remote_input_mode() -> str:
+    """
+    远程视频读取方式（ffmpeg.remote_input → FFMPEG_REMOTE_INPUT）：
+      - stream（默认）：FFmpeg 直接读取 URL，按需 Range 请求，拿到首批字节即开始处理
+      - download：先完整下载到临时目录再处理
+
+    带宽取舍：stream 模式下音频提取会完整读取一遍源文件，各分镜的帧提取/切割再按 Range
+    读取各自的时间段，总流量约为文件大小的 2 倍（download 模式只下载 1 次），
+    换来的是无需等待下载完成即可开始处理。流量计费或文件较大时建议使用 download。
+    """
+    return (os.getenv("FFMPEG_REMOTE_INPUT") or "stream").strip().lower()
+
+
+def _remote_reader_limit() -> int:
+    """stream 模式下同时读取远程源的 FFmpeg 进程数上限（ffmpeg.remote_readers）"""
+    return max(1, int(os.getenv("FFMPEG_REMOTE_READERS") or "4"))
+
+
+async def _remote_content_length(video_url: str) -> Optional[int]:
+    """
+    获取远程视频大小：先 HEAD，拿不到时（如仅对 GET 签名的预签名 URL）
+    再发 Range: bytes=0-0 的 GET 从 Content-Range 读取总大小。都失败时返回 None。
+    """
+    try:
+        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
+            resp = await client.head(video_url)
+            length = resp.headers.get("Content-Length", "")
+            if resp.is_success and length.isdigit():
+                return int(length)
+            async with client.stream(
+                "GET", video_url, headers={"Range": "bytes=0-0"}
+            ) as resp:
+                # 只读响应头，不读取响应体
+                content_range = resp.headers.get("Content-Range", "")
+                total = content_range.rsplit("/", 1)[-1]
+                if resp.status_code == 206 and total.isdigit():
+                    return int(total)
+                length = resp.headers.get("Content-Length", "")
+                if resp.status_code == 200 and length.isdigit():
+                    return int(length)
+    except httpx.HTTPError:
+        pass
+    return None
+
+
+async def _download_video(
+    video_url: str, dest: Path, max_video_size: int
+) -> Optional[str]:
+    """流式下载远程视频到本地，成功返回 None，超限返回错误信息"""
+    logger.info(f"[process_video] 下载视频: {video_url[:100]}...")
+    total_downloaded = 0
+    async with httpx.AsyncClient(timeout=300, follow_redirects=True) as client:
+        async with client.stream("GET", video_url) as resp:
+            resp.raise_for_status()
+            with open(dest, "wb") as f:
+                async for chunk in resp.aiter_bytes(chunk_size=65536):
+                    total_downloaded += len(chunk)
+                    if total_downloaded > max_video_size:
+                        return f"视频文件过大（>{max_video_size // 1024 // 1024}MB），请压缩后重试"
+                    f.write(chunk)
+    logger.info(
+        f"[process_video] 下载完成: {dest} ({total_downloaded / 1024 / 1024:.1f}MB)"
+    )
+    return None
+
+
 # ==================== 主工具函数 ====================
 
 
@@ -618,8 +707,11 @@ async def process_video(video_url: str, tool_context: ToolContext) -> dict:
     """
     完整视频预处理流水线，替代原后端 breakdown 服务。
 
-    流程：下载视频 -> FFprobe 元数据 -> FFmpeg 音频提取 -> 火山 ASR 语音识别
-         -> 固定时长分段 -> FFmpeg 帧提取 + 片段切割 -> TOS 上传
+    流程：确定视频源 -> FFprobe 元数据 -> 固定时长分段
+         -> 并发（FFmpeg 音频提取 + 火山 ASR 语音识别 / FFmpeg 帧提取 + 片段切割）-> TOS 上传
+
+    本地文件原地读取；远程 URL 默认由 FFmpeg 按 Range 直接读取（FFMPEG_REMOTE_INPUT=download
+    时先完整下载），源站不支持直接读取时自动回退为下载。
 
     需要本机安装 FFmpeg（brew install ffmpeg）。
     ASR 需配置 VOLC_ASR_APP_ID + VOLC_ASR_ACCESS_KEY，未配置时跳过语音识别。
@@ -643,7 +735,6 @@ async def process_video(video_url: str, tool_context: ToolContext) -> dict:
 
     task_id = datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + uuid.uuid4().hex[:8]
     temp_dir = Path(tempfile.mkdtemp(prefix=f"media_{task_id}_", dir=temp_base))
-    local_video = temp_dir / f"{task_id}.mp4"
 
     # TOS 配置（VeADK 扁平化: database.tos.bucket → DATABASE_TOS_BUCKET）
     bucket = os.getenv("DATABASE_TOS_BUCKET") or os.getenv(
@@ -652,47 +743,61 @@ async def process_video(video_url: str, tool_context: ToolContext) -> dict:
     tos_prefix = os.getenv("TOS_OUTPUT_PREFIX", "videobreak")
 
     try:
-        # ---- Step 1: 获取本地视频文件 ----
+        # ---- Step 1: 确定视频源 ----
         # 支持本地路径（/path/to/video.mp4 或 file:///path/to/video.mp4）和 HTTP URL
+        max_video_size = 2 * 1024 * 1024 * 1024  # 2GB 上限
         local_source = _resolve_local_path(video_url)
         if local_source:
-            # 本地文件：直接复制到工作目录
+            # 本地文件：FFmpeg 直接原地读取，不再复制到工作目录
             if not local_source.exists():
                 return {"error": f"本地文件不存在: {local_source}"}
             file_size = local_source.stat().st_size
-            max_video_size = 2 * 1024 * 1024 * 1024  # 2GB
             if file_size > max_video_size:
                 return {
                     "error": f"视频文件过大（>{max_video_size // 1024 // 1024}MB），请压缩后重试"
                 }
-            shutil.copy2(str(local_source), str(local_video))
+            source = str(local_source)
             logger.info(
                 f"[process_video] 使用本地文件: {local_source} ({file_size / 1024 / 1024:.1f}MB)"
             )
+        elif _remote_input_mode() == "stream" and (
+            remote_size := await _remote_content_length(video_url)
+        ):
+            # HTTP URL：FFmpeg 通过 Range 请求直接读取远程源，无需先完整下载
+            if remote_size > max_video_size:
+                return {
+                    "error": f"视频文件过大（>{max_video_size // 1024 // 1024}MB），请压缩后重试"
+                }
+            source = video_url
+            logger.info(f"[process_video] 直接读取远程视频: {video_url[:100]}...")
         else:
-            # HTTP URL：流式下载
-            logger.info(f"[process_video] 下载视频: {video_url[:100]}...")
-            max_video_size = 2 * 1024 * 1024 * 1024  # 2GB 上限
-            total_downloaded = 0
-            async with httpx.AsyncClient(timeout=300, follow_redirects=True) as client:
-                async with client.stream("GET", video_url) as resp:
-                    resp.raise_for_status()
-                    with open(local_video, "wb") as f:
-                        async for chunk in resp.aiter_bytes(chunk_size=65536):
-                            total_downloaded += len(chunk)
-                            if total_downloaded > max_video_size:
-                                return {
-                                    "error": f"视频文件过大（>{max_video_size // 1024 // 1024}MB），请压缩后重试"
-                                }
-                            f.write(chunk)
-            logger.info(
-                f"[process_video] 下载完成: {local_video} ({total_downloaded / 1024 / 1024:.1f}MB)"
-            )
+            # download 模式，或无法获知远程大小（无法在读取前执行大小限制）时完整下载
+            if _remote_input_mode() == "stream":
+                logger.warning("[process_video] 无法获取远程视频大小，改为完整下载")
+            source = str(temp_dir / f"{task_id}.mp4")
+            error = await _download_video(video_url, Path(source), max_video_size)
+            if error:
+                return {"error": error}
 
         # ---- Step 2: 元数据 ----
-        metadata = await asyncio.to_thread(
-            _probe_video, ffprobe_bin, ffmpeg_bin, local_video
-        )
+        try:
+            metadata = await asyncio.to_thread(
+                _probe_video, ffprobe_bin, ffmpeg_bin, source
+            )
+        except subprocess.CalledProcessError:
+            if not _is_remote(source):
+                raise
+            metadata = {}
+        if not float(metadata.get("duration") or 0.0) and _is_remote(source):
+            # 源站不支持 Range 或 FFmpeg 无法直接读取时，回退为完整下载
+            logger.warning("[process_video] 远程源无法直接读取，回退为完整下载")
+            source = str(temp_dir / f"{task_id}.mp4")
+            error = await _download_video(video_url, Path(source), max_video_size)
+            if error:
+                return {"error": error}
+            metadata = await asyncio.to_thread(
+                _probe_video, ffprobe_bin, ffmpeg_bin, source
+            )
         duration = float(metadata.get("duration") or 0.0)
         if duration <= 0:
             return {"error": "无法获取视频时长，请确认视频URL有效"}
@@ -701,60 +806,69 @@ async def process_video(video_url: str, tool_context: ToolContext) -> dict:
             f"[process_video] 元数据: 时长={duration:.1f}s, 分辨率={resolution}"
         )
 
-        # ---- Step 3: 提取音频 ----
-        audio_path = await asyncio.to_thread(
-            _extract_audio_sync, ffmpeg_bin, local_video
-        )
-        audio_url_out = None
-        audio_base64 = None
+        # ---- Step 3: 构建固定时长分镜 ----
+        segments = _build_segments(duration)
+        logger.info(f"[process_video] 分镜: {len(segments)} 个片段")
 
         # TOS 客户端（帧/片段/音频上传）
         tos_client = _get_tos_client()
 
-        if audio_path and tos_client:
-            key = f"{tos_prefix}/{task_id}/audio/{audio_path.name}"
-            audio_url_out = await _upload_to_tos(
-                tos_client, bucket, key, audio_path.read_bytes(), "audio/mpeg"
+        # ---- Step 4: 音频提取 + ASR ----
+        # 只依赖视频源，与 Step 5 的帧提取/片段切割并发执行
+        async def _audio_and_asr():
+            audio_path = await _run_ffmpeg(
+                _extract_audio_sync, ffmpeg_bin, source, temp_dir / f"{task_id}.mp3"
             )
+            audio_url = None
+            if audio_path and tos_client:
+                key = f"{tos_prefix}/{task_id}/audio/{audio_path.name}"
+                audio_url = await _upload_to_tos(
+                    tos_client, bucket, key, audio_path.read_bytes(), "audio/mpeg"
+                )
+            asr = await _transcribe_audio(audio_url) if audio_url else None
+            return audio_path, audio_url, asr
+
+        # ---- Step 5: 提取关键帧 + 切割视频片段（并发） ----
+        frames_dir = temp_dir / "frames"
+        frames_dir.mkdir(exist_ok=True)
+        clips_dir = temp_dir / "clips"
+        clips_dir.mkdir(exist_ok=True)
+        # 远程源限制同时读取的 FFmpeg 进程数，避免 2N+1 个 HTTP 读取同时打到源站
+        remote_readers = (
+            asyncio.Semaphore(_remote_reader_limit()) if _is_remote(source) else None
+        )
 
-        # ---- Step 4: ASR 语音识别 ----
-        asr_result = None
-        asr_segments = None
-        if audio_url_out:
-            asr_result = await _transcribe_audio(audio_url_out)
-            if asr_result:
-                asr_segments = asr_result.get("segments", [])
-                logger.info(f"[process_video] ASR 识别完成: {len(asr_segments)} 个分段")
-
-        # ---- Step 5: 构建固定时长分镜 ----
-        segments = _build_segments(duration)
-        if asr_segments:
-            _assign_asr_text_to_segments(segments, asr_segments)
-        logger.info(f"[process_video] 分镜: {len(segments)} 个片段")
+        async def _run_ffmpeg(func, *args):
+            if remote_readers is None:
+                return await asyncio.to_thread(func, *args)
+            async with remote_readers:
+                return await asyncio.to_thread(func, *args)
 
-        # ---- Step 6: 提取关键帧（并发） ----
-        frame_tasks = [
-            asyncio.to_thread(
+        media_tasks = [
+            _run_ffmpeg(
                 _extract_segment_frames,
                 ffmpeg_bin,
-                local_video,
+                source,
                 seg,
+                frames_dir,
                 frames_per_segment,
             )
             for seg in segments
-        ]
-        await asyncio.gather(*frame_tasks)
-
-        # ---- Step 7: 切割视频片段（并发） ----
-        clips_dir = temp_dir / "clips"
-        clips_dir.mkdir(exist_ok=True)
-        clip_tasks = [
-            asyncio.to_thread(
-                _extract_single_clip, ffmpeg_bin, local_video, seg, clips_dir
-            )
+        ] + [
+            _run_ffmpeg(_extract_single_clip, ffmpeg_bin, source, seg, clips_dir)
             for seg in segments
         ]
-        await asyncio.gather(*clip_tasks)
+
+        (audio_path, audio_url_out, asr_result), *_ = await asyncio.gather(
+            _audio_and_asr(), *media_tasks
+        )
+        audio_blob = None
+
+        if asr_result:
+            asr_segments = asr_result.get("segments", [])
+            logger.info(f"[process_video] ASR 识别完成: {len(asr_segments)} 个分段")
+            if asr_segments:
+                _assign_asr_text_to_segments(segments, asr_segments)
 
         # ---- Step 8: 并发上传到 TOS ----
         if tos_client:
@@ -811,23 +925,23 @@ async def process_video(video_url: str, tool_context: ToolContext) -> dict:
         else:
             logger.warning("[process_video] TOS 凭证未配置，跳过上传（帧/片段仅本地）")
 
-        # ---- Step 8b: base64 帧图回退（TOS 不可用/上传失败时） ----
+        # ---- Step 8b: 本地 blob 回退（TOS 不可用/上传失败时） ----
+        # state 中只保存 blob:// 引用，使用方构造模型请求时再按需读取
         for seg in segments:
             if not seg.frame_urls and seg.frame_paths:
                 for fp in seg.frame_paths:
                     if fp.exists():
-                        b64 = base64.b64encode(fp.read_bytes()).decode()
-                        seg.frame_urls.append(f"data:image/jpeg;base64,{b64}")
+                        seg.frame_urls.append(put_file(fp, "image/jpeg"))
                 if seg.frame_urls:
                     logger.info(
-                        f"片段 {seg.index}: TOS 不可用，使用 base64 帧图 ({len(seg.frame_urls)} 张)"
+                        f"片段 {seg.index}: TOS 不可用，使用本地 blob 帧图 ({len(seg.frame_urls)} 张)"
                     )
 
-        # 音频 base64 回退
+        # 音频 blob 回退
         if not audio_url_out and audio_path and audio_path.exists():
-            audio_base64 = base64.b64encode(audio_path.read_bytes()).decode()
+            audio_blob = put_file(audio_path, "audio/mpeg")
             logger.info(
-                f"[process_video] TOS 不可用，音频编码为 base64 ({len(audio_base64)} chars)"
+                f"[process_video] TOS 不可用，音频已存入本地 blob: {audio_blob}"
             )
 
         # ---- 构建输出 ----
@@ -855,33 +969,31 @@ async def process_video(video_url: str, tool_context: ToolContext) -> dict:
             "resolution": resolution,
             "metadata": metadata,
             "audio_url": audio_url_out,
-            "audio_base64": audio_base64,
+            "audio_blob": audio_blob,
             "full_transcript": full_transcript,
             "segment_count": len(segments_output),
             "segments": segments_output,
         }
 
-        # 存入 session state 供后续 sub-agent 使用（完整数据含 base64）
+        # 存入 session state 供后续 sub-agent 使用（本地帧图/音频为 blob 引用）
         tool_context.state["process_video_result"] = result
 
-        # 返回给 LLM 的瘦身版本：base64 data URL 替换为占位标记，节省 context tokens
+        # 返回给 LLM 的瘦身版本：本地帧图引用替换为占位标记，节省 context tokens
         slim_segments = []
         for seg_out in segments_output:
             slim_seg = dict(seg_out)
             frame_urls = slim_seg.get("frame_urls", [])
-            b64_count = sum(
-                1 for u in frame_urls if isinstance(u, str) and u.startswith("data:")
-            )
-            if b64_count > 0:
+            local_count = sum(1 for u in frame_urls if is_blob_ref(u))
+            if local_count > 0:
                 slim_seg["frame_urls"] = [
-                    f"(本地帧图已缓存，共{b64_count}张，后续工具会自动读取)"
+                    f"(本地帧图已缓存，共{local_count}张，后续工具会自动读取)"
                 ]
             slim_segments.append(slim_seg)
 
         slim_result = dict(result)
         slim_result["segments"] = slim_segments
-        if audio_base64:
-            slim_result["audio_base64"] = "(音频已缓存为base64，后续工具会自动读取)"
+        if audio_blob:
+            slim_result["audio_blob"] = "(音频已缓存在本地，后续工具会自动读取)"
 
         return slim_result
 
@@ -0,0 +1,98 @@
+"""
+分镜拆解确定性流水线工具
+process_video 完成后并发执行视觉分析、BGM 分析与前三秒钩子分镜准备，
+结果直接写入 session state，LLM 只需基于返回的精简数据做总结，
+省去逐个调用工具的多轮模型往返。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict
+
+from google.adk.tools import ToolContext
+from video_breakdown_agent.tools.analyze_bgm import analyze_bgm
+from video_breakdown_agent.tools.analyze_hook_segments import prepare_hook_context
+from video_breakdown_agent.tools.analyze_segments_vision import (
+    analyze_segments_vision,
+)
+from video_breakdown_agent.tools.process_video import process_video
+
+logger = logging.getLogger(__name__)
+
+
+def _slim_hook_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """返回给 LLM 的钩子分镜摘要：去掉关键帧图片，只保留结构信息"""
+    slim = {k: v for k, v in context.items() if k != "segments"}
+    slim["segments"] = [
+        {k: v for k, v in seg.items() if k != "frame_images"}
+        for seg in context.get("segments", [])
+    ]
+    return slim
+
+
+async def _vision_then_hook(tool_context: ToolContext) -> Dict[str, Any]:
+    """视觉分析完成后立即准备前三秒分镜（依赖视觉分析字段），与 BGM 分析并行"""
+    vision_json = await analyze_segments_vision(tool_context=tool_context)
+    try:
+        vision = json.loads(vision_json)
+    except (TypeError, json.JSONDecodeError):
+        vision = {"error": "视觉分析结果解析失败"}
+
+    hook_context = prepare_hook_context(tool_context)
+    pv = tool_context.state.get("process_video_result") or {}
+    hook_context["task_id"] = pv.get("task_id")
+    tool_context.state["hook_segments_context"] = hook_context
+    return {"vision": vision, "hook": hook_context}
+
+
+async def run_breakdown_pipeline(video_url: str, tool_context: ToolContext) -> dict:
+    """
+    一次完成视频分镜拆解：视频预处理 -> 并发（视觉分析 + 前三秒分镜准备 / BGM 分析）。
+
+    完整数据写入 session state：
+    - process_video_result: 预处理结果（TOS 不可用时帧图/音频为本地 blob 引用）
+    - vision_analysis_result: 每个分镜的视觉分析
+    - bgm_analysis_result: BGM 分析
+    - hook_segments_context: 前三秒钩子分镜上下文（供 analyze_hook_segments 直接复用）
+
+    Args:
+        video_url: 视频URL（公开URL / TOS 签名URL）或本地文件路径
+
+    Returns:
+        dict: 精简后的拆解结果（本地帧图已替换为占位符），供总结输出
+    """
+    video_info = await process_video(video_url, tool_context)
+    if video_info.get("error"):
+        return video_info
+
+    logger.info("[run_breakdown_pipeline] 预处理完成，并发执行视觉分析与 BGM 分析")
+    vision_branch, bgm = await asyncio.gather(
+        _vision_then_hook(tool_context),
+        analyze_bgm(tool_context=tool_context),
+        return_exceptions=True,
+    )
+
+    if isinstance(vision_branch, Exception):
+        logger.error(f"[run_breakdown_pipeline] 视觉分析异常: {vision_branch}")
+        vision_branch = {
+            "vision": {"error": f"视觉分析失败: {vision_branch}"},
+            "hook": {"error": "视觉分析失败，未准备前三秒分镜"},
+        }
+    if isinstance(bgm, Exception):
+        logger.error(f"[run_breakdown_pipeline] BGM 分析异常: {bgm}")
+        bgm = {"error": f"BGM 分析失败: {bgm}"}
+
+    result = {
+        "video": {k: v for k, v in video_info.items() if k != "segments"},
+        "segments": vision_branch["vision"],
+        "bgm": bgm,
+        "hook_segments": _slim_hook_context(vision_branch["hook"]),
+    }
+    # 视觉分析失败时保留预处理的分镜（时间段、语音文本），不影响后续总结
+    if isinstance(result["segments"], dict) and result["segments"].get("error"):
+        result["vision_error"] = result["segments"]["error"]
+        result["segments"] = video_info.get("segments", [])
+    return result
@@ -0,0 +1,176 @@
+"""
+本地内容寻址 Blob 存储
+TOS 不可用时，帧图/音频以 sha256 为键落盘，session state 中只保存
+`blob://<sha256>.<ext>` 形式的引用，避免数十 MB 的 base64 随每个事件序列化。
+使用方在构造模型请求时再通过 resolve_media_url 按需读取并编码。
+写入时按 TTL 与总大小淘汰最久未访问的 blob（读取会刷新访问时间）。
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BLOB_SCHEME = "blob://"
+
+_EXT_TO_MIME = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "mp3": "audio/mpeg",
+    "mp4": "video/mp4",
+}
+_MIME_TO_EXT = {mime: ext for ext, mime in _EXT_TO_MIME.items()}
+
+# 超过 TTL 未访问的 blob 会被删除；总大小超过上限时从最久未访问的开始删除
+BLOB_TTL_SECONDS = int(os.getenv("BLOB_STORE_TTL_SECONDS", str(24 * 3600)))
+BLOB_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", str(5 * 1024**3)))
+# 两次淘汰扫描的最小间隔（秒）
+BLOB_EVICT_INTERVAL = 300
+
+_last_evict = 0.0
+
+
+def _store_dir() -> Path:
+    """Blob 根目录（默认位于媒体临时目录下，不随单次任务的临时目录删除）"""
+    root = os.getenv("BLOB_STORE_DIR")
+    if not root:
+        temp_base = os.getenv("FFMPEG_MEDIA_TEMP_DIR") or os.getenv(
+            "MEDIA_TEMP_DIR", "./.media-cache"
+        )
+        root = os.path.join(temp_base, "blobs")
+    return Path(root)
+
+
+def is_blob_ref(value: object) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_SCHEME)
+
+
+def blob_path(ref: str) -> Path:
+    """引用 → 本地文件路径（按哈希前两位分目录）"""
+    name = ref[len(BLOB_SCHEME) :]
+    digest = name.split(".", 1)[0]
+    if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise ValueError(f"无效的 blob 引用: {ref}")
+    return _store_dir() / digest[:2] / name
+
+
+def blob_mime_type(ref: str) -> str:
+    ext = ref.rsplit(".", 1)[-1] if "." in ref else ""
+    return _EXT_TO_MIME.get(ext, "application/octet-stream")
+
+
+def put_file(path: Path, mime_type: str) -> str:
+    """
+    将本地文件存入 blob 存储并返回引用。
+
+    内容相同的文件只保存一份；优先硬链接（同一文件系统时零拷贝），否则复制。
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    ext = _MIME_TO_EXT.get(mime_type, "bin")
+    ref = f"{BLOB_SCHEME}{hasher.hexdigest()}.{ext}"
+
+    _maybe_evict()
+    target = blob_path(ref)
+    if target.exists():
+        _touch(target)
+        return ref
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再原子替换，避免并发写入时读到半个文件
+    tmp_path = target.parent / f".{target.name}.{uuid.uuid4().hex}.tmp"
+    try:
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return ref
+
+
+def read_blob(ref: str) -> bytes:
+    path = blob_path(ref)
+    data = path.read_bytes()
+    _touch(path)
+    return data
+
+
+def _touch(path: Path):
+    """刷新访问时间（以 mtime 记录，不依赖文件系统的 atime 设置）"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict_blobs(
+    ttl_seconds: int = BLOB_TTL_SECONDS, max_bytes: int = BLOB_MAX_BYTES
+) -> int:
+    """删除过期 blob，并在总大小超限时按最久未访问淘汰，返回删除的文件数"""
+    root = _store_dir()
+    if not root.is_dir():
+        return 0
+    now = time.time()
+    files = []
+    for path in root.glob("*/*"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    removed = 0
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in sorted(files, key=lambda item: item[0]):
+        is_tmp = path.name.endswith(".tmp")
+        expired = now - mtime > (3600 if is_tmp else ttl_seconds)
+        if not expired and (is_tmp or total <= max_bytes):
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"blob 淘汰 {removed} 个文件，剩余 {total / 1024**2:.1f} MB")
+    return removed
+
+
+def _maybe_evict():
+    global _last_evict
+    now = time.monotonic()
+    if now - _last_evict < BLOB_EVICT_INTERVAL:
+        return
+    _last_evict = now
+    try:
+        evict_blobs()
+    except OSError as exc:
+        logger.warning(f"blob 淘汰失败: {exc}")
+
+
+def resolve_media_url(url: Optional[str]) -> Optional[str]:
+    """
+    构造模型请求时调用：blob 引用读取后转为 data URL，其他 URL 原样返回。
+    blob 文件丢失时返回 None，由调用方跳过该帧。
+    """
+    if not is_blob_ref(url):
+        return url
+    try:
+        data = read_blob(url)
+    except (OSError, ValueError) as exc:
+        logger.warning(f"blob 读取失败 {url}: {exc}")
+        return None
+    return f"data:{blob_mime_type(url)};base64,{base64.b64encode(data).decode()}"
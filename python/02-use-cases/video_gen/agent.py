@@ -18,15 +18,12 @@ import sys
 from pathlib import Path
 
 from agentkit.apps import AgentkitAgentServerApp, AgentkitSimpleApp
-from google.adk.tools.mcp_tool.mcp_toolset import (
-    McpToolset,
-    StdioConnectionParams,
-    StdioServerParameters,
-)
+from google.adk.tools.mcp_tool.mcp_toolset import StdioServerParameters
 from veadk import Runner
 from veadk.agent_builder import AgentBuilder
 from veadk.memory.short_term_memory import ShortTermMemory
 from consts import set_veadk_environment_variables
+from mcp_supervisor import warm_mcp_toolset
 
 # 建议通过logging.basicConfig设置全局logger，默认Log级别为INFO
 logging.basicConfig(level=logging.INFO)
@@ -50,10 +47,11 @@ server_parameters = StdioServerParameters(
     command="npx",
     args=["@pickstar-2002/video-clip-mcp@latest"],
 )
-mcpTool = McpToolset(
-    connection_params=StdioConnectionParams(
-        server_params=server_parameters, timeout=600.0
-    ),
+# 首次启动时安装并固定版本，之后在后台维持预热的 Server 进程（MCP_WARM_POOL_SIZE=0 关闭）
+mcpTool = warm_mcp_toolset(
+    "video-clip",
+    server_parameters,
+    timeout=600.0,
     errlog=None,
 )
 
@@ -0,0 +1,81 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+MCP Server 冷启动 / 预热首调用耗时对比
+
+冷启动：与 McpToolset 默认行为一致，首次调用时才启动 npx/uvx 进程并握手；
+预热：McpServerSupervisor 提前安装并启动进程，首次调用直接使用就绪会话。
+两种方式均以 list_tools 作为“首次调用”。
+
+    python benchmark_mcp_startup.py --rounds 3
+    python benchmark_mcp_startup.py -- uvx --from <spec> <command>
+"""
+
+import argparse
+import asyncio
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from mcp_supervisor import McpServerSupervisor
+
+DEFAULT_COMMAND = ["npx", "@pickstar-2002/video-clip-mcp@latest"]
+
+
+async def _cold_first_call(params: StdioServerParameters) -> float:
+    start = time.perf_counter()
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            return time.perf_counter() - start
+
+
+async def _warm_first_call(supervisor: McpServerSupervisor) -> float:
+    start = time.perf_counter()
+    session = await supervisor.acquire()
+    await session.list_tools()
+    return time.perf_counter() - start
+
+
+async def main(command: list[str], rounds: int):
+    params = StdioServerParameters(command=command[0], args=command[1:])
+
+    for i in range(rounds):
+        elapsed = await _cold_first_call(params)
+        print(f"cold  first call #{i + 1}: {elapsed * 1000:9.1f} ms")
+
+    supervisor = McpServerSupervisor("benchmark", params, timeout=600.0).start()
+    try:
+        # 等待安装、启动与握手完成（对应服务启动阶段，不计入首次调用）
+        await supervisor.acquire()
+        for i in range(rounds):
+            elapsed = await _warm_first_call(supervisor)
+            print(f"warm  first call #{i + 1}: {elapsed * 1000:9.1f} ms")
+        print(supervisor.stats())
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=3, help="每种方式的重复次数")
+    parser.add_argument(
+        "command", nargs=argparse.REMAINDER, help="MCP Server 启动命令（-- 之后）"
+    )
+    args = parser.parse_args()
+    command = [arg for arg in args.command if arg != "--"] or DEFAULT_COMMAND
+    asyncio.run(main(command, args.rounds))
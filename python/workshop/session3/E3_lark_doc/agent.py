@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import hashlib
 from typing import Any
 
 from veadk import Agent
@@ -19,6 +21,8 @@ import json
 
 import lark_oapi as lark
 from lark_oapi.api.docx.v1 import (
+    GetDocumentRequest,
+    GetDocumentResponse,
     RawContentDocumentRequest,
     RawContentDocumentResponse,
 )
@@ -33,15 +37,56 @@ from google.adk.tools.tool_context import ToolContext
 from veadk.integrations.ve_identity.auth_mixins import OAuth2AuthMixin
 from veadk.memory.short_term_memory import ShortTermMemory
 
+from .doc_cache import CHUNK_SIZE, DocumentCache, rank_chunks
+
 short_term_memory = ShortTermMemory(backend="local")
 
+# 所有调用共享一个客户端，用户令牌通过 RequestOption 逐次传入
+lark_client = (
+    lark.Client.builder().enable_set_token(True).log_level(lark.LogLevel.INFO).build()
+)
+document_cache = DocumentCache()
+
+
+def _log_failure(api: str, response: Any) -> None:
+    lark.logger.error(
+        f"{api} failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
+    )
+
+
+def _get_revision(document_id: str, option: RequestOption) -> GetDocumentResponse:
+    request: GetDocumentRequest = (
+        GetDocumentRequest.builder().document_id(document_id).build()
+    )
+    return lark_client.docx.v1.document.get(request, option)
+
 
-async def lark_document_query(document_id: str, *, access_token: str) -> str:
+def _get_raw_content(
+    document_id: str, option: RequestOption
+) -> RawContentDocumentResponse:
+    request: RawContentDocumentRequest = (
+        RawContentDocumentRequest.builder().lang(0).document_id(document_id).build()
+    )
+    return lark_client.docx.v1.document.raw_content(request, option)
+
+
+async def lark_document_query(
+    document_id: str,
+    query: str = "",
+    chunk_index: int = -1,
+    *,
+    access_token: str,
+) -> str:
     """
     查询飞书文档内容
 
+    文档较大时会被切分为多个分块：传入 query 只返回与问题相关的分块，
+    传入 chunk_index 返回指定分块；都不传时返回第一个分块和分块总数。
+
     Args:
         document_id: 飞书文档ID（从文档链接中提取的最后一部分）
+        query: 可选，与问题相关的关键词，用于在大文档中挑选相关分块
+        chunk_index: 可选，需要读取的分块序号（从 0 开始）
         access_token: 飞书 API OAuth2.0 访问令牌
 
     Returns:
@@ -51,28 +96,50 @@ async def lark_document_query(document_id: str, *, access_token: str) -> str:
         print(f"查询飞书文档: {document_id}")
         print(f"使用访问令牌: {access_token[:8]}...")
 
-        client = (
-            lark.Client.builder()
-            .enable_set_token(True)
-            .log_level(lark.LogLevel.INFO)
-            .build()
-        )
-        request: RawContentDocumentRequest = (
-            RawContentDocumentRequest.builder().lang(0).document_id(document_id).build()
-        )
+        option = RequestOption.builder().user_access_token(access_token).build()
+        # 以令牌摘要区分用户，避免不同用户之间共享缓存内容
+        user_key = hashlib.sha256(access_token.encode()).hexdigest()[:16]
 
-        response: RawContentDocumentResponse = client.docx.v1.document.raw_content(
-            request, RequestOption.builder().user_access_token(access_token).build()
+        # 先用轻量的元数据接口取 revision_id，判断缓存是否仍然有效
+        meta: GetDocumentResponse = await asyncio.to_thread(
+            _get_revision, document_id, option
         )
-
-        if not response.success():
-            lark.logger.error(
-                f"client.docx.v1.document.raw_content failed, code: {response.code}, msg: {response.msg}, log_id: {response.get_log_id()}, resp: \n{json.dumps(json.loads(response.raw.content), indent=4, ensure_ascii=False)}"
+        if not meta.success():
+            _log_failure("client.docx.v1.document.get", meta)
+            return f"文档查询失败: {meta.msg}"
+        revision_id = meta.data.document.revision_id
+
+        cached = document_cache.get(user_key, document_id, revision_id)
+        if cached is None:
+            response: RawContentDocumentResponse = await asyncio.to_thread(
+                _get_raw_content, document_id, option
+            )
+            if not response.success():
+                _log_failure("client.docx.v1.document.raw_content", response)
+                return f"文档查询失败: {response.msg}"
+            cached = document_cache.put(
+                user_key, document_id, revision_id, response.data.content or ""
             )
-            return f"文档查询失败: {response.msg}"
 
         # 处理业务结果
-        return lark.JSON.marshal(response.data, indent=4)
+        chunks = cached.chunks
+        if len(cached.content) <= CHUNK_SIZE:
+            selected = list(range(len(chunks)))
+        elif 0 <= chunk_index < len(chunks):
+            selected = [chunk_index]
+        else:
+            selected = rank_chunks(chunks, query) or [0]
+
+        return json.dumps(
+            {
+                "document_id": document_id,
+                "revision_id": revision_id,
+                "total_chunks": len(chunks),
+                "chunks": [{"index": i, "content": chunks[i]} for i in selected],
+            },
+            indent=4,
+            ensure_ascii=False,
+        )
 
     except Exception as e:
         return f"文档查询出错: {str(e)}"
@@ -113,7 +180,7 @@ agent: Agent = Agent(
 
 1. 识别用户消息中的飞书文档链接（格式如：https://feishu.feishu.cn/docx/WtwHdAngzoEU9IxyfhtcYsHCnDe）
 2. 提取文档ID（链接最后一部分，如：WtwHdAngzoEU9IxyfhtcYsHCnDe）
-3. 使用 lark_document_query 函数获取文档内容
+3. 使用 lark_document_query 函数获取文档内容；对于较长的文档，传入 query 获取与问题相关的分块，或通过 chunk_index 逐块阅读
 4. 基于文档内容回答用户的问题或提供分析
 
 功能特点：
@@ -0,0 +1,112 @@
+# Copyright (c) 2025 Beijing Volcano Engine Technology Co., Ltd. and/or its affiliates.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""按用户缓存的飞书文档内容，以 document_id + revision_id 作为新鲜度校验依据。"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+# 单个分块的目标字符数，超过该长度的文档会被切分后按需返回
+CHUNK_SIZE = 4000
+# 缓存的最大文档数（跨用户总数）
+MAX_ENTRIES = 128
+
+_HEADING_RE = re.compile(r"^(#{1,6}\s|\d+(\.\d+)*[\.、\s]|[一二三四五六七八九十]+、)")
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+|[一-鿿]")
+
+
+@dataclass
+class CachedDocument:
+    revision_id: int
+    content: str
+    chunks: list[str] = field(default_factory=list)
+
+
+def split_chunks(content: str, chunk_size: int = CHUNK_SIZE) -> list[str]:
+    """按段落切分文档，尽量在标题处断开，每块不超过 chunk_size 个字符。"""
+    chunks: list[str] = []
+    current: list[str] = []
+    current_len = 0
+    for paragraph in content.split("\n"):
+        is_heading = bool(_HEADING_RE.match(paragraph.strip()))
+        if current and (
+            current_len + len(paragraph) > chunk_size
+            or (is_heading and current_len > chunk_size // 2)
+        ):
+            chunks.append("\n".join(current))
+            current, current_len = [], 0
+        # 超长段落直接硬切
+        while len(paragraph) > chunk_size:
+            chunks.append(paragraph[:chunk_size])
+            paragraph = paragraph[chunk_size:]
+        current.append(paragraph)
+        current_len += len(paragraph) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return [c for c in chunks if c.strip()] or [""]
+
+
+def rank_chunks(chunks: list[str], query: str, top_k: int = 3) -> list[int]:
+    """按查询词命中次数为分块打分，返回得分最高的分块下标（保持文档顺序）。"""
+    terms = {t.lower() for t in _TOKEN_RE.findall(query)}
+    if not terms:
+        return []
+    scores = []
+    for idx, chunk in enumerate(chunks):
+        lowered = chunk.lower()
+        score = sum(lowered.count(term) for term in terms)
+        if score:
+            scores.append((score, idx))
+    scores.sort(key=lambda item: (-item[0], item[1]))
+    return sorted(idx for _, idx in scores[:top_k])
+
+
+class DocumentCache:
+    """线程安全的 LRU 文档缓存，键为 (user_key, document_id)。"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], CachedDocument] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, user_key: str, document_id: str, revision_id: int
+    ) -> CachedDocument | None:
+        key = (user_key, document_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.revision_id != revision_id:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(
+        self, user_key: str, document_id: str, revision_id: int, content: str
+    ) -> CachedDocument:
+        entry = CachedDocument(
+            revision_id=revision_id, content=content, chunks=split_chunks(content)
+        )
+        key = (user_key, document_id)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
@@ -1,9 +1,14 @@
 import argparse
 import asyncio
+import base64
+import hashlib
 import json
 import os
+import random
+import struct
 import sys
-from typing import Dict
+import tempfile
+from typing import Dict, Optional
 
 import httpx
 
@@ -13,6 +18,20 @@ API_BASE = os.getenv(
 ).rstrip("/")
 DEFAULT_MODEL = "doubao-seedream-5-0-260128"
 
+# Max concurrent API calls, and retries for rate-limited (429) responses
+CONCURRENCY = int(os.getenv("IMAGE_GENERATE_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.getenv("IMAGE_GENERATE_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY = float(os.getenv("IMAGE_GENERATE_RETRY_BASE_DELAY", "1.0"))
+RETRY_MAX_DELAY = 30.0
+# b64_json images are written here instead of being inlined in the result
+OUTPUT_DIR = os.getenv(
+    "IMAGE_GENERATE_OUTPUT_DIR",
+    os.path.join(tempfile.gettempdir(), "image_generate"),
+)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop = None
+
 
 def _get_headers() -> dict:
     return {
@@ -46,28 +65,122 @@ def _build_request_body(item: dict, model_name: str) -> dict:
     return body
 
 
+def _get_client() -> httpx.AsyncClient:
+    # One pooled client for all tasks; rebuilt if the event loop changes
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+        )
+        _client_loop = loop
+    return _client
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    # Exponential backoff with full jitter so concurrent tasks do not retry in lockstep
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
 async def _call_image_api(item: dict, model_name: str, timeout: int) -> dict:
     url = f"{API_BASE}/images/generations"
     body = _build_request_body(item, model_name)
 
-    async with httpx.AsyncClient(timeout=float(timeout)) as client:
-        response = await client.post(url, headers=_get_headers(), json=body)
+    for attempt in range(MAX_RETRIES + 1):
+        response = await _get_client().post(
+            url, headers=_get_headers(), json=body, timeout=float(timeout)
+        )
+        if response.status_code == 429 and attempt < MAX_RETRIES:
+            delay = _retry_delay(response, attempt)
+            print(f"Rate limited (429), retrying in {delay:.1f}s...", file=sys.stderr)
+            await asyncio.sleep(delay)
+            continue
         response.raise_for_status()
         return response.json()
 
 
+def _image_size(data: bytes) -> tuple[Optional[int], Optional[int], str]:
+    """Read (width, height, extension) from PNG / JPEG / WebP headers."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height, "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        chunk = data[12:16]
+        if chunk == b"VP8X":
+            width = int.from_bytes(data[24:27], "little") + 1
+            height = int.from_bytes(data[27:30], "little") + 1
+            return width, height, "webp"
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return width & 0x3FFF, height & 0x3FFF, "webp"
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, "webp"
+        return None, None, "webp"
+    if data[:2] == b"\xff\xd8":
+        pos = 2
+        while pos + 9 < len(data):
+            if data[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = data[pos + 1]
+            # SOF0-SOF15 except DHT (C4), JPG (C8) and DAC (CC) carry the frame size
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[pos + 5 : pos + 9])
+                return width, height, "jpeg"
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                pos += 1 if marker == 0xFF else 2
+                continue
+            pos += 2 + struct.unpack(">H", data[pos + 2 : pos + 4])[0]
+        return None, None, "jpeg"
+    return None, None, "png"
+
+
+def _save_b64_image(b64: str, image_name: str) -> dict:
+    """Decode a b64_json image to OUTPUT_DIR and return its path and dimensions."""
+    data = base64.b64decode(b64)
+    width, height, ext = _image_size(data)
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, f"{image_name}_{digest}.{ext}")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return {
+        "image_name": image_name,
+        "path": path,
+        "width": width,
+        "height": height,
+        "bytes": len(data),
+    }
+
+
 async def handle_single_task(
     idx: int,
     item: dict,
     timeout: int,
     model_name: str,
-) -> tuple[list[dict], list[str], list[dict]]:
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> tuple[list[dict], list[str], list[dict], list[dict]]:
     success_list = []
     error_list = []
     error_detail_list = []
+    image_info_list = []
 
     try:
-        response = await _call_image_api(item, model_name, timeout)
+        if semaphore:
+            async with semaphore:
+                response = await _call_image_api(item, model_name, timeout)
+        else:
+            response = await _call_image_api(item, model_name, timeout)
 
         if "error" not in response:
             data_list = response.get("data", [])
@@ -91,9 +204,10 @@ async def handle_single_task(
                 else:
                     b64 = image_data.get("b64_json")
                     if b64:
-                        success_list.append(
-                            {image_name: f"data:image/png;base64,{b64}"}
-                        )
+                        # Keep the base64 payload out of the tool output (and model context)
+                        info = await asyncio.to_thread(_save_b64_image, b64, image_name)
+                        success_list.append({image_name: info["path"]})
+                        image_info_list.append(info)
                     else:
                         error_list.append(image_name)
                         error_detail_list.append(
@@ -112,13 +226,14 @@ async def handle_single_task(
         error_list.append(f"task_{idx}")
         error_detail_list.append({"task_idx": idx, "error": str(e)})
 
-    return success_list, error_list, error_detail_list
+    return success_list, error_list, error_detail_list, image_info_list
 
 
 async def image_generate(
     tasks: list[dict],
     timeout: int = 600,
     model_name: str = None,
+    concurrency: int = CONCURRENCY,
 ) -> Dict:
     model = model_name or os.getenv("MODEL_IMAGE_NAME", DEFAULT_MODEL)
 
@@ -133,9 +248,12 @@ async def image_generate(
     success_list = []
     error_list = []
     error_detail_list = []
+    image_info_list = []
 
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
     coroutines = [
-        handle_single_task(idx, item, timeout, model) for idx, item in enumerate(tasks)
+        handle_single_task(idx, item, timeout, model, semaphore)
+        for idx, item in enumerate(tasks)
     ]
 
     results = await asyncio.gather(*coroutines, return_exceptions=True)
@@ -145,17 +263,21 @@ async def image_generate(
             error_list.append("unknown_task_exception")
             error_detail_list.append({"error": str(res)})
             continue
-        s, e, ed = res
+        s, e, ed, info = res
         success_list.extend(s)
         error_list.extend(e)
         error_detail_list.extend(ed)
+        image_info_list.extend(info)
 
-    return {
+    result = {
         "status": "success" if success_list else "error",
         "success_list": success_list,
         "error_list": error_list,
         "error_detail_list": error_detail_list,
     }
+    if image_info_list:
+        result["image_info_list"] = image_info_list
+    return result
 
 
 def main():
@@ -1,8 +1,11 @@
 import argparse
 import asyncio
+import hashlib
 import json
 import os
 import sys
+import tempfile
+import time
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
@@ -14,6 +17,20 @@ API_BASE = os.getenv(
 ).rstrip("/")
 DEFAULT_MODEL = "doubao-seedance-2-0-260128"
 
+# Task journal (JSON lines): task IDs are recorded as soon as tasks are created so
+# that a crashed or timed-out run can resume polling instead of regenerating.
+# Set VIDEO_GENERATE_JOURNAL=off to disable.
+JOURNAL_PATH = os.getenv(
+    "VIDEO_GENERATE_JOURNAL",
+    os.path.join(tempfile.gettempdir(), "video_generate_tasks.jsonl"),
+)
+JOURNAL_RETENTION_SECONDS = int(os.getenv("VIDEO_GENERATE_JOURNAL_RETENTION", "604800"))
+# Journal states whose result has not been delivered yet and can be resumed
+RESUMABLE_STATES = {"created", "pending"}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop = None
+
 
 @dataclass
 class VideoTaskResult:
@@ -157,25 +174,106 @@ def _build_request_body(
     return body
 
 
-async def _create_video_task(
-    prompt: str, config: VideoGenerationConfig, model_name: str
-) -> dict:
-    url = f"{API_BASE}/contents/generations/tasks"
-    body = _build_request_body(prompt, config, model_name)
+def _get_client() -> httpx.AsyncClient:
+    # One pooled client for all create / poll calls; rebuilt if the loop changes
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        _client_loop = loop
+    return _client
+
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(url, headers=_get_headers(), json=body)
-        response.raise_for_status()
-        return response.json()
+async def _create_video_task(body: dict) -> dict:
+    url = f"{API_BASE}/contents/generations/tasks"
+    response = await _get_client().post(url, headers=_get_headers(), json=body)
+    response.raise_for_status()
+    return response.json()
 
 
 async def _get_task_status(task_id: str) -> dict:
     url = f"{API_BASE}/contents/generations/tasks/{task_id}"
+    response = await _get_client().get(url, headers=_get_headers())
+    response.raise_for_status()
+    return response.json()
+
+
+class TaskJournal:
+    """Append-only JSON lines journal of video tasks keyed by item fingerprint."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        # Keys already taken by an item of the current run
+        self._claimed = set()
+        if not os.path.exists(path):
+            return
+        cutoff = time.time() - JOURNAL_RETENTION_SECONDS
+        lines = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial line from a crashed write
+                if entry.get("updated_at", 0) >= cutoff:
+                    self.entries[entry["key"]] = entry
+                else:
+                    self.entries.pop(entry["key"], None)
+        # Compact once superseded lines dominate the file
+        if lines > 2 * len(self.entries) + 100:
+            self._rewrite()
+
+    @staticmethod
+    def fingerprint(video_name: str, body: dict, occurrence: int = 0) -> str:
+        # occurrence separates identical items (e.g. several candidates of one shot)
+        payload = json.dumps(
+            [video_name, body, occurrence], sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def resumable(self, key: str) -> Optional[dict]:
+        """Return the entry to resume for key; each entry is resumed at most once per run."""
+        if key in self._claimed:
+            return None
+        self._claimed.add(key)
+        entry = self.entries.get(key)
+        if entry and entry.get("status") in RESUMABLE_STATES and entry.get("task_id"):
+            return entry
+        return None
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.get(url, headers=_get_headers())
-        response.raise_for_status()
-        return response.json()
+    def record(self, key: str, result: VideoTaskResult):
+        entry = {
+            "key": key,
+            "video_name": result.video_name,
+            "task_id": result.task_id,
+            "status": result.status,
+            "updated_at": time.time(),
+        }
+        self.entries[key] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _rewrite(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+def _open_journal() -> Optional[TaskJournal]:
+    if not JOURNAL_PATH or JOURNAL_PATH.lower() in ("off", "none", "0"):
+        return None
+    try:
+        return TaskJournal(JOURNAL_PATH)
+    except OSError as e:
+        print(f"Warning: task journal disabled ({e})")
+        return None
 
 
 def _parse_item_to_config(item: dict) -> VideoGenerationConfig:
@@ -197,13 +295,11 @@ def _parse_item_to_config(item: dict) -> VideoGenerationConfig:
     )
 
 
-async def _process_single_item(item: dict, model_name: str) -> VideoTaskResult:
+async def _process_single_item(item: dict, body: dict) -> VideoTaskResult:
     video_name = item["video_name"]
-    prompt = item["prompt"]
-    config = _parse_item_to_config(item)
 
     try:
-        task_data = await _create_video_task(prompt, config, model_name)
+        task_data = await _create_video_task(body)
         task_id = task_data.get("id")
         return VideoTaskResult(
             video_name=video_name,
@@ -241,9 +337,17 @@ async def _poll_task_status(
 ) -> VideoTaskResult:
     max_polls = max_wait_seconds // poll_interval
     polls = 0
+    result = {}
 
     while polls < max_polls:
-        result = await _get_task_status(task_id)
+        try:
+            result = await _get_task_status(task_id)
+        except httpx.TransportError as e:
+            # Transient network errors should not abandon a task that is still running
+            print(f"Video {video_name} status query failed: {e}, retrying...")
+            await asyncio.sleep(poll_interval)
+            polls += 1
+            continue
         status = result.get("status")
 
         if status == "succeeded":
@@ -271,7 +375,6 @@ async def _poll_task_status(
         await asyncio.sleep(poll_interval)
         polls += 1
 
-    result = await _get_task_status(task_id)
     return VideoTaskResult(
         video_name=video_name,
         task_id=task_id,
@@ -303,6 +406,55 @@ async def video_task_query(task_id: str) -> Dict:
     return response
 
 
+async def _run_item(
+    item: dict,
+    body: dict,
+    key: str,
+    max_wait_seconds: int,
+    window: asyncio.Semaphore,
+    journal: Optional[TaskJournal],
+) -> VideoTaskResult:
+    """Create (or resume) one task and poll it, holding one window slot."""
+    async with window:
+        video_name = item["video_name"]
+
+        entry = journal.resumable(key) if journal else None
+        if entry:
+            print(f"Video {video_name} resuming task {entry['task_id']}")
+            try:
+                result = await _poll_task_status(
+                    entry["task_id"], video_name, max_wait_seconds
+                )
+            except httpx.HTTPStatusError as e:
+                # Expired or unknown task: fall through and create a new one
+                print(f"Video {video_name} cannot resume task: {e}")
+            else:
+                journal.record(key, result)
+                return result
+
+        created = await _process_single_item(item, body)
+        if created.status != "created" or not created.task_id:
+            return created
+        if journal:
+            journal.record(key, created)
+
+        try:
+            result = await _poll_task_status(
+                created.task_id, video_name, max_wait_seconds
+            )
+        except httpx.HTTPStatusError as e:
+            result = VideoTaskResult(
+                video_name=video_name,
+                task_id=created.task_id,
+                error=str(e),
+                error_detail={"raw_error": str(e)},
+                status="failed",
+            )
+        if journal:
+            journal.record(key, result)
+        return result
+
+
 async def video_generate(
     params: list,
     batch_size: int = 10,
@@ -316,56 +468,44 @@ async def video_generate(
     error_details = []
     pending_list = []
 
-    for start_idx in range(0, len(params), batch_size):
-        batch = params[start_idx : start_idx + batch_size]
-
-        task_results = await asyncio.gather(
-            *[_process_single_item(item, model) for item in batch]
-        )
-
-        created_tasks = []
-        for r in task_results:
-            if r.status == "created" and r.task_id:
-                created_tasks.append(r)
-            elif r.status == "failed":
-                error_list.append(r.video_name)
-                if r.error_detail:
-                    error_details.append(
-                        {
-                            "video_name": r.video_name,
-                            "error": r.error_detail,
-                        }
-                    )
-
-        poll_results = await asyncio.gather(
-            *[
-                _poll_task_status(r.task_id, r.video_name, max_wait_seconds)
-                for r in created_tasks
-            ]
-        )
-
-        for result in poll_results:
-            if result.status == "succeeded":
-                success_list.append({result.video_name: result.video_url})
-                print(f"Video {result.video_name} completed: {result.video_url}")
-            elif result.status == "failed":
-                error_list.append(result.video_name)
+    # Sliding window: keep up to batch_size tasks in flight and start the next
+    # item as soon as any task finishes, so one slow video does not block others
+    window = asyncio.Semaphore(max(batch_size, 1))
+    journal = _open_journal()
+    runs = []
+    occurrences: Dict[str, int] = {}
+    for item in params:
+        body = _build_request_body(item["prompt"], _parse_item_to_config(item), model)
+        base_key = TaskJournal.fingerprint(item["video_name"], body)
+        occurrence = occurrences.get(base_key, 0)
+        occurrences[base_key] = occurrence + 1
+        key = TaskJournal.fingerprint(item["video_name"], body, occurrence)
+        runs.append(_run_item(item, body, key, max_wait_seconds, window, journal))
+    results = await asyncio.gather(*runs)
+
+    for result in results:
+        if result.status == "succeeded":
+            success_list.append({result.video_name: result.video_url})
+            print(f"Video {result.video_name} completed: {result.video_url}")
+        elif result.status == "failed":
+            error_list.append(result.video_name)
+            if result.error_detail:
                 error_details.append(
                     {
                         "video_name": result.video_name,
                         "error": result.error_detail,
                     }
                 )
-                print(f"Video {result.video_name} failed: {result.error}")
-            elif result.status == "pending":
-                pending_list.append(
-                    {
-                        "video_name": result.video_name,
-                        "task_id": result.task_id,
-                        "execution_expires_after": result.execution_expires_after,
-                        "message": f"Task still running. Use video_task_query('{result.task_id}') to check status later.",
-                    }
-                )
+            print(f"Video {result.video_name} failed: {result.error}")
+        elif result.status == "pending":
+            pending_list.append(
+                {
+                    "video_name": result.video_name,
+                    "task_id": result.task_id,
+                    "execution_expires_after": result.execution_expires_after,
+                    "message": f"Task still running. Use video_task_query('{result.task_id}') to check status later, or rerun with the same params to resume.",
+                }
+            )
 
     if success_list and not error_list and not pending_list:
         status = "success"
@@ -13,9 +13,13 @@
 
 import os
 import sys
+import time
 import argparse
+import hashlib
 import json
-from typing import Optional, Any, Dict
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Dict, Iterator, List
 
 try:
     import volcenginesdkcore
@@ -35,19 +39,174 @@ except ImportError as e:
     sys.exit(1)
 
 
+# 响应缓存 TTL（秒），0 表示关闭；缓存同时写入本地目录，跨多次脚本调用复用
+CACHE_TTL = float(os.getenv("RDS_MYSQL_CACHE_TTL", "60"))
+CACHE_DIR = os.getenv(
+    "RDS_MYSQL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "rds_mysql_cache")
+)
+# 全量分页查询时的每页记录数与并发页数
+LIST_ALL_PAGE_SIZE = int(os.getenv("RDS_MYSQL_LIST_ALL_PAGE_SIZE", "100"))
+LIST_ALL_CONCURRENCY = int(os.getenv("RDS_MYSQL_LIST_ALL_CONCURRENCY", "4"))
+
+# 支持全量分页的资源: 资源名 -> (分页方法, 列表字段, 总数字段)
+PAGINATED_RESOURCES = {
+    "instances": ("list_instances", "instances", "total"),
+    "databases": ("list_databases", "databases", "total"),
+    "accounts": ("list_accounts", "accounts", "total"),
+    "vpcs": ("list_vpcs", "vpcs", "total_count"),
+    "subnets": ("list_subnets", "subnets", "total_count"),
+}
+# 列表类响应中的记录字段，字段投影作用于其中每条记录
+LIST_RESPONSE_KEYS = {items_key for _, items_key, _ in PAGINATED_RESOURCES.values()} | {
+    "parameters",
+    "template_infos",
+}
+
+
+class ResponseCache:
+    """按 (地域, 接口, 请求参数) 缓存查询结果的短 TTL 缓存（内存 + 本地文件）"""
+
+    def __init__(self, ttl: float = CACHE_TTL, cache_dir: Optional[str] = CACHE_DIR):
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, tuple] = {}
+        if self.ttl > 0 and self.cache_dir:
+            self._prune()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.ttl <= 0:
+            return None
+        entry = self._memory.get(key)
+        if entry is None and self.cache_dir:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                entry = (stored["expires_at"], stored["data"])
+            except (OSError, ValueError, KeyError):
+                return None
+        if entry is None or entry[0] < time.time():
+            return None
+        self._memory[key] = entry
+        return entry[1]
+
+    def set(self, key: str, data: Any):
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        self._memory[key] = (expires_at, data)
+        if not self.cache_dir:
+            return
+        try:
+            # 缓存内容包含账号资源清单，目录仅当前用户可读写
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            # 目录可能由旧版本创建，不属于当前用户时 chmod 失败，跳过写缓存
+            os.chmod(self.cache_dir, 0o700)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"expires_at": expires_at, "data": data},
+                    f,
+                    ensure_ascii=False,
+                    default=str,
+                )
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            pass  # 缓存写入失败不影响查询结果
+
+    def _prune(self):
+        """清理已过期较久的缓存文件"""
+        cutoff = time.time() - max(self.ttl, 3600)
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _pick(data: Any, path: List[str]) -> Any:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def project_fields(data: Any, fields: Optional[List[str]]) -> Any:
+    """
+    字段投影：只保留需要的字段，支持点号路径（如 basic_info.instance_status）。
+
+    列表响应（如 {"instances": [...], "total": 3}）对 LIST_RESPONSE_KEYS 中的记录逐条投影
+    并保留其他字段，其他响应（如实例详情）直接对对象本身投影。
+    """
+    if not fields:
+        return data
+    paths = [field.split(".") for field in fields]
+
+    def project_item(item: Any) -> Any:
+        if not isinstance(item, dict):
+            return item
+        result: Dict[str, Any] = {}
+        for path in paths:
+            value = _pick(item, path)
+            if value is None:
+                continue
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        return result
+
+    if isinstance(data, list):
+        return [project_item(item) for item in data]
+    if isinstance(data, dict):
+        list_keys = [
+            k
+            for k, v in data.items()
+            if k in LIST_RESPONSE_KEYS and isinstance(v, list)
+        ]
+        if list_keys:
+            return {
+                k: [project_item(i) for i in v] if k in list_keys else v
+                for k, v in data.items()
+            }
+        return project_item(data)
+    return data
+
+
 class RDSMySQLClient:
     """火山引擎 RDS MySQL 客户端封装"""
 
-    def __init__(self, region: str = "cn-beijing", endpoint: Optional[str] = None):
+    def __init__(
+        self,
+        region: str = "cn-beijing",
+        endpoint: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
         """
         初始化 RDS MySQL 客户端
 
         Args:
             region: 地域 ID，默认为 cn-beijing
             endpoint: API 端点（可选）
+            cache: 查询结果缓存（可选，默认按 RDS_MYSQL_CACHE_TTL 创建）
         """
         self.region = region
         self.endpoint = endpoint
+        self.cache = cache if cache is not None else ResponseCache()
         self.client = self._create_client()
         self.vpc_client = self._create_vpc_client()
 
@@ -98,6 +257,78 @@ class RDSMySQLClient:
             return {k: self._to_dict(v) for k, v in obj.items()}
         return obj
 
+    def _call(self, api: str, req_params: Dict[str, Any], request) -> Dict[str, Any]:
+        """调用查询接口并转换为字典，结果按 (地域, 接口, 请求参数) 短时缓存"""
+        key = ResponseCache.make_key(
+            os.getenv("VOLCENGINE_ACCESS_KEY"),
+            self.region,
+            self.endpoint,
+            api,
+            req_params,
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = self._to_dict(request())
+        self.cache.set(key, result)
+        return result
+
+    def iter_all(
+        self,
+        resource: str,
+        page_size: int = LIST_ALL_PAGE_SIZE,
+        concurrency: int = LIST_ALL_CONCURRENCY,
+        **filters: Any,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐条产出资源的全部记录：先查第一页获取总数，其余页并发查询，按页序产出。
+
+        Args:
+            resource: 资源名（instances / databases / accounts / vpcs / subnets）
+            page_size: 每页记录数
+            concurrency: 并发查询的页数上限
+            **filters: 传给对应 list_* 方法的过滤参数（如 instance_id）
+        """
+        if resource not in PAGINATED_RESOURCES:
+            raise ValueError(
+                f"不支持全量分页的资源: {resource}，可选: {', '.join(PAGINATED_RESOURCES)}"
+            )
+        method_name, items_key, total_key = PAGINATED_RESOURCES[resource]
+        list_page = getattr(self, method_name)
+
+        first = list_page(page_number=1, page_size=page_size, **filters)
+        yield from first.get(items_key) or []
+
+        total = first.get(total_key) or 0
+        pages = (total + page_size - 1) // page_size
+        if pages <= 1:
+            return
+
+        def fetch(page_number: int) -> List[Dict[str, Any]]:
+            page = list_page(page_number=page_number, page_size=page_size, **filters)
+            return page.get(items_key) or []
+
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            for items in executor.map(fetch, range(2, pages + 1)):
+                yield from items
+
+    def list_all(
+        self,
+        resource: str,
+        page_size: int = LIST_ALL_PAGE_SIZE,
+        concurrency: int = LIST_ALL_CONCURRENCY,
+        fields: Optional[List[str]] = None,
+        **filters: Any,
+    ) -> Dict[str, Any]:
+        """查询资源的全部记录，返回 {列表字段: [...], "total": 总数}，可按 fields 投影"""
+        items = list(
+            self.iter_all(
+                resource, page_size=page_size, concurrency=concurrency, **filters
+            )
+        )
+        items_key = PAGINATED_RESOURCES[resource][1]
+        return project_fields({items_key: items, "total": len(items)}, fields)
+
     def list_instances(
         self,
         page_number: int = 1,
@@ -118,17 +349,23 @@ class RDSMySQLClient:
         if instance_status:
             req_params["instance_status"] = instance_status
 
-        resp = self.client.describe_db_instances(
-            models.DescribeDBInstancesRequest(**req_params)
+        return self._call(
+            "describe_db_instances",
+            req_params,
+            lambda: self.client.describe_db_instances(
+                models.DescribeDBInstancesRequest(**req_params)
+            ),
         )
-        return self._to_dict(resp)
 
     def describe_instance(self, instance_id: str) -> Dict[str, Any]:
         """查询指定实例详情"""
-        resp = self.client.describe_db_instance_detail(
-            models.DescribeDBInstanceDetailRequest(instance_id=instance_id)
+        return self._call(
+            "describe_db_instance_detail",
+            {"instance_id": instance_id},
+            lambda: self.client.describe_db_instance_detail(
+                models.DescribeDBInstanceDetailRequest(instance_id=instance_id)
+            ),
         )
-        return self._to_dict(resp)
 
     def list_databases(
         self,
@@ -146,10 +383,13 @@ class RDSMySQLClient:
         if db_name:
             req_params["db_name"] = db_name
 
-        resp = self.client.describe_databases(
-            models.DescribeDatabasesRequest(**req_params)
+        return self._call(
+            "describe_databases",
+            req_params,
+            lambda: self.client.describe_databases(
+                models.DescribeDatabasesRequest(**req_params)
+            ),
         )
-        return self._to_dict(resp)
 
     def list_accounts(
         self,
@@ -167,10 +407,13 @@ class RDSMySQLClient:
         if account_name:
             req_params["account_name"] = account_name
 
-        resp = self.client.describe_db_accounts(
-            models.DescribeDBAccountsRequest(**req_params)
+        return self._call(
+            "describe_db_accounts",
+            req_params,
+            lambda: self.client.describe_db_accounts(
+                models.DescribeDBAccountsRequest(**req_params)
+            ),
         )
-        return self._to_dict(resp)
 
     def list_parameters(
         self,
@@ -185,10 +428,13 @@ class RDSMySQLClient:
         if node_id:
             req_params["node_id"] = node_id
 
-        resp = self.client.describe_db_instance_parameters(
-            models.DescribeDBInstanceParametersRequest(**req_params)
+        return self._call(
+            "describe_db_instance_parameters",
+            req_params,
+            lambda: self.client.describe_db_instance_parameters(
+                models.DescribeDBInstanceParametersRequest(**req_params)
+            ),
         )
-        return self._to_dict(resp)
 
     def list_parameter_templates(
         self,
@@ -209,35 +455,56 @@ class RDSMySQLClient:
         if template_source:
             req_params["template_source"] = template_source
 
-        resp = self.client.list_parameter_templates(
-            models.ListParameterTemplatesRequest(**req_params)
+        return self._call(
+            "list_parameter_templates",
+            req_params,
+            lambda: self.client.list_parameter_templates(
+                models.ListParameterTemplatesRequest(**req_params)
+            ),
         )
-        return self._to_dict(resp)
 
     def describe_parameter_template(self, template_id: str) -> Dict[str, Any]:
         """查询参数模板详情"""
-        resp = self.client.describe_parameter_template(
-            models.DescribeParameterTemplateRequest(template_id=template_id)
+        return self._call(
+            "describe_parameter_template",
+            {"template_id": template_id},
+            lambda: self.client.describe_parameter_template(
+                models.DescribeParameterTemplateRequest(template_id=template_id)
+            ),
         )
-        return self._to_dict(resp)
 
     def list_vpcs(self, page_number: int = 1, page_size: int = 10) -> Dict[str, Any]:
         """查询 VPC 列表"""
-        resp = self.vpc_client.describe_vpcs(
-            DescribeVpcsRequest(page_number=page_number, page_size=page_size)
+        req_params = {"page_number": page_number, "page_size": page_size}
+        return self._call(
+            "describe_vpcs",
+            req_params,
+            lambda: self.vpc_client.describe_vpcs(DescribeVpcsRequest(**req_params)),
         )
-        return self._to_dict(resp)
 
     def list_subnets(
-        self, vpc_id: str, zone_id: Optional[str] = None
+        self,
+        vpc_id: str,
+        zone_id: Optional[str] = None,
+        page_number: int = 1,
+        page_size: int = 10,
     ) -> Dict[str, Any]:
         """查询子网列表"""
-        req_params = {"vpc_id": vpc_id}
+        req_params = {
+            "vpc_id": vpc_id,
+            "page_number": page_number,
+            "page_size": page_size,
+        }
         if zone_id:
             req_params["zone_id"] = zone_id
 
-        resp = self.vpc_client.describe_subnets(DescribeSubnetsRequest(**req_params))
-        return self._to_dict(resp)
+        return self._call(
+            "describe_subnets",
+            req_params,
+            lambda: self.vpc_client.describe_subnets(
+                DescribeSubnetsRequest(**req_params)
+            ),
+        )
 
     def get_price(
         self,
@@ -302,6 +569,9 @@ def main():
 
   # 查询子网列表
   python call_rds_mysql.py list-subnets --vpc-id vpc-xxx --zone-id cn-beijing-a
+
+  # 并发拉取全部实例，只输出需要的字段
+  python call_rds_mysql.py --all --fields instance_id,instance_name,instance_status list-instances
         """,
     )
 
@@ -452,6 +722,23 @@ def main():
         default=10,
         help="每页记录数（默认: 10）",
     )
+    parser.add_argument(
+        "--all",
+        dest="all_pages",
+        action="store_true",
+        help="并发查询全部分页（适用于 list-instances/databases/accounts/vpcs/subnets）",
+    )
+    parser.add_argument(
+        "--fields",
+        dest="fields",
+        help="只输出指定字段，逗号分隔，支持点号路径（如 instance_id,node_spec）",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="不使用查询结果缓存",
+    )
     parser.add_argument(
         "--output",
         "-o",
@@ -473,11 +760,34 @@ def main():
     print("=" * 60, file=sys.stderr)
 
     try:
-        client = RDSMySQLClient(region=args.region, endpoint=args.endpoint)
+        cache = ResponseCache(ttl=0) if args.no_cache else None
+        client = RDSMySQLClient(region=args.region, endpoint=args.endpoint, cache=cache)
+        fields = [f.strip() for f in args.fields.split(",")] if args.fields else None
 
         result = None
-
-        if args.action == "list-instances":
+        resource = {
+            "list-instances": "instances",
+            "list-databases": "databases",
+            "list-accounts": "accounts",
+            "list-vpcs": "vpcs",
+            "list-subnets": "subnets",
+        }.get(args.action)
+
+        if args.all_pages and resource:
+            filter_names = {
+                "instances": ["instance_id", "instance_name", "instance_status"],
+                "databases": ["instance_id", "db_name"],
+                "accounts": ["instance_id", "account_name"],
+                "vpcs": [],
+                "subnets": ["vpc_id", "zone_id"],
+            }[resource]
+            filters = {
+                name: getattr(args, name)
+                for name in filter_names
+                if getattr(args, name, None)
+            }
+            result = client.list_all(resource, **filters)
+        elif args.action == "list-instances":
             result = client.list_instances(
                 page_number=args.page_number,
                 page_size=args.page_size,
@@ -520,7 +830,10 @@ def main():
             )
         elif args.action == "list-subnets":
             result = client.list_subnets(
-                vpc_id=args.vpc_id, zone_id=getattr(args, "zone_id", None)
+                vpc_id=args.vpc_id,
+                zone_id=getattr(args, "zone_id", None),
+                page_number=args.page_number,
+                page_size=args.page_size,
             )
         elif args.action == "get-price":
             result = client.get_price(
@@ -534,7 +847,7 @@ def main():
             sys.exit(1)
 
         print("[查询结果]", file=sys.stderr)
-        print(format_output(result, args.output))
+        print(format_output(project_fields(result, fields), args.output))
 
     except ValueError as e:
         print(f"\n配置错误: {e}", file=sys.stderr)
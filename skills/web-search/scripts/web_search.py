@@ -16,79 +16,378 @@
 The document of this tool see: https://www.volcengine.com/docs/85508/1650263
 """
 
+import asyncio
+import datetime
+import hashlib
+import hmac
+import json
 import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from typing import Optional
 
+import httpx
 from veadk.auth.veauth.utils import get_credential_from_vefaas_iam
 from veadk.utils.logger import get_logger
 from veadk.utils.volcengine_sign import ve_request
 
 logger = get_logger(__name__)
 
+SERVICE = "volc_torchlight_api"
+VERSION = "2025-01-01"
+REGION = "cn-beijing"
+HOST = "mercury.volcengineapi.com"
+ACTION = "WebSearch"
+CONTENT_TYPE = "application/json"
+REQUEST_TIMEOUT = float(os.getenv("WEB_SEARCH_TIMEOUT", "60"))
 
-def web_search(query: str) -> list[str]:
-    """Search a query in websites.
+# VeFaaS IAM 临时凭据缓存时间（秒），需小于平台轮换凭据文件的周期
+CREDENTIAL_TTL = float(os.getenv("WEB_SEARCH_CREDENTIAL_TTL", "600"))
+# 搜索结果缓存有效期（秒，0 关闭缓存）；设置 WEB_SEARCH_CACHE_DB 时持久化到本地 SQLite
+CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", "3600"))
+CACHE_DB = os.getenv("WEB_SEARCH_CACHE_DB", "")
+CACHE_MAX_ENTRIES = int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", "1024"))
 
-    Args:
-        query: The query to search.
+# hits: 命中缓存；misses: 实际发起搜索；coalesced: 复用进行中的相同查询
+stats: Counter = Counter()
+
+
+def normalize_query(query: str) -> str:
+    """缓存键：大小写折叠并合并空白"""
+    return re.sub(r"\s+", " ", query).strip().casefold()
 
-    Returns:
-        A list of result documents.
-    """
-    if not query:
-        logger.error("Query is empty.")
-        return []
 
-    ak = None
-    sk = None
+# ---------------------------------------------------------------------------
+# 凭据
+# ---------------------------------------------------------------------------
+_credential_lock = threading.Lock()
+_iam_credential: Optional[tuple[str, str, str]] = None
+_iam_credential_expires_at = 0.0
+
+
+def _get_credential() -> tuple[str, str, str]:
+    """Return (ak, sk, session_token); VeFaaS IAM STS credentials are cached."""
+    global _iam_credential, _iam_credential_expires_at
+
     ak = os.getenv("TOOL_WEB_SEARCH_ACCESS_KEY")
     sk = os.getenv("TOOL_WEB_SEARCH_SECRET_KEY")
     if ak and sk:
         logger.debug("Successfully get tool-specific AK/SK.")
-    session_token = ""
-
-    if not (ak and sk):
-        ak = os.getenv("VOLCENGINE_ACCESS_KEY")
-        sk = os.getenv("VOLCENGINE_SECRET_KEY")
-
-    if not (ak and sk):
-        logger.debug("Get AK/SK from environment variables failed.")
-        credential = get_credential_from_vefaas_iam()
-        ak = credential.access_key_id
-        sk = credential.secret_access_key
-        session_token = credential.session_token
-    else:
+        return ak, sk, ""
+
+    ak = os.getenv("VOLCENGINE_ACCESS_KEY")
+    sk = os.getenv("VOLCENGINE_SECRET_KEY")
+    if ak and sk:
         logger.debug("Successfully get AK/SK from environment variables.")
+        return ak, sk, ""
+
+    logger.debug("Get AK/SK from environment variables failed.")
+    with _credential_lock:
+        # 平台在临时凭据过期前轮换凭据文件，旧凭据在 TTL 内仍然有效
+        if _iam_credential is None or time.monotonic() >= _iam_credential_expires_at:
+            credential = get_credential_from_vefaas_iam()
+            _iam_credential = (
+                credential.access_key_id,
+                credential.secret_access_key,
+                credential.session_token,
+            )
+            _iam_credential_expires_at = time.monotonic() + CREDENTIAL_TTL
+        return _iam_credential
+
+
+# ---------------------------------------------------------------------------
+# 结果缓存
+# ---------------------------------------------------------------------------
+class SearchCache:
+    """TTL + LRU cache of search results, optionally backed by a SQLite file."""
+
+    def __init__(self, ttl: float, max_entries: int, db_path: str = ""):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path and ttl > 0:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS web_search_cache ("
+                "key TEXT PRIMARY KEY, results TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[list[str]]:
+        if self.ttl <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                return entry[1]
+            if entry:
+                del self._memory[key]
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT results, expires_at FROM web_search_cache "
+                "WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            results = json.loads(row[0])
+            self._remember(key, row[1], results)
+            return results
 
+    def set(self, key: str, results: list[str]):
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, results)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO web_search_cache VALUES (?, ?, ?)",
+                    (key, json.dumps(results, ensure_ascii=False), expires_at),
+                )
+                self._db.execute(
+                    "DELETE FROM web_search_cache WHERE expires_at <= ?", (time.time(),)
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, results: list[str]):
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+cache = SearchCache(CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_DB)
+
+
+# ---------------------------------------------------------------------------
+# 请求
+# ---------------------------------------------------------------------------
+def _request_body(query: str) -> dict:
+    return {"Query": query, "SearchType": "web", "Count": 5, "NeedSummary": True}
+
+
+def _sha256_hex(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _hmac_sha256(key: bytes, content: str) -> bytes:
+    return hmac.new(key, content.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _signed_headers(body: str, ak: str, sk: str, session_token: str) -> dict:
+    """
+    Sign a WebSearch POST for the async path.
+
+    `ve_request` both signs and sends the request with blocking `requests`, and
+    veadk has no signing-only helper, so the async path signs here with the same
+    HMAC-SHA256 scheme (content-type;host;x-content-sha256;x-date over
+    Action/Version). The sync path keeps using `ve_request`.
+    """
+    x_date = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    short_x_date = x_date[:8]
+    content_sha256 = _sha256_hex(body)
+    signed_headers = "content-type;host;x-content-sha256;x-date"
+    canonical_request = "\n".join(
+        [
+            "POST",
+            "/",
+            f"Action={ACTION}&Version={VERSION}",
+            f"content-type:{CONTENT_TYPE}\nhost:{HOST}\n"
+            f"x-content-sha256:{content_sha256}\nx-date:{x_date}",
+            "",
+            signed_headers,
+            content_sha256,
+        ]
+    )
+    credential_scope = f"{short_x_date}/{REGION}/{SERVICE}/request"
+    string_to_sign = "\n".join(
+        ["HMAC-SHA256", x_date, credential_scope, _sha256_hex(canonical_request)]
+    )
+    k_signing = _hmac_sha256(sk.encode("utf-8"), short_x_date)
+    for scope in (REGION, SERVICE, "request"):
+        k_signing = _hmac_sha256(k_signing, scope)
+    signature = _hmac_sha256(k_signing, string_to_sign).hex()
+
+    headers = {
+        "Host": HOST,
+        "X-Content-Sha256": content_sha256,
+        "X-Date": x_date,
+        "Content-Type": CONTENT_TYPE,
+        "Authorization": f"HMAC-SHA256 Credential={ak}/{credential_scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}",
+    }
+    if session_token:
+        headers["X-Security-Token"] = session_token
+    return headers
+
+
+def _parse_response(response) -> tuple[list, bool]:
+    try:
+        results: list = response["Result"]["WebResults"]
+        return [result["Summary"].strip() for result in results], True
+    except Exception as e:
+        logger.error(f"Web search failed {e}, response body: {response}")
+        return [response], False
+
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    # AsyncClient 绑定创建时的事件循环，循环变化时重建
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+        _async_client_loop = loop
+    return _async_client
+
+
+def _get_ak_sk() -> tuple[str, str, str]:
+    ak, sk, session_token = _get_credential()
     if not ak or not sk:
-        logger.error("AK/SK is empty.")
-        return []
+        raise ValueError("AK/SK is empty.")
+    return ak, sk, session_token
+
 
+def _search(query: str) -> tuple[list, bool]:
+    ak, sk, session_token = _get_ak_sk()
     response = ve_request(
-        request_body={
-            "Query": query,
-            "SearchType": "web",
-            "Count": 5,
-            "NeedSummary": True,
-        },
-        action="WebSearch",
+        request_body=_request_body(query),
+        action=ACTION,
         ak=ak,
         sk=sk,
-        service="volc_torchlight_api",
-        version="2025-01-01",
-        region="cn-beijing",
-        host="mercury.volcengineapi.com",
+        service=SERVICE,
+        version=VERSION,
+        region=REGION,
+        host=HOST,
         header={"X-Security-Token": session_token},
     )
+    return _parse_response(response)
+
+
+async def _asearch(query: str) -> tuple[list, bool]:
+    ak, sk, session_token = _get_ak_sk()
+    body = json.dumps(_request_body(query))
+    response = await _get_async_client().post(
+        f"https://{HOST}/",
+        params={"Action": ACTION, "Version": VERSION},
+        headers=_signed_headers(body, ak, sk, session_token),
+        content=body,
+    )
+    return _parse_response(response.json())
+
 
+_inflight_lock = threading.Lock()
+_inflight: dict[str, Future] = {}
+_async_inflight: dict[str, asyncio.Task] = {}
+
+
+def web_search(query: str) -> list[str]:
+    """Search a query in websites.
+
+    Args:
+        query: The query to search.
+
+    Returns:
+        A list of result documents.
+    """
+    if not query:
+        logger.error("Query is empty.")
+        return []
+
+    key = normalize_query(query)
+    cached = cache.get(key)
+    if cached is not None:
+        stats["hits"] += 1
+        return cached
+
+    # 其他线程正在搜索相同查询时直接等待其结果
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        stats["coalesced"] += 1
+        return future.result()
+
+    stats["misses"] += 1
     try:
-        results: list = response["Result"]["WebResults"]
-        final_results = []
-        for result in results:
-            final_results.append(result["Summary"].strip())
-        return final_results
+        try:
+            results, ok = _search(query)
+        except ValueError as e:
+            logger.error(str(e))
+            results, ok = [], False
+        if ok:
+            cache.set(key, results)
+        future.set_result(results)
+        return results
     except Exception as e:
-        logger.error(f"Web search failed {e}, response body: {response}")
-        return [response]
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+async def _asearch_and_cache(query: str, key: str) -> list[str]:
+    try:
+        results, ok = await _asearch(query)
+    except ValueError as e:
+        logger.error(str(e))
+        return []
+    if ok:
+        cache.set(key, results)
+    return results
+
+
+async def aweb_search(query: str) -> list[str]:
+    """Async variant of `web_search` sharing the same cache and counters."""
+    if not query:
+        logger.error("Query is empty.")
+        return []
+
+    key = normalize_query(query)
+    cached = cache.get(key)
+    if cached is not None:
+        stats["hits"] += 1
+        return cached
+
+    task = _async_inflight.get(key)
+    if task is not None and task.get_loop() is asyncio.get_running_loop():
+        stats["coalesced"] += 1
+    else:
+        stats["misses"] += 1
+        task = asyncio.ensure_future(_asearch_and_cache(query, key))
+        _async_inflight[key] = task
+        task.add_done_callback(
+            lambda done: (
+                _async_inflight.pop(key, None)
+                if _async_inflight.get(key) is done
+                else None
+            )
+        )
+    # shield：单个调用方被取消时不影响其他等待同一查询的调用方
+    return await asyncio.shield(task)
+
+
+def get_stats() -> dict:
+    total = stats["hits"] + stats["misses"] + stats["coalesced"]
+    saved = stats["hits"] + stats["coalesced"]
+    return {**stats, "saved_ratio": round(saved / total, 3) if total else 0.0}
 
 
 if __name__ == "__main__":
@@ -101,3 +400,4 @@ if __name__ == "__main__":
     query = sys.argv[1]
     results = web_search(query)
     print(results)
+    logger.debug(f"Web search cache stats: {get_stats()}")